@@ -10,6 +10,14 @@ import pymongo
 
 # import custom local stuff
 from api.db import get_dbm_no_close
+from api.haveyouseenx import (
+    BACKLOG_DATABASE,
+    BACKLOG_INDEXES,
+    BacklogGame as BacklogGameModel,
+    backlog_game_doc,
+    backlog_upserts,
+)
+from api.mildredleague import DRAFT_PIPELINES, draft_pick_doc
 
 
 def ml_team_upload():
@@ -39,6 +47,18 @@ def ml_game_upload():
     season_data.games_to_mongo()
 
 
+def ml_draft_upload():
+    # mildredleague draft history
+    draft_path = os.path.join(
+        os.getcwd(),
+        'backup',
+        'mildredleague',
+        'mldrafthistory.csv'
+    )
+    draft_data = MildredLeagueDraft()
+    draft_data.picks_to_mongo(draft_path)
+
+
 def backlog_upload():
     # haveyouseenx
     backlog_path = os.path.join(
@@ -162,27 +182,24 @@ class Backlog:
 
     def to_mongo(self):
         client = get_dbm_no_close()
-        db = client.backlogs
-        doc_list = [backlog_game.to_dict() for _id, backlog_game in self.backlog_dict.items()]
-        if list(db.annuitydew.find()) == doc_list:
-            print("All backlog games are already synced!")
-        elif not list(db.annuitydew.find()):
-            db.annuitydew.insert_many(doc_list)
-            print("Bulk insert complete!")
-        else:
-            for _id, backlog_game in self.backlog_dict.items():
-                try:
-                    db.annuitydew.insert_one(backlog_game.to_dict())
-                    print("Inserted " + _id + ".")
-                except pymongo.errors.DuplicateKeyError:
-                    db.annuitydew.replace_one({"_id": _id}, backlog_game.to_dict())
-                    print("Replaced " + _id + ".")
+        collection = client[BACKLOG_DATABASE][BacklogGameModel.__collection__]
+        # the same checks and upserts as the API's CSV import, games are
+        # keyed by owner and csv_id and get an updated_seq when it starts
+        docs = {
+            _id: backlog_game_doc({**backlog_game.to_dict(), "csv_id": _id})
+            for _id, backlog_game in self.backlog_dict.items()
+        }
+        result = collection.bulk_write(
+            backlog_upserts(self.backlog_owner, docs), ordered=False
+        )
+        print(
+            "Bulk upsert complete! "
+            f"Inserted: {result.upserted_count}, updated: {result.modified_count}, "
+            f"unchanged: {result.matched_count - result.modified_count}"
+        )
 
-        # create index
-        db.annuitydew.create_index([
-            ("game_title", pymongo.TEXT),
-            ("sub_title", pymongo.TEXT)
-        ])
+        # create the API's indexes
+        collection.create_indexes(BACKLOG_INDEXES)
 
     def print_contents(self):
         print(f'Backlog(backlog_owner={self.backlog_owner})')
@@ -381,6 +398,58 @@ class MildredLeagueSeason:
             print(f'{_id}')
 
 
+class MildredLeagueDraft:
+    '''Streams the draft history CSV into mongo and precomputes the draft pages.
+
+    Rows are read one at a time and written in bulk batches, so the whole
+    file never sits in memory.
+    '''
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+
+    def picks_from_csv(self, draft_path):
+        with open(draft_path, encoding='utf-8-sig', newline='') as draft_csv:
+            for row in csv.DictReader(draft_csv):
+                yield draft_pick_doc(row)
+
+    def picks_to_mongo(self, draft_path):
+        client = get_dbm_no_close()
+        db = client.mildredleague
+        batch = []
+        written = 0
+        pick_ids = []
+        for pick in self.picks_from_csv(draft_path):
+            pick_ids.append(pick['_id'])
+            batch.append(pymongo.ReplaceOne({'_id': pick['_id']}, pick, upsert=True))
+            if len(batch) == self.batch_size:
+                db.draftpicks.bulk_write(batch, ordered=False)
+                written += len(batch)
+                batch = []
+        if batch:
+            db.draftpicks.bulk_write(batch, ordered=False)
+            written += len(batch)
+        print("Bulk upsert complete! Picks: " + str(written))
+        # picks that aren't in the CSV anymore would live on in the transforms
+        deleted = db.draftpicks.delete_many({'_id': {'$nin': pick_ids}})
+        print("Stale picks deleted: " + str(deleted.deleted_count))
+        # create index
+        db.draftpicks.create_index([
+            ('season', pymongo.ASCENDING),
+            ('nick', pymongo.ASCENDING)
+        ])
+        db.draftpicks.create_index([
+            ('player', pymongo.ASCENDING)
+        ])
+        self.draft_transforms(db)
+
+    def draft_transforms(self, db):
+        # each pipeline ends in $out, which replaces the whole collection
+        for collection, pipeline in DRAFT_PIPELINES.items():
+            db.draftpicks.aggregate(pipeline)
+            print("Draft transform complete! Collection: " + collection)
+
+
 class MLGame:
     def __init__(self, json_data):
         doc = json.loads(json_data)
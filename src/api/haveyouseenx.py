@@ -1,19 +1,32 @@
 # import Python packages
-from datetime import datetime
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+import csv
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from enum import Enum
-import json
-from typing import List, Optional
+import io
+from itertools import islice
+from typing import Dict, List, Optional
 
 # import third party packages
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from motor.motor_asyncio import AsyncIOMotorClient
 import numpy
+import orjson
 import pandas
 import plotly
 import plotly.express as px
+import pymongo
+from pymongo import IndexModel, ReplaceOne, UpdateOne
 from odmantic import AIOEngine, Field, Model, ObjectId, query
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 # import custom local stuff
+from src.api.responses import JSONBytesResponse, decode_cursor, encode_cursor
+from src.api.search import SearchIndex
+from src.db.analytics import find_frame
 from src.db.atlas import get_odm
 from src.api.users import UserOut, oauth2_scheme
 
@@ -23,6 +36,9 @@ hysx_api = APIRouter(
     tags=["haveyouseenx"],
 )
 
+# every owner's backlog lives in this database
+BACKLOG_DATABASE = "backlogs"
+
 
 class YesNo(str, Enum):
     YES = "Y"
@@ -45,6 +61,10 @@ class PlaytimeCalc(str, Enum):
 
 
 class BacklogGame(Model):
+    # every owner's backlog shares the collection
+    owner: str = 'annuitydew'
+    # the game's id in the backlog CSV it was imported from, if it was
+    csv_id: Optional[str]
     game_title: str
     sub_title: Optional[str]
     game_system: str
@@ -60,6 +80,8 @@ class BacklogGame(Model):
     beat_date: Optional[datetime]
     complete_date: Optional[datetime]
     game_notes: Optional[str]
+    # where the game's last write falls in its owner's writes, see next_seq
+    updated_seq: int = 0
 
 
 class BacklogGamePatch(Model):
@@ -80,173 +102,1000 @@ class BacklogGamePatch(Model):
     game_notes: Optional[str]
 
 
-@hysx_api.get('/annuitydew/game/all')
-async def get_all_games(client: AsyncIOMotorClient = Depends(get_odm)):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    data = [game async for game in engine.find(BacklogGame, sort=BacklogGame.id)]
-    if data:
-        return data
-    else:
+class BacklogTimeline(Model):
+    # the timeline, stored as the status changes landing on each day.
+    # see timeline_inc
+    backlog: str = Field(primary_field=True)
+    days: Dict[str, Dict[str, int]]
+    residual: Dict[str, int]
+    last_event: datetime
+
+
+class BacklogCounters(Model):
+    # running totals behind the stats endpoints, kept up to date by
+    # counters_update on every write. counters_repair recounts them
+    backlog: str = Field(primary_field=True)
+    status: Dict[str, int]
+    systems: Dict[str, int]
+    game_hours: int
+    game_minutes: int
+    version: int = 0
+
+
+class BacklogSeq(Model):
+    # the last updated_seq handed out for each owner's writes, and the
+    # first seq and start time of each write that hasn't landed yet
+    backlog: str = Field(primary_field=True)
+    seq: int
+    writing: List[Dict] = []
+
+
+class BacklogTombstone(Model):
+    # a deleted game, kept so delta syncs can pass the deletion on.
+    # it goes away if the game is written again
+    owner: str
+    game_id: str
+    updated_seq: int
+
+
+class BacklogPage(BaseModel):
+    results: List[BacklogGame]
+    total: int
+    # pass it back as ?after= for the next page. None on the last page
+    next_cursor: Optional[str]
+
+
+class BacklogChanges(BaseModel):
+    # games written and ids of games deleted after since, oldest first
+    updated: List[BacklogGame]
+    deleted: List[str]
+    # pass it back as ?since= for the next changes
+    seq: int
+    # there are more changes after seq
+    more: bool
+
+
+# every backlog query is scoped to an owner, so the indexes lead with it.
+# listings, frames and the search index build read a whole backlog in _id
+# order, the dashboard's now playing $lookup filters on now_playing
+BACKLOG_INDEXES = [
+    IndexModel([('owner', pymongo.ASCENDING), ('_id', pymongo.ASCENDING)]),
+    IndexModel([
+        ('owner', pymongo.ASCENDING),
+        ('now_playing', pymongo.ASCENDING),
+        ('_id', pymongo.ASCENDING),
+    ]),
+    IndexModel([('owner', pymongo.ASCENDING), ('updated_seq', pymongo.ASCENDING)]),
+    # CSV imports upsert on the CSV's game ids
+    IndexModel([('owner', pymongo.ASCENDING), ('csv_id', pymongo.ASCENDING)]),
+]
+# changes read tombstones by updated_seq, writes clear them by game_id
+TOMBSTONE_INDEXES = [
+    IndexModel([('owner', pymongo.ASCENDING), ('updated_seq', pymongo.ASCENDING)]),
+    IndexModel([('owner', pymongo.ASCENDING), ('game_id', pymongo.ASCENDING)]),
+]
+# games stored before backlogs had owners belong to this one
+DEFAULT_OWNER = 'annuitydew'
+
+async def backlog_owner(owner: str, user: UserOut = Depends(oauth2_scheme)):
+    # anyone logged in can read a backlog, only its owner can write to it
+    if user.username != owner:
+        raise HTTPException(status_code=403, detail="Not your backlog!")
+    return user
+
+
+# page sizes for the game listings
+PAGE_LIMIT = 100
+PAGE_LIMIT_MAX = 500
+
+
+@hysx_api.get('/{owner}/game/all', response_model=BacklogPage)
+async def get_all_games(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+    limit: int = Query(PAGE_LIMIT, ge=1, le=PAGE_LIMIT_MAX),
+    after: str = None,
+):
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    total = await engine.count(BacklogGame, BacklogGame.owner == owner)
+    if not total:
         raise HTTPException(status_code=404, detail="No data found!")
+    queries = [BacklogGame.owner == owner]
+    if after is not None:
+        (after_id,) = decode_cursor(after, 1)
+        queries.append(BacklogGame.id > after_id)
+    # one extra game tells us whether there's another page
+    data = [
+        game
+        async for game in engine.find(
+            BacklogGame, *queries, sort=BacklogGame.id, limit=limit + 1
+        )
+    ]
+    next_cursor = None
+    if len(data) > limit:
+        next_cursor = encode_cursor([data[limit - 1].id])
+    return {
+        'results': data[:limit],
+        'total': total,
+        'next_cursor': next_cursor,
+    }
 
 
-@hysx_api.post('/annuitydew/game')
+@hysx_api.post('/{owner}/game')
 async def add_games(
+    owner: str,
     doc_list: List[BacklogGame],
     client: AsyncIOMotorClient = Depends(get_odm),
-    user: UserOut = Depends(oauth2_scheme),
+    user: UserOut = Depends(backlog_owner),
 ):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    result = await engine.save_all(doc_list)
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    for doc in doc_list:
+        doc.owner = owner
+    # any games being overwritten need to come back out of the timeline
+    replaced_list = [
+        game
+        async for game in engine.find(
+            BacklogGame, query.in_(BacklogGame.id, [doc.id for doc in doc_list])
+        )
+    ]
+    if any(game.owner != owner for game in replaced_list):
+        raise HTTPException(status_code=400, detail="Game belongs to another backlog!")
+    async with writing_seqs(client, owner, len(doc_list)) as first_seq:
+        for i, doc in enumerate(doc_list):
+            doc.updated_seq = first_seq + i
+        result = await engine.save_all(doc_list)
+    await tombstones_clear(client, owner, [doc.id for doc in doc_list])
+    await timeline_update(client, owner, doc_list=doc_list, removed_list=replaced_list)
+    version = await counters_update(
+        client, owner, doc_list=doc_list, removed_list=replaced_list
+    )
+    search_update(owner, version, doc_list=doc_list)
     return {
         "result": result,
     }
 
 
-@hysx_api.get('/annuitydew/game/{oid}', response_model=BacklogGame)
+@hysx_api.post('/{owner}/game/import')
+async def import_games(
+    owner: str,
+    file: UploadFile = File(...),
+    client: AsyncIOMotorClient = Depends(get_odm),
+    user: UserOut = Depends(backlog_owner),
+):
+    # upsert a backlog CSV, a chunk at a time so big files don't
+    # have to fit in memory
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    collection = engine.get_collection(BacklogGame)
+    rows = csv.reader(io.TextIOWrapper(file.file, encoding='latin1', newline=''))
+    header = next(rows, None)
+    if header is None:
+        raise HTTPException(status_code=400, detail="Empty file!")
+    fields = BACKLOG_CSV_FIELDS + header[len(BACKLOG_CSV_FIELDS):]
+
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    while True:
+        # the file is read off a spooled temp file, keep that off the event loop
+        doc_list = await run_in_threadpool(csv_games, rows, fields)
+        if not doc_list:
+            break
+        # a game repeated in a chunk is written once, the last row wins
+        docs = {}
+        for doc in doc_list:
+            doc['owner'] = owner
+            docs[doc['csv_id']] = doc
+        total = len(docs)
+        # only games that actually change get a new updated_seq
+        async for stored in collection.find(
+            {'owner': owner, 'csv_id': {'$in': list(docs)}}
+        ):
+            del stored['_id']
+            stored.pop('updated_seq', None)
+            if docs.get(stored['csv_id']) == stored:
+                del docs[stored['csv_id']]
+        counts['unchanged'] += total - len(docs)
+        if not docs:
+            continue
+        async with writing_seqs(client, owner, len(docs)) as first_seq:
+            for i, doc in enumerate(docs.values()):
+                doc['updated_seq'] = first_seq + i
+            # there's no tombstone to clear, deleted games never come back
+            result = await collection.bulk_write(
+                backlog_upserts(owner, docs), ordered=False
+            )
+        counts['inserted'] += result.upserted_count
+        counts['updated'] += result.modified_count
+
+    # too much changed to apply game by game, rebuild what's derived. the
+    # recount moves the version on, so search indexes get rebuilt as well
+    await counters_repair(client, owner)
+    await timeline_transform(client, owner)
+    return counts
+
+
+# CSV columns in restore/db.py Backlog.from_csv order. columns after
+# these are kept under their header names if they're game fields, like
+# the dlc column newer exports have, and dropped otherwise
+BACKLOG_CSV_FIELDS = [
+    'csv_id',
+    'game_title',
+    'sub_title',
+    'game_system',
+    'genre',
+    'now_playing',
+    'game_status',
+    'game_hours',
+    'game_minutes',
+    'playtime_calc',
+    'add_date',
+    'start_date',
+    'beat_date',
+    'complete_date',
+    'game_notes',
+]
+BACKLOG_CSV_EXTRA_FIELDS = ['dlc']
+IMPORT_BATCH_SIZE = 1000
+
+
+def csv_games(rows, fields: List[str], size: int = IMPORT_BATCH_SIZE):
+    """Up to size backlog documents off a CSV reader, converted the same
+    way as restore/db.py Backlog.from_csv."""
+    ints = [fields.index(column) for column in ['game_hours', 'game_minutes']]
+    dates = [
+        fields.index(column)
+        for column in ['add_date', 'start_date', 'beat_date', 'complete_date']
+    ]
+    doc_list = []
+    for row in islice(rows, size):
+        try:
+            for index in ints:
+                if row[index] != '':
+                    row[index] = int(row[index])
+            for index in dates:
+                if row[index] != '':
+                    row[index] = datetime.strptime(
+                        row[index], '%m/%d/%y'
+                    ).replace(hour=16)
+            # convert empty strings to None
+            doc_list.append(backlog_game_doc(
+                dict(zip(fields, [None if item == '' else item for item in row]))
+            ))
+        except (IndexError, ValueError):
+            raise HTTPException(
+                status_code=400, detail=f"Bad row! Line: {rows.line_num}"
+            )
+    return doc_list
+
+
+def backlog_game_doc(doc: Dict) -> Dict:
+    """A CSV game's document, with only the CSV fields kept. It's checked
+    against BacklogGame, a ValueError means it would break every read of
+    the backlog once it's stored."""
+    doc = {
+        field: doc.get(field)
+        for field in BACKLOG_CSV_FIELDS + BACKLOG_CSV_EXTRA_FIELDS
+    }
+    if doc['csv_id'] is None:
+        raise ValueError('every game needs an id')
+    # older backlog exports have no dlc column
+    if doc['dlc'] is None:
+        doc['dlc'] = YesNo.NO.value
+    # pydantic's ValidationError is a ValueError too
+    BacklogGame(**doc)
+    return doc
+
+
+def backlog_upserts(owner: str, docs: Dict[str, Dict]) -> List[ReplaceOne]:
+    """Writes for CSV games keyed by their csv_id, which only has to be
+    unique within the backlog. Upserts get a new ObjectId like any other
+    game, replacements keep theirs."""
+    return [
+        ReplaceOne(
+            {'owner': owner, 'csv_id': csv_id}, {**doc, 'owner': owner}, upsert=True
+        )
+        for csv_id, doc in docs.items()
+    ]
+
+
+@hysx_api.get('/{owner}/game/{oid}', response_model=BacklogGame)
 async def get_game(
+    owner: str,
     oid: ObjectId,
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    game = await engine.find_one(BacklogGame, BacklogGame.id == oid)
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    game = await engine.find_one(
+        BacklogGame, BacklogGame.id == oid, BacklogGame.owner == owner
+    )
     if game:
         return game
     else:
         raise HTTPException(status_code=404, detail="No data found!")
 
 
-@hysx_api.patch('/annuitydew/game/{oid}')
+@hysx_api.patch('/{owner}/game/{oid}')
 async def edit_game(
+    owner: str,
     oid: ObjectId,
     patch: BacklogGamePatch,
     client: AsyncIOMotorClient = Depends(get_odm),
-    user: UserOut = Depends(oauth2_scheme),
+    user: UserOut = Depends(backlog_owner),
 ):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    game = await engine.find_one(BacklogGamePatch, BacklogGamePatch.id == oid)
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    game = await engine.find_one(
+        BacklogGame, BacklogGame.id == oid, BacklogGame.owner == owner
+    )
     if game is None:
         raise HTTPException(status_code=404, detail="No data found!")
+    old_game = game.copy()
 
+    # the patch model leaves owner, csv_id and updated_seq out,
+    # so they can't be patched
     patch_dict = patch.dict(exclude_unset=True)
     for attr, value in patch_dict.items():
         setattr(game, attr, value)
-    result = await engine.save(game)
+    async with writing_seqs(client, owner) as updated_seq:
+        game.updated_seq = updated_seq
+        result = await engine.save(game)
+    await timeline_update(client, owner, doc_list=[game], removed_list=[old_game])
+    version = await counters_update(
+        client, owner, doc_list=[game], removed_list=[old_game]
+    )
+    search_update(owner, version, doc_list=[game])
 
     return {
         "result": result,
     }
 
 
-@hysx_api.delete('/annuitydew/game/{oid}')
+@hysx_api.delete('/{owner}/game/{oid}')
 async def delete_game(
+    owner: str,
     oid: ObjectId,
     client: AsyncIOMotorClient = Depends(get_odm),
-    user: UserOut = Depends(oauth2_scheme),
+    user: UserOut = Depends(backlog_owner),
 ):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    game = await engine.find_one(BacklogGame, BacklogGame.id == oid)
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    game = await engine.find_one(
+        BacklogGame, BacklogGame.id == oid, BacklogGame.owner == owner
+    )
     if game is None:
         raise HTTPException(status_code=404, detail="No data found!")
 
     await engine.delete(game)
+    async with writing_seqs(client, owner) as updated_seq:
+        await engine.get_collection(BacklogTombstone).replace_one(
+            {'owner': owner, 'game_id': str(game.id)},
+            {
+                'owner': owner,
+                'game_id': str(game.id),
+                'updated_seq': updated_seq,
+            },
+            upsert=True,
+        )
+    await timeline_update(client, owner, removed_list=[game])
+    version = await counters_update(client, owner, removed_list=[game])
+    search_update(owner, version, removed_list=[game])
 
     return {
         "game": game,
     }
 
 
-@hysx_api.get('/annuitydew/stats/counts')
-async def count_by_status(client: AsyncIOMotorClient = Depends(get_odm)):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    collection = engine.get_collection(BacklogGame)
-    results = await collection.aggregate([{
-        '$group': {
-            '_id': '$game_status',
-            'count': {
-                '$sum': 1
-            }
-        }
-    }]).to_list(length=None)
+@hysx_api.get('/{owner}/changes', response_model=BacklogChanges)
+async def get_changes(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+    since: int = Query(0, ge=0),
+    limit: int = Query(PAGE_LIMIT, ge=1, le=PAGE_LIMIT_MAX),
+):
+    # delta sync. since=0 is the whole backlog, after that only what changed
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    # nothing past a write that's still landing, or a client could sync
+    # past it and never see it
+    until = await committed_seq(client, owner)
+    # one extra change from each side tells us whether there are more
+    updated = [
+        game
+        async for game in engine.find(
+            BacklogGame,
+            BacklogGame.owner == owner,
+            BacklogGame.updated_seq > since,
+            BacklogGame.updated_seq <= until,
+            sort=BacklogGame.updated_seq,
+            limit=limit + 1,
+        )
+    ]
+    deleted = await engine.get_collection(BacklogTombstone).find(
+        {'owner': owner, 'updated_seq': {'$gt': since, '$lte': until}},
+        sort=[('updated_seq', pymongo.ASCENDING)],
+        limit=limit + 1,
+    ).to_list(length=None)
+    return changes_page(updated, deleted, since, limit)
+
+
+def changes_page(updated, deleted, since: int, limit: int):
+    """BacklogChanges out of the first limit + 1 games and tombstones after
+    since, each in updated_seq order. Only the first limit changes of the
+    two together go out."""
+    seqs = sorted(
+        [game.updated_seq for game in updated]
+        + [tombstone['updated_seq'] for tombstone in deleted]
+    )
+    seq = seqs[:limit][-1] if seqs else since
+    return {
+        'updated': [game for game in updated if game.updated_seq <= seq],
+        'deleted': [
+            tombstone['game_id']
+            for tombstone in deleted
+            if tombstone['updated_seq'] <= seq
+        ],
+        'seq': seq,
+        'more': len(seqs) > limit,
+    }
 
-    stats = {result.get('_id'): result.get('count') for result in results}
-    sorted_stats = dict(sorted(stats.items(), key=lambda item: item[1], reverse=True))
-    return sorted_stats
+
+# a write's seqs hold changes back until it lands. ones still writing
+# after this long are from a write that died, and are skipped
+SEQ_WRITE_TIMEOUT = timedelta(minutes=1)
+
+
+async def next_seq(client: AsyncIOMotorClient, owner: str, count: int = 1) -> int:
+    """Hand out count updated_seq values for an owner's writes and return
+    the first one. They only ever go up, and they're recorded as writing
+    until seq_landed, see committed_seq."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    timeout = SEQ_WRITE_TIMEOUT // timedelta(milliseconds=1)
+    # one update, so no read sees the seqs handed out but not writing yet.
+    # dead writes are cleared out on the way
+    doc = await engine.get_collection(BacklogSeq).find_one_and_update(
+        {'_id': owner},
+        [{
+            '$set': {
+                'seq': {'$add': [{'$ifNull': ['$seq', 0]}, count]},
+                'writing': {'$filter': {
+                    'input': {'$ifNull': ['$writing', []]},
+                    'cond': {
+                        '$gt': ['$$this.at', {'$subtract': ['$$NOW', timeout]}]
+                    },
+                }},
+            },
+        }, {
+            '$set': {
+                'writing': {'$concatArrays': ['$writing', [{
+                    'first': {'$subtract': ['$seq', count - 1]},
+                    'at': '$$NOW',
+                }]]},
+            },
+        }],
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
+    return doc['seq'] - count + 1
+
+
+async def seq_landed(client: AsyncIOMotorClient, owner: str, first_seq: int):
+    # the write is done with its seqs, whether it went through or not
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    await engine.get_collection(BacklogSeq).update_one(
+        {'_id': owner}, {'$pull': {'writing': {'first': first_seq}}}
+    )
+
+
+@asynccontextmanager
+async def writing_seqs(client: AsyncIOMotorClient, owner: str, count: int = 1):
+    """next_seq for a write made inside the block, landed when it exits."""
+    first_seq = await next_seq(client, owner, count)
+    try:
+        yield first_seq
+    finally:
+        await seq_landed(client, owner, first_seq)
+
+
+async def committed_seq(client: AsyncIOMotorClient, owner: str) -> int:
+    """The highest updated_seq that every one of an owner's writes up to
+    has landed. Writes run concurrently, so a later seq can be stored
+    before an earlier one, and changes are only read up to here."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    doc = await engine.get_collection(BacklogSeq).find_one({'_id': owner})
+    if doc is None:
+        return 0
+    cutoff = datetime.utcnow() - SEQ_WRITE_TIMEOUT
+    writing = [
+        write['first'] for write in doc.get('writing', []) if write['at'] > cutoff
+    ]
+    return min(writing) - 1 if writing else doc['seq']
+
+
+async def tombstones_clear(client: AsyncIOMotorClient, owner: str, game_ids):
+    # a game written again isn't deleted anymore
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    await engine.get_collection(BacklogTombstone).delete_many(
+        {'owner': owner, 'game_id': {'$in': [str(game_id) for game_id in game_ids]}}
+    )
 
 
-@hysx_api.get('/annuitydew/stats/playtime')
-async def playtime(client: AsyncIOMotorClient = Depends(get_odm)):
-    engine = AIOEngine(motor_client=client, database="backlogs")
+async def seq_backfill(client: AsyncIOMotorClient):
+    """Give games from before delta sync an updated_seq, so a sync from
+    the start picks them up."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
     collection = engine.get_collection(BacklogGame)
-    results = await collection.aggregate([{
+    missing = {}
+    async for game in collection.find(
+        {'updated_seq': {'$exists': False}}, {'owner': 1}, sort=[('_id', 1)]
+    ):
+        missing.setdefault(game['owner'], []).append(game['_id'])
+    for owner, game_ids in missing.items():
+        async with writing_seqs(client, owner, len(game_ids)) as first_seq:
+            await collection.bulk_write(
+                [
+                    UpdateOne(
+                        {'_id': game_id}, {'$set': {'updated_seq': first_seq + i}}
+                    )
+                    for i, game_id in enumerate(game_ids)
+                ],
+                ordered=False,
+            )
+
+
+async def get_counters(owner: str, client: AsyncIOMotorClient = Depends(get_odm)):
+    # one _id lookup, recounted from scratch if it's missing
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    counters = await engine.get_collection(BacklogCounters).find_one({'_id': owner})
+    if counters is None:
+        await has_games(client, owner)
+        counters = await counters_repair(client, owner)
+    return counters
+
+
+async def has_games(client: AsyncIOMotorClient, owner: str):
+    """404 unless the owner has a game. Reads check this before counting a
+    backlog from scratch, so they don't store counters for any owner
+    name that's asked for."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    game = await engine.get_collection(BacklogGame).find_one(
+        {'owner': owner}, {'_id': 1}
+    )
+    if game is None:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+
+def sorted_counts(counts: Dict[str, int]):
+    stats = {
+        counter_name(key): count for key, count in counts.items() if count > 0
+    }
+    return dict(sorted(stats.items(), key=lambda item: item[1], reverse=True))
+
+
+@hysx_api.get('/{owner}/stats/counts')
+async def count_by_status(counters: Dict = Depends(get_counters)):
+    return sorted_counts(counters['status'])
+
+
+@hysx_api.get('/{owner}/stats/systems')
+async def count_by_system(counters: Dict = Depends(get_counters)):
+    return sorted_counts(counters['systems'])
+
+
+@hysx_api.get('/{owner}/stats/playtime')
+async def playtime(counters: Dict = Depends(get_counters)):
+    # move chunks of 60 minutes into the hours count
+    leftover_minutes = counters['game_minutes'] % 60
+    hours_to_move = (counters['game_minutes'] - leftover_minutes) / 60
+    return {
+        '_id': None,
+        'total_hours': int(counters['game_hours'] + hours_to_move),
+        'total_minutes': int(leftover_minutes),
+    }
+
+
+@hysx_api.get('/{owner}/dashboard')
+async def dashboard(owner: str, client: AsyncIOMotorClient = Depends(get_odm)):
+    # everything the home page shows above the charts in one round trip,
+    # the counters with the now playing games joined on
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    collection = engine.get_collection(BacklogCounters)
+    pipeline = [
+        {'$match': {'_id': owner}},
+        {'$lookup': {
+            'from': BacklogGame.__collection__,
+            'pipeline': [
+                {'$match': {'owner': owner, 'now_playing': YesNo.YES.value}},
+                {'$sort': {'_id': 1}},
+                {'$project': {
+                    '_id': 0,
+                    'game_title': 1,
+                    'sub_title': 1,
+                    'game_system': 1,
+                }},
+            ],
+            'as': 'now_playing',
+        }},
+    ]
+    results = await collection.aggregate(pipeline).to_list(length=None)
+    if not results:
+        await has_games(client, owner)
+        await counters_repair(client, owner)
+        results = await collection.aggregate(pipeline).to_list(length=None)
+    counters = results[0]
+
+    return {
+        'stats': sorted_counts(counters['status']),
+        'playtime': await playtime(counters),
+        'systems': sorted_counts(counters['systems']),
+        'now_playing': counters['now_playing'],
+    }
+
+
+@hysx_api.post('/{owner}/stats/repair')
+async def repair_counters(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+    user: UserOut = Depends(backlog_owner),
+):
+    return await counters_repair(client, owner)
+
+
+def counter_key(name) -> str:
+    # counters are keyed by name, and a dot would read as a nested field
+    return str(getattr(name, 'value', name)).replace('.', '\uff0e')
+
+
+def counter_name(key: str) -> str:
+    return key.replace('\uff0e', '.')
+
+
+def counters_inc(game, sign: int):
+    """$inc paths that add (sign=1) or take out (sign=-1) one game."""
+    inc = Counter()
+    inc[f'status.{counter_key(game.game_status)}'] += sign
+    inc[f'systems.{counter_key(game.game_system)}'] += sign
+    inc['game_hours'] += sign * (game.game_hours or 0)
+    inc['game_minutes'] += sign * (game.game_minutes or 0)
+    return inc
+
+
+async def counters_update(
+    client: AsyncIOMotorClient,
+    owner: str,
+    doc_list=None,
+    removed_list=None,
+):
+    """Apply written and removed games to the counters and bump the
+    backlog's version, which is returned. If they haven't been counted
+    yet there's no version, the next read counts them from scratch."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    inc = Counter()
+    for game in doc_list or []:
+        inc.update(counters_inc(game, 1))
+    for game in removed_list or []:
+        inc.update(counters_inc(game, -1))
+    inc = {path: value for path, value in inc.items() if value}
+    # every write moves the version on, cached figures built before it are stale
+    inc['version'] = 1
+    counters = await engine.get_collection(BacklogCounters).find_one_and_update(
+        {'_id': owner},
+        {'$inc': inc},
+        projection={'version': 1},
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
+    return None if counters is None else counters['version']
+
+
+async def counters_repair(client: AsyncIOMotorClient, owner: str):
+    """Recount the counters from the whole backlog and replace them."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    results = await engine.get_collection(BacklogGame).aggregate([{
+        '$match': {'owner': owner},
+    }, {
         '$group': {
-            '_id': None,
-            'total_hours': {
+            '_id': {
+                'status': '$game_status',
+                'system': '$game_system',
+            },
+            'count': {
+                '$sum': 1
+            },
+            'game_hours': {
                 '$sum': '$game_hours'
             },
-            'total_minutes': {
+            'game_minutes': {
                 '$sum': '$game_minutes'
-            }
+            },
         }
     }]).to_list(length=None)
-    # move chunks of 60 minutes into the hours count
-    leftover_minutes = results[0].get('total_minutes') % 60
-    hours_to_move = (results[0].get('total_minutes') - leftover_minutes) / 60
-    results[0]['total_hours'] = int(results[0]['total_hours'] + hours_to_move)
-    results[0]['total_minutes'] = int(leftover_minutes)
 
-    return results[0]
+    status, systems = Counter(), Counter()
+    for result in results:
+        status[counter_key(result['_id'].get('status'))] += result['count']
+        systems[counter_key(result['_id'].get('system'))] += result['count']
+    # the version keeps counting up, so nothing cached looks fresh by accident
+    return await engine.get_collection(BacklogCounters).find_one_and_update(
+        {'_id': owner},
+        {
+            '$set': {
+                'status': dict(status),
+                'systems': dict(systems),
+                'game_hours': sum(result['game_hours'] for result in results),
+                'game_minutes': sum(result['game_minutes'] for result in results),
+            },
+            '$inc': {'version': 1},
+        },
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
 
 
-@hysx_api.get('/annuitydew/search', response_model=List[BacklogGame])
+@hysx_api.get('/{owner}/search', response_model=BacklogPage)
 async def search(
+    owner: str,
     client: AsyncIOMotorClient = Depends(get_odm),
     dlc: YesNo = None,
     now_playing: YesNo = None,
     game_status: GameStatus = None,
     q: str = None,
+    limit: int = Query(PAGE_LIMIT, ge=1, le=PAGE_LIMIT_MAX),
+    after: str = None,
 ):
-    engine = AIOEngine(motor_client=client, database="backlogs")
-    initial_args = {
+    index = await get_search_index(client, owner)
+    filters = {
         'dlc': dlc,
         'now_playing': now_playing,
         'game_status': game_status,
     }
-    final_args = { k:v for k, v in initial_args.items() if v is not None }
-    if final_args:
-        query_expression_list = [
-            (getattr(BacklogGame, key)) == value for key, value in final_args.items()
+    filters = {key: value for key, value in filters.items() if value is not None}
+
+    def keep(game):
+        return all(getattr(game, key) == value for key, value in filters.items())
+
+    # without a search term it's the whole (filtered) backlog
+    if q == '' or q is None:
+        keyed = [
+            (search_order(game), game) for game in index.docs.values() if keep(game)
         ]
-        combined_query_expression = query.and_(*query_expression_list)
-    else:
-        combined_query_expression = False
-    # change to plain q for OR results. f"\"{q}\"" is an AND search.
-    if combined_query_expression:
-        results = await engine.find(
-            BacklogGame,
-            combined_query_expression,
-            sort=(BacklogGame.dlc, BacklogGame.id),
-        )        
-    elif q == '' or q is None:
-        results = await engine.find(
-            BacklogGame,
-            sort=(BacklogGame.dlc, BacklogGame.id),
-        )
-    else:
-        results = await engine.find(
-            BacklogGame,
-            { '$text': { '$search': f"\"{q}\"" }},
-            sort=(BacklogGame.dlc, BacklogGame.id),
+        keyed.sort(key=lambda item: item[0])
+        return keyset_page(keyed, limit, after)
+
+    # otherwise best matches first, ties in the usual order. ranked pages
+    # go by position instead of score: every write moves the BM25 stats
+    # and so every score, and a score cursor would skip or repeat games
+    # all over the ranking. a position only shifts by the games a write
+    # actually moves ahead of it or out of the way
+    ranked = sorted(
+        (
+            ((-score,) + search_order(index.docs[game_id]), index.docs[game_id])
+            for game_id, score in index.search(q)
+            if keep(index.docs[game_id])
+        ),
+        key=lambda item: item[0],
+    )
+    keyed = [((position,), game) for position, (_, game) in enumerate(ranked)]
+    return keyset_page(keyed, limit, after)
+
+
+@hysx_api.get('/{owner}/search/suggest')
+async def search_suggest(
+    owner: str,
+    q: str,
+    limit: int = 10,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    # typeahead. the last word of q can be unfinished
+    index = await get_search_index(client, owner)
+    titles = []
+    for game_id, score in index.search(q, prefix=True):
+        game = index.docs[game_id]
+        title = ': '.join(
+            [part for part in [game.game_title, game.sub_title] if part]
         )
+        if title not in titles:
+            titles.append(title)
+        if len(titles) == limit:
+            break
+    return titles
+
+
+# weights of the searchable fields, a title match counts most
+SEARCH_FIELDS = {
+    'game_title': 3.0,
+    'sub_title': 2.0,
+    'game_system': 1.0,
+    'genre': 1.0,
+    'game_notes': 1.0,
+}
+
+
+# owners with a search index or cached figures kept in memory. the least
+# recently used ones are dropped past these, and rebuilt if they come back
+SEARCH_INDEX_LIMIT = 256
+FIGURE_CACHE_LIMIT = 1024
+
+
+class BacklogSearch():
+    def __init__(self):
+        # owner: (backlog version it was built from, SearchIndex), least
+        # recently used first
+        self.indexes = OrderedDict()
+
+
+backlog_search = BacklogSearch()
+
+
+def search_order(game):
+    return (game.dlc, str(game.id))
+
+
+def keyset_page(keyed, limit: int, after: str = None):
+    """BacklogPage out of (sort keys, game) pairs that are already sorted.
+    The page starts right after the keys in the cursor."""
+    keys = [sort_keys for sort_keys, game in keyed]
+    start = 0
+    if after is not None and keys:
+        try:
+            start = bisect_right(keys, decode_cursor(after, len(keys[0])))
+        except TypeError:
+            raise HTTPException(status_code=400, detail="Invalid cursor!")
+    end = start + limit
+    return {
+        'results': [game for sort_keys, game in keyed[start:end]],
+        'total': len(keyed),
+        'next_cursor': encode_cursor(keys[end - 1]) if end < len(keys) else None,
+    }
+
+
+async def get_search_index(client: AsyncIOMotorClient, owner: str) -> SearchIndex:
+    """An owner's search index. It's built on their first search, kept up
+    to date by this instance's write endpoints after that and rebuilt
+    when their backlog's version has moved on without it, like after an
+    import or a write through another instance. As with cached_figure,
+    the version is read before the backlog is."""
+    indexes = backlog_search.indexes
+    counters = await get_counters(owner, client)
+    version = counters.get('version', 0)
+    cached = indexes.get(owner)
+    if cached is not None and cached[0] == version:
+        indexes.move_to_end(owner)
+        return cached[1]
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    index = SearchIndex(SEARCH_FIELDS)
+    async for game in engine.find(BacklogGame, BacklogGame.owner == owner):
+        index.add(game.id, game)
+    indexes[owner] = (version, index)
+    indexes.move_to_end(owner)
+    if len(indexes) > SEARCH_INDEX_LIMIT:
+        indexes.popitem(last=False)
+    return index
+
+
+def search_update(owner: str, version: int, doc_list=None, removed_list=None):
+    """Apply one write to the owner's search index, if it's been built.
+    version is the backlog's version after the write, an index that isn't
+    at the one right before it missed a write and is dropped instead."""
+    cached = backlog_search.indexes.get(owner)
+    if cached is None:
+        return
+    if version is None or cached[0] != version - 1:
+        del backlog_search.indexes[owner]
+        return
+    index = cached[1]
+    for game in removed_list or []:
+        index.remove(game.id)
+    for game in doc_list or []:
+        index.add(game.id, game)
+    backlog_search.indexes[owner] = (version, index)
+
+
+# statuses on the timeline, and how each event moves a game between them
+TIMELINE_STATUSES = ['Not Started', 'Started', 'Beaten', 'Completed']
+TIMELINE_DELTAS = {
+    'add_date': [1, 0, 0, 0],
+    'start_date': [-1, 1, 0, 0],
+    'beat_date': [0, -1, 1, 0],
+    'complete_date': [0, 0, -1, 1],
+}
+# the backlog's birth date, and where the timeline chart starts
+BACKLOG_BIRTH = numpy.datetime64('2011-10-08T16:00:00')
+BACKLOG_BIRTH_DATE = pandas.Timestamp(BACKLOG_BIRTH).to_pydatetime()
+TIMELINE_START = numpy.datetime64('2015-01-01')
+
+
+async def get_backlog_frame(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    # analytics read straight off the cursor, no BacklogGame models
+    backlog = await find_frame(
+        client,
+        BACKLOG_DATABASE,
+        BacklogGame,
+        match={'owner': owner},
+        sort=[("_id", pymongo.ASCENDING)],
+    )
+    if backlog.empty:
+        raise HTTPException(status_code=404, detail="No data found!")
+    return backlog
+
 
-    return results
+@hysx_api.get('/{owner}/treemap')
+async def system_treemap(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+    counters: Dict = Depends(get_counters),
+):
+    payload = await cached_figure(
+        client, owner, 'treemap', counters.get('version', 0)
+    )
+    return JSONBytesResponse(content=payload)
+
+
+@hysx_api.get('/{owner}/bubbles')
+async def system_bubbles(
+    owner: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+    counters: Dict = Depends(get_counters),
+):
+    payload = await cached_figure(
+        client, owner, 'bubbles', counters.get('version', 0)
+    )
+    return JSONBytesResponse(content=payload)
+
+
+class FigureCache():
+    def __init__(self):
+        # (owner, figure name): (backlog version it was built from, encoded
+        # JSON), least recently used first
+        self.figures = OrderedDict()
+
+
+figure_cache = FigureCache()
 
 
-@hysx_api.get('/annuitydew/treemap')
-async def system_treemap(backlog: List[BacklogGame] = Depends(get_all_games)):
-    # convert to pandas dataframe
-    backlog = pandas.DataFrame([game.doc() for game in backlog])
+async def cached_figure(
+    client: AsyncIOMotorClient, owner: str, name: str, version: int
+):
+    """Encoded JSON of an owner's figure, only rebuilt when their
+    backlog's version has moved on since it was cached. The version has
+    to be read before the backlog is, so a write in between only costs
+    an extra rebuild."""
+    figures = figure_cache.figures
+    cached = figures.get((owner, name))
+    if cached is not None and cached[0] == version:
+        figures.move_to_end((owner, name))
+        return cached[1]
+    backlog = await get_backlog_frame(owner, client)
+    payload = FIGURE_PAYLOADS[name](backlog)
+    figures[(owner, name)] = (version, payload)
+    figures.move_to_end((owner, name))
+    if len(figures) > FIGURE_CACHE_LIMIT:
+        figures.popitem(last=False)
+    return payload
+
+
+async def hysx_startup(client: AsyncIOMotorClient):
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    collection = engine.get_collection(BacklogGame)
+    # games from before backlogs had owners
+    await collection.update_many(
+        {'owner': {'$exists': False}}, {'$set': {'owner': DEFAULT_OWNER}}
+    )
+    await seq_backfill(client)
+    await collection.create_indexes(BACKLOG_INDEXES)
+    await engine.get_collection(BacklogTombstone).create_indexes(TOMBSTONE_INDEXES)
+    await prewarm_figures(client, DEFAULT_OWNER)
+
+
+async def prewarm_figures(client: AsyncIOMotorClient, owner: str):
+    # build every figure at startup, so the first page view is a cache hit
+    try:
+        counters = await get_counters(owner, client)
+        for name in FIGURE_PAYLOADS:
+            await cached_figure(client, owner, name, counters.get('version', 0))
+    except HTTPException:
+        # nothing in the backlog yet
+        return
+
+
+def treemap_payload(backlog: pandas.DataFrame) -> bytes:
     # read backlog and create a count column
     backlog['count'] = 1
     # column to serve as the root of the backlog
@@ -291,14 +1140,11 @@ async def system_treemap(backlog: List[BacklogGame] = Depends(get_all_games)):
         ticktext=[10, 100, 1000],
     )
 
-    # convert to JSON for the web
-    return json.loads(plotly.io.to_json(figure))
+    # plotly writes the JSON, keep it without decoding it again
+    return plotly.io.to_json(figure).encode()
 
 
-@hysx_api.get('/annuitydew/bubbles')
-async def system_bubbles(backlog: List[BacklogGame] = Depends(get_all_games)):
-    # convert to pandas dataframe
-    backlog = pandas.DataFrame([game.doc() for game in backlog])
+def bubbles_payload(backlog: pandas.DataFrame) -> bytes:
     # read backlog and create a count column
     backlog['count_dist'] = 1
     # complete gametime calc
@@ -364,132 +1210,222 @@ async def system_bubbles(backlog: List[BacklogGame] = Depends(get_all_games)):
     # list of hex color codes
     color_data = px.colors.qualitative.Bold
 
-    return {
+    return orjson.dumps({
         'x_data_counts': x_data_counts,
         'y_data_dist': y_data_dist,
         'z_data_hours': z_data_hours,
         'bubble_names': bubble_names,
         'label_data': label_data,
         'color_data': color_data,
-    }
+    })
 
 
-@hysx_api.get('/annuitydew/timeline')
-async def timeline(
-    backlog: List[BacklogGame] = Depends(get_all_games),
-    stats=Depends(count_by_status)
-):
-    # convert to pandas dataframe
-    backlog = pandas.DataFrame([game.doc() for game in backlog])
-    # drop unused columns, move dates to x axis to create timeline
-    # sort for most recent event at the top
-    backlog = backlog[[
-        '_id',
-        'game_title',
-        'sub_title',
-        'add_date',
-        'start_date',
-        'beat_date',
-        'complete_date',
-    ]].melt(
-        id_vars=['_id', 'game_title', 'sub_title'],
-        var_name='event_name',
-        value_name='event_date',
-    )
-
-    # fill empty cells with the backlog's birth date
-    backlog['event_date'] = (
-        backlog['event_date'].fillna(numpy.datetime64('2011-10-08T16:00:00'))
-    )
+FIGURE_PAYLOADS = {
+    'treemap': treemap_payload,
+    'bubbles': bubbles_payload,
+}
 
-    # event date to datetime
-    backlog.event_date = pandas.to_datetime(backlog.event_date, utc=True)
-
-    # sort by date descending
-    backlog.sort_values(['event_date', '_id', 'event_name'], ascending=False, inplace=True)
-
-    # reset index
-    backlog.reset_index(inplace=True)
-
-    # next, place current status counts in the first row.
-    # then we'll be able to calculate the backlog at older
-    # points in time using the timeline
-    backlog['not_started'] = stats.get('Not Started')
-    backlog['started'] = stats.get('Started')
-    backlog['beaten'] = stats.get('Beaten')
-    backlog['completed'] = stats.get('Completed')
-    backlog = backlog.assign(ns=0, s=0, b=0, c=0)
-
-    # initalize modifiers
-    mod_ns, mod_s, mod_b, mod_c = 0, 0, 0, 0
-
-    for row in backlog.itertuples():
-        backlog.at[row.Index, 'ns'] += mod_ns
-        backlog.at[row.Index, 's'] += mod_s
-        backlog.at[row.Index, 'b'] += mod_b
-        backlog.at[row.Index, 'c'] += mod_c
-        if row.event_name == 'add_date':
-            mod_ns += 1
-        elif row.event_name == 'start_date':
-            mod_ns -= 1
-            mod_s += 1
-        elif row.event_name == 'beat_date':
-            mod_s -= 1
-            mod_b += 1
-        elif row.event_name == 'complete_date':
-            mod_b -= 1
-            mod_c += 1
-
-    # now recalculate the timeline values. this is our final data
-    backlog['ns'] = backlog['not_started'] - backlog['ns']
-    backlog['s'] = backlog['started'] - backlog['s']
-    backlog['b'] = backlog['beaten'] - backlog['b']
-    backlog['c'] = backlog['completed'] - backlog['c']
-
-    # change sort to ascending and drop unnecessary columns
-    # set index to event date
-    backlog = backlog.sort_values(
-        ['event_date', '_id', 'event_name'], ascending=True
-    )[['event_date', 'ns', 's', 'b', 'c']]
-
-    # drop duplicate dates (keep last, that will be most recent)
-    backlog.drop_duplicates(subset=['event_date'], keep='last', inplace=True)
-
-    # set event date as datetime index and resample to daily
-    # also drop the date column (it's the index now)
-    # and convert back to integers (resample changes dtype)
-    time_idx = pandas.DatetimeIndex(backlog.event_date)
-    backlog.set_index(time_idx, inplace=True)
-    backlog = backlog.resample('D').pad().drop(
-        columns='event_date'
-    ).convert_dtypes()
-
-    # limit our chart to dates after the birth of the backlog
-    backlog = backlog[
-        pandas.Timestamp(
-            '2015-01-01 00:00:00+0000', tz='UTC', freq='D'
-        ):
-    ]
 
-    # x data is time, y_data is our timeline values
-    y_data_c = [int(data_point) for data_point in backlog.c.tolist()]
-    y_data_b = [int(data_point) for data_point in backlog.b.tolist()]
-    y_data_s = [int(data_point) for data_point in backlog.s.tolist()]
-    y_data_ns = [int(data_point) for data_point in backlog.ns.tolist()]
-    x_data_dates = backlog.index.tolist()
-    # dates need to be converted to be JS-ready
-    x_data_dates = [
-        int(time_point.strftime("%s%f"))/1000 for time_point in x_data_dates
-    ]
+@hysx_api.get('/{owner}/timeline')
+async def timeline(owner: str, client: AsyncIOMotorClient = Depends(get_odm)):
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    doc = await engine.get_collection(BacklogTimeline).find_one({'_id': owner})
+    if doc is None:
+        doc = await timeline_transform(client, owner)
+    x_data_dates, counts = timeline_from_doc(doc)
 
     # color data
     area_colors = px.colors.sequential.Agsunset[::2]
 
     return {
-        'y_data_c': y_data_c,
-        'y_data_b': y_data_b,
-        'y_data_s': y_data_s,
-        'y_data_ns': y_data_ns,
-        'x_data_dates': x_data_dates,
+        'y_data_c': counts[:, 3].tolist(),
+        'y_data_b': counts[:, 2].tolist(),
+        'y_data_s': counts[:, 1].tolist(),
+        'y_data_ns': counts[:, 0].tolist(),
+        # JS-ready dates, epoch milliseconds
+        'x_data_dates': x_data_dates.astype(float).tolist(),
         'area_colors': area_colors,
     }
+
+
+def timeline_counts(backlog: pandas.DataFrame, stats):
+    """Not started, started, beaten and completed counts at midnight UTC
+    of every day from TIMELINE_START on.
+
+    Every date on a game is an event that moves it from one status to the
+    next. The counts on a day are the current counts with every later
+    event taken back out. Returns the days as epoch milliseconds and a
+    days by statuses array of counts.
+    """
+    # one row per game per event, missing dates count from the birth date
+    event_dates = numpy.concatenate([
+        pandas.to_datetime(backlog[event_name], utc=True)
+        .dt.tz_convert(None)
+        .fillna(BACKLOG_BIRTH)
+        .to_numpy(dtype='datetime64[ns]')
+        for event_name in TIMELINE_DELTAS
+    ])
+    deltas = numpy.repeat(
+        numpy.array(list(TIMELINE_DELTAS.values())), len(backlog), axis=0
+    )
+    order = numpy.argsort(event_dates, kind='stable')
+    event_dates = event_dates[order]
+    # running total of the events so far, starting from none of them
+    moved = numpy.zeros((len(deltas) + 1, len(TIMELINE_STATUSES)), dtype=numpy.int64)
+    numpy.cumsum(deltas[order], axis=0, out=moved[1:])
+
+    days = numpy.arange(
+        event_dates[0].astype('datetime64[D]'),
+        event_dates[-1].astype('datetime64[D]') + numpy.timedelta64(1, 'D'),
+    )
+    days = days[days >= TIMELINE_START].astype('datetime64[ns]')
+    # number of events at or before each midnight
+    passed = numpy.searchsorted(event_dates, days, side='right')
+    current = numpy.array([stats.get(status, 0) for status in TIMELINE_STATUSES])
+    counts = current - (moved[-1] - moved[passed])
+
+    return days.astype('datetime64[ms]').astype(numpy.int64), counts
+
+
+def event_timestamp(event_date) -> pandas.Timestamp:
+    """A game's event date as a naive UTC timestamp, the backlog's birth
+    date if it's missing."""
+    if event_date is None or pandas.isna(event_date):
+        return pandas.Timestamp(BACKLOG_BIRTH)
+    event_date = pandas.Timestamp(event_date)
+    if event_date.tzinfo is not None:
+        event_date = event_date.tz_convert('UTC').tz_localize(None)
+    return event_date
+
+
+def timeline_inc(game, sign: int):
+    """$inc paths that add (sign=1) or take out (sign=-1) one game's share
+    of the stored timeline.
+
+    A game's share of the counts at a midnight is its status minus its
+    events after that midnight. Split that into its status minus all of
+    its events, which goes in residual, plus its events at or before the
+    midnight, which go on the first day they count for. A write then only
+    touches the days its events land on.
+    """
+    inc = Counter()
+    if game.game_status in TIMELINE_STATUSES:
+        status = TIMELINE_STATUSES[TIMELINE_STATUSES.index(game.game_status)]
+        inc[f'residual.{status}'] += sign
+    for event_name, delta in TIMELINE_DELTAS.items():
+        event_date = event_timestamp(getattr(game, event_name))
+        day = max(event_date.ceil('D'), pandas.Timestamp(TIMELINE_START))
+        for status, change in zip(TIMELINE_STATUSES, delta):
+            if change:
+                inc[f'residual.{status}'] -= sign * change
+                inc[f"days.{day.strftime('%Y-%m-%d')}.{status}"] += sign * change
+    return inc
+
+
+def last_event(games):
+    return max(
+        event_timestamp(getattr(game, event_name))
+        for game in games
+        for event_name in TIMELINE_DELTAS
+    ).to_pydatetime()
+
+
+def timeline_doc(backlog: str, inc: Dict[str, int], last_event: datetime):
+    """BacklogTimeline document holding the sum of timeline_inc paths."""
+    doc = {'_id': backlog, 'days': {}, 'residual': {}, 'last_event': last_event}
+    for path, value in inc.items():
+        *keys, status = path.split('.')
+        parent = doc
+        for key in keys:
+            parent = parent.setdefault(key, {})
+        parent[status] = value
+    return doc
+
+
+def timeline_from_doc(doc: Dict):
+    """timeline_counts from a stored BacklogTimeline document. The last
+    day is the one the backlog's last event happened on, like the
+    daily resample the timeline used to be built with."""
+    days = pandas.date_range(
+        pandas.Timestamp(TIMELINE_START),
+        pandas.Timestamp(doc['last_event']).floor('D'),
+        freq='D',
+    )
+    changes = pandas.DataFrame.from_dict(
+        doc['days'], orient='index', columns=TIMELINE_STATUSES
+    )
+    changes.index = pandas.DatetimeIndex(changes.index)
+    changes = changes.reindex(days).fillna(0).astype(numpy.int64).cumsum()
+    residual = numpy.array(
+        [doc['residual'].get(status, 0) for status in TIMELINE_STATUSES]
+    )
+    counts = changes.to_numpy() + residual
+
+    return days.asi8 // 10**6, counts
+
+
+async def timeline_transform(client: AsyncIOMotorClient, owner: str):
+    """Build the stored timeline from the whole backlog."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    backlog_df = await find_frame(
+        client,
+        BACKLOG_DATABASE,
+        BacklogGame,
+        match={'owner': owner},
+        columns=['game_status'] + list(TIMELINE_DELTAS),
+    )
+    if backlog_df.empty:
+        raise HTTPException(status_code=404, detail="No data found!")
+    games = list(backlog_df.itertuples())
+    inc = Counter()
+    for game in games:
+        inc.update(timeline_inc(game, 1))
+    doc = timeline_doc(owner, inc, last_event(games))
+    await engine.get_collection(BacklogTimeline).replace_one(
+        {'_id': owner}, doc, upsert=True
+    )
+    return doc
+
+
+async def timeline_update(
+    client: AsyncIOMotorClient,
+    owner: str,
+    doc_list=None,
+    removed_list=None,
+):
+    """Apply written and removed games to the stored timeline. If it
+    hasn't been built yet, the next read builds it whole."""
+    engine = AIOEngine(motor_client=client, database=BACKLOG_DATABASE)
+    collection = engine.get_collection(BacklogTimeline)
+    inc = Counter()
+    for game in doc_list or []:
+        inc.update(timeline_inc(game, 1))
+    for game in removed_list or []:
+        inc.update(timeline_inc(game, -1))
+    update = {'$inc': {path: value for path, value in inc.items() if value}}
+    if not update['$inc']:
+        return
+    if removed_list:
+        # the last event may have been taken out, find it again
+        results = await engine.get_collection(BacklogGame).aggregate([{
+            '$match': {'owner': owner},
+        }, {
+            '$group': {
+                '_id': None,
+                'last_event': {
+                    '$max': {
+                        '$max': [
+                            {'$ifNull': [f'${event_name}', BACKLOG_BIRTH_DATE]}
+                            for event_name in TIMELINE_DELTAS
+                        ]
+                    }
+                },
+            }
+        }]).to_list(length=None)
+        if not results:
+            await collection.delete_one({'_id': owner})
+            return
+        update['$set'] = {'last_event': results[0]['last_event']}
+    else:
+        update['$max'] = {'last_event': last_event(doc_list)}
+    await collection.update_one({'_id': owner}, update)
@@ -1,19 +1,29 @@
 # import native Python packages
+import asyncio
 from enum import Enum, IntEnum
-from itertools import permutations, product
+import hashlib
+from itertools import product
 import json
 from typing import List, Dict, Optional
 
 # import third party packages
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+import numpy
+import orjson
 import pandas
 import plotly
 import plotly.express as px
-from odmantic import AIOEngine, Field, Model, ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from odmantic import AIOEngine, Field, Model, ObjectId, query
+from starlette.concurrency import run_in_threadpool
 
 # import custom local stuff
+from src.db.analytics import find_frame, model_columns
 from src.db.atlas import get_odm
+from src.api.responses import JSONBytesResponse, extend_json_object, json_object
 from src.api.users import oauth2_scheme, UserOut
 
 
@@ -22,12 +32,23 @@ ml_api = APIRouter(
     tags=["mildredleague"],
 )
 
+# every league collection lives in this database
+ML_DATABASE = "mildredleague"
+
 
 class Against(str, Enum):
     AGAINST = "against"
     FOR = "for"
 
 
+class ScoreStat(str, Enum):
+    MIN = "min"
+    Q1 = "q1"
+    MEDIAN = "median"
+    Q3 = "q3"
+    MAX = "max"
+
+
 class NickName(str, Enum):
     TARPEY = "Tarpey"
     CHRISTIAN = "Christian"
@@ -128,222 +149,761 @@ class MLNotePatch(Model):
     note: Optional[str]
 
 
+class MLDraftPick(Model):
+    # season * 1000 + overall pick
+    pick_id: int = Field(primary_field=True)
+    season: MLSeason
+    round: int
+    pick: int
+    team: str
+    name: str
+    nick: NickName
+    player: str
+    nfl_team: str
+    position: str
+
+    class Config:
+        collection = "draftpicks"
+
+
+class MLDraftBoardTransform(Model):
+    season: MLSeason = Field(primary_field=True)
+    columns: List
+    data: List
+
+    class Config:
+        collection = "draftboards"
+
+
+class MLDraftTendencyTransform(Model):
+    nick: NickName = Field(primary_field=True)
+    total: int
+    positions: List
+
+    class Config:
+        collection = "drafttendencies"
+
+
+class MLDraftPlayerTransform(Model):
+    player: str = Field(primary_field=True)
+    position: str
+    times_drafted: int
+    picks: List
+
+    class Config:
+        collection = "draftplayers"
+
+
+class MLSeasonVersion(Model):
+    # bumped on every game or team write in the season
+    season: MLSeason = Field(primary_field=True)
+    version: int
+
+
+class MLLeagueVersion(Model):
+    # bumped on every game, team or note write, so every worker
+    # can tell when its snapshot is out of date
+    league: str = Field(primary_field=True)
+    version: int
+
+
 class MLTableTransform(Model):
     season: MLSeason
     playoff: MLPlayoff
+    # MLSeasonVersion the slice was built from
+    version: int = 0
+    # the encoded response body, sent as is
+    payload: bytes
+
+
+class MLBoxplotTransform(Model):
+    season: MLSeason
+    version: int = 0
+    payload: bytes
+
+
+class MLSimTransform(Model):
+    season: MLSeason = Field(primary_field=True)
+    n_sims: int
     columns: List
     data: List
 
 
-class MLBoxplotTransform(Model):
+class MLH2HTransform(Model):
+    h2h_id: str = Field(primary_field=True)
     season: MLSeason
-    for_data: Dict
-    against_data: Dict
+    playoff: MLPlayoff
+    nick_names: List
+    wins: List
+    ties: List
+    games: List
 
 
-class MLTable(pandas.DataFrame):
-    def copy(self):
-        copy_df = super().copy()
-        return MLTable(copy_df)
+class MLRatingTransform(Model):
+    season: MLSeason = Field(primary_field=True)
+    nick_names: List
+    weeks: List
+    start_elo: List
+    start_mov_elo: List
+    elo: List
+    mov_elo: List
+    games_played: List
 
-    def merge_with_teams(self, teams_df):
-        merged_df = self.copy()
-        # merge on the away side
-        teams_df.rename(columns={"nick_name": "a_nick"}, inplace=True)
-        merged_df = merged_df.merge(
-            teams_df[["a_nick", "season", "division"]],
-            on=["a_nick", "season"],
-            how="left",
-        )
-        merged_df.rename(columns={"division": "a_division"}, inplace=True)
-        # merge on the home side
-        teams_df.rename(columns={"a_nick": "h_nick"}, inplace=True)
-        merged_df = merged_df.merge(
-            teams_df[["h_nick", "season", "division"]],
-            on=["h_nick", "season"],
-            how="left",
+
+class MLScoreTransform(Model):
+    season: MLSeason = Field(primary_field=True)
+    nick_names: List
+    score_bins: List
+    for_bins: List
+    against_bins: List
+
+
+class MLFigureTransform(Model):
+    figure_id: str = Field(primary_field=True)
+    etag: str
+    data: Dict
+
+
+# materialized all-time figures, keyed by figure_id
+ALL_TIME_FIGURES = ["ranking", "heatmap", "ratings"] + [
+    f"wins{member.value}" for name, member in MLPlayoff.__members__.items()
+]
+
+
+# interned NickName order for the dense head to head matrices.
+# new nicknames go at the end of NickName so the old cells stay put.
+NICK_NAMES = [member.value for name, member in NickName.__members__.items()]
+NICK_INDEX = {nick: i for i, nick in enumerate(NICK_NAMES)}
+
+
+# elo settings. everyone starts at ELO_START, and ratings are pulled
+# ELO_REGRESS of the way back to it between seasons.
+ELO_START = 1500
+ELO_K = 20
+ELO_REGRESS = 1 / 3
+
+
+# fixed score histogram bins: SCORE_BINS bins of SCORE_BIN_WIDTH points,
+# starting at SCORE_BIN_MIN. the spec is stored with the histograms.
+SCORE_BIN_MIN = -20
+SCORE_BIN_WIDTH = 1
+SCORE_BINS = 280
+SCORE_BIN_SPEC = [SCORE_BIN_MIN, SCORE_BIN_WIDTH, SCORE_BINS]
+# the quantiles behind ScoreStat, in the same order
+SCORE_QUANTILES = [0, 0.25, 0.5, 0.75, 1]
+
+
+# default number of seasons for the playoff odds sim
+SIM_COUNT = 10000
+
+# how often each worker checks whether another one wrote since its
+# snapshot was loaded
+SNAPSHOT_POLL_SECONDS = 30
+
+
+# columns returned by both standings engines, in MLTable.calc_records order
+RECORD_COLUMNS = [
+    "win_total",
+    "loss_total",
+    "tie_total",
+    "games_played",
+    "win_pct",
+    "points_for",
+    "points_against",
+    "avg_margin",
+]
+
+
+def model_projection(model):
+    """Projection of every stored field of a model. Reads that use it
+    against one of the covering indexes below never touch the documents."""
+    return {key: 1 for key in model_columns(model)}
+
+
+def covering_index(model, *prefix):
+    """Index led by the prefix fields and _id, followed by every other
+    stored field of the model, so model_projection reads are covered."""
+    keys = list(prefix) + ["_id"]
+    keys += [key for key in model_projection(model) if key not in keys]
+    return IndexModel(
+        [(key, ASCENDING) for key in keys], name="_".join(prefix) + "_covered"
+    )
+
+
+# index specs, created by ml_create_indexes at app startup. game, team
+# and note endpoints read the snapshot, these cover what still goes to
+# the database: transform rebuilds, season frames and the scores endpoint.
+# season and playoff lead because that's what those reads filter on,
+# and _id comes next so the default sort is read straight off the index.
+ML_INDEXES = {
+    MLGame: [
+        covering_index(MLGame, "season", "playoff"),
+        IndexModel([("playoff", ASCENDING), ("_id", ASCENDING)], name="playoff_id"),
+    ],
+    MLTeam: [
+        covering_index(MLTeam, "season"),
+        # foreignField of the standings_pipeline $lookup
+        IndexModel(
+            [("nick_name", ASCENDING), ("season", ASCENDING)], name="nick_name_season"
+        ),
+    ],
+    MLTableTransform: [
+        IndexModel(
+            [("season", ASCENDING), ("playoff", ASCENDING)], name="season_playoff"
+        ),
+    ],
+    MLBoxplotTransform: [
+        IndexModel([("season", ASCENDING)], name="season"),
+    ],
+}
+
+
+async def ml_create_indexes(client: AsyncIOMotorClient):
+    """Create every index in ML_INDEXES. Existing indexes are left alone."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    for model, indexes in ML_INDEXES.items():
+        await engine.get_collection(model).create_indexes(indexes)
+
+
+async def find_covered(client: AsyncIOMotorClient, model, match: Dict):
+    """engine.find(model, ..., sort=model.id) as a covered query. The
+    scores endpoint reads its season's teams with it."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    cursor = (
+        engine.get_collection(model)
+        .find(match, model_projection(model))
+        .sort("_id", ASCENDING)
+    )
+    return [model.parse_doc(doc) async for doc in cursor]
+
+
+class MLSnapshot:
+    """Process-local copy of every game, team and note in the league.
+
+    Read endpoints are served from it with no database round trips.
+    It's never changed in place. Writes load a new one and swap it in
+    whole, so a reader sees either the old data or the new, never a mix.
+    """
+
+    def __init__(self, version: int, games, teams, notes):
+        self.version = version
+        self.games = tuple(games)
+        self.teams = tuple(teams)
+        self.notes = tuple(notes)
+        self.by_id = {doc.id: doc for doc in self.games + self.teams + self.notes}
+
+    def find_games(self, season=None, playoff=None) -> List[MLGame]:
+        return [
+            game
+            for game in self.games
+            if (season is None or game.season == season)
+            and (playoff is None or game.playoff == playoff)
+        ]
+
+    def find_teams(self, season=None) -> List[MLTeam]:
+        return [
+            team for team in self.teams if season is None or team.season == season
+        ]
+
+    def find_notes(self, season=None) -> List[MLNote]:
+        return [
+            note for note in self.notes if season is None or note.season == season
+        ]
+
+    def find_one(self, model, oid: ObjectId):
+        doc = self.by_id.get(oid)
+        return doc if isinstance(doc, model) else None
+
+
+class MLSnapshotHolder:
+    snapshot: MLSnapshot = None
+    poll_task: asyncio.Task = None
+
+
+ml_snapshot = MLSnapshotHolder()
+
+
+async def get_league_version(client: AsyncIOMotorClient) -> int:
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    doc = await engine.get_collection(MLLeagueVersion).find_one(
+        {"_id": "mildredleague"}
+    )
+    return doc["version"] if doc else 0
+
+
+async def load_snapshot(client: AsyncIOMotorClient) -> MLSnapshot:
+    """Read every game, team and note and swap them in as the snapshot."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    # read the version first. a write landing mid-load then only makes
+    # this snapshot look older than it is, and the next poll reloads it
+    version = await get_league_version(client)
+    games = [game async for game in engine.find(MLGame, sort=MLGame.id)]
+    teams = [team async for team in engine.find(MLTeam, sort=MLTeam.id)]
+    notes = [note async for note in engine.find(MLNote, sort=MLNote.id)]
+    snapshot = MLSnapshot(version, games, teams, notes)
+    # two loads can finish out of order, don't let the older one win
+    current = ml_snapshot.snapshot
+    if current is None or snapshot.version >= current.version:
+        ml_snapshot.snapshot = snapshot
+    return ml_snapshot.snapshot
+
+
+async def get_snapshot(client: AsyncIOMotorClient) -> MLSnapshot:
+    """The current snapshot. It's loaded at startup, so this only reads
+    the database if startup didn't get to it."""
+    if ml_snapshot.snapshot is None:
+        await load_snapshot(client)
+    return ml_snapshot.snapshot
+
+
+async def commit_snapshot(client: AsyncIOMotorClient):
+    """Call after every game, team or note write. Bumps the league version
+    for the other workers and swaps in a fresh snapshot for this one."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    await engine.get_collection(MLLeagueVersion).update_one(
+        {"_id": "mildredleague"}, {"$inc": {"version": 1}}, upsert=True
+    )
+    await load_snapshot(client)
+
+
+async def poll_snapshot(client: AsyncIOMotorClient, interval=SNAPSHOT_POLL_SECONDS):
+    """Reload the snapshot whenever another worker has written since it
+    was loaded. One single document read per interval."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            version = await get_league_version(client)
+            if ml_snapshot.snapshot is None or version != ml_snapshot.snapshot.version:
+                await load_snapshot(client)
+        except PyMongoError:
+            # keep serving the old snapshot and try again next time
+            continue
+
+
+async def ml_snapshot_startup(client: AsyncIOMotorClient):
+    await load_snapshot(client)
+    ml_snapshot.poll_task = asyncio.create_task(poll_snapshot(client))
+
+
+async def ml_snapshot_shutdown():
+    if ml_snapshot.poll_task is not None:
+        ml_snapshot.poll_task.cancel()
+
+
+def standings_pipeline(match: Dict, divisions=True):
+    """Aggregation pipeline equivalent of MLTable.calc_records.
+
+    Runs against the MLGame collection. Each game is looked up against
+    MLTeam for its division, split into away and home sides with $facet,
+    and the two sides are summed back together per team.
+    """
+    # normalized score columns for two-week playoff games
+    weeks = {"$add": [{"$subtract": ["$week_e", "$week_s"]}, 1]}
+    pipeline = [
+        {"$match": match},
+        # only indexed fields from here on, so the scan is covered
+        {"$project": dict(model_projection(MLGame), _id=0)},
+        {
+            "$addFields": {
+                "a_score_norm": {"$divide": ["$a_score", weeks]},
+                "h_score_norm": {"$divide": ["$h_score", weeks]},
+            }
+        },
+    ]
+    if divisions:
+        for side in ["a", "h"]:
+            pipeline += [
+                # join every season of the nick, then keep this game's season
+                {
+                    "$lookup": {
+                        "from": MLTeam.__collection__,
+                        "localField": f"{side}_nick",
+                        "foreignField": "nick_name",
+                        "as": f"{side}_team",
+                    }
+                },
+                {
+                    "$addFields": {
+                        f"{side}_team": {
+                            "$filter": {
+                                "input": f"${side}_team",
+                                "as": "team",
+                                "cond": {"$eq": ["$$team.season", "$season"]},
+                            }
+                        }
+                    }
+                },
+            ]
+
+    def side_group(side, other):
+        group_id = {"nick_name": f"${side}_nick"}
+        stages = []
+        if divisions:
+            # games against a team with no MLTeam record fall out here,
+            # the same way pivot_table drops a missing division
+            stages.append({"$unwind": f"${side}_team"})
+            group_id["division"] = f"${side}_team.division"
+        stages.append(
+            {
+                "$group": {
+                    "_id": group_id,
+                    "win_total": {
+                        "$sum": {
+                            "$cond": [
+                                {"$gt": [f"${side}_score", f"${other}_score"]}, 1, 0
+                            ]
+                        }
+                    },
+                    "loss_total": {
+                        "$sum": {
+                            "$cond": [
+                                {"$lt": [f"${side}_score", f"${other}_score"]}, 1, 0
+                            ]
+                        }
+                    },
+                    "tie_total": {
+                        "$sum": {
+                            "$cond": [
+                                {"$eq": [f"${side}_score", f"${other}_score"]}, 1, 0
+                            ]
+                        }
+                    },
+                    "points_for": {"$sum": f"${side}_score_norm"},
+                    "points_against": {"$sum": f"${other}_score_norm"},
+                }
+            }
         )
-        merged_df.rename(columns={"division": "h_division"}, inplace=True)
-        # reclass here since merge returns a vanilla DF
-        return merged_df
+        return stages
+
+    pipeline += [
+        {"$facet": {"away": side_group("a", "h"), "home": side_group("h", "a")}},
+        # some teams will have only played away or home, so the outer
+        # join is just a concat followed by a second group
+        {"$project": {"sides": {"$concatArrays": ["$away", "$home"]}}},
+        {"$unwind": "$sides"},
+        {"$replaceRoot": {"newRoot": "$sides"}},
+        {
+            "$group": {
+                "_id": "$_id",
+                "win_total": {"$sum": "$win_total"},
+                "loss_total": {"$sum": "$loss_total"},
+                "tie_total": {"$sum": "$tie_total"},
+                "points_for": {"$sum": "$points_for"},
+                "points_against": {"$sum": "$points_against"},
+            }
+        },
+        {
+            "$addFields": {
+                "games_played": {
+                    "$add": ["$win_total", "$loss_total", "$tie_total"]
+                },
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "division": "$_id.division",
+                "nick_name": "$_id.nick_name",
+                "win_total": 1,
+                "loss_total": 1,
+                "tie_total": 1,
+                "games_played": 1,
+                "win_pct": {
+                    "$divide": [
+                        {"$add": ["$win_total", {"$multiply": ["$tie_total", 0.5]}]},
+                        "$games_played",
+                    ]
+                },
+                "points_for": 1,
+                "points_against": 1,
+                "avg_margin": {
+                    "$divide": [
+                        {"$subtract": ["$points_for", "$points_against"]},
+                        "$games_played",
+                    ]
+                },
+            }
+        },
+        {"$sort": {"win_pct": -1}},
+    ]
+    if not divisions:
+        pipeline[-2]["$project"].pop("division")
 
-    def normalize_games(self):
-        normalized_df = self.copy()
-        # which team won?
-        normalized_df["a_win"] = 0
-        normalized_df["h_win"] = 0
-        normalized_df["a_tie"] = 0
-        normalized_df["h_tie"] = 0
-        # away win
-        normalized_df.loc[normalized_df.a_score > normalized_df.h_score, "a_win"] = 1
-        # home win
-        normalized_df.loc[normalized_df.a_score < normalized_df.h_score, "h_win"] = 1
-        # tie
-        normalized_df.loc[
-            normalized_df.a_score == normalized_df.h_score, ["a_tie", "h_tie"]
-        ] = 1
-        # normalized score columns for two-week playoff games
-        normalized_df["a_score_norm"] = normalized_df["a_score"] / (
-            normalized_df["week_e"] - normalized_df["week_s"] + 1
+    return pipeline
+
+
+def standings_frame(results: List[Dict], divisions=True):
+    """Shape standings_pipeline output like MLTable.calc_records."""
+    index = ["division", "nick_name"] if divisions else ["nick_name"]
+    return pandas.DataFrame(results, columns=index + RECORD_COLUMNS).set_index(index)
+
+
+async def calc_records_aggregation(
+    client: AsyncIOMotorClient, match: Dict, divisions=True
+):
+    """Mongo-side alternative to MLTable.calc_records. Only the finished
+    standings leave the database."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(MLGame)
+    results = await collection.aggregate(
+        standings_pipeline(match, divisions)
+    ).to_list(length=None)
+    return standings_frame(results, divisions)
+
+
+def plain_values(values, dtype=None):
+    """Unwrap Enum members (Model.doc() keeps them) so numpy sees
+    their values instead of their names."""
+    return numpy.asarray([getattr(value, "value", value) for value in values], dtype)
+
+
+class MLGameStore:
+    """Columnar copy of a set of MLGame documents.
+
+    Each game is held once as typed numpy arrays. Team nicknames are
+    interned to small ints in sorted order (so sorting ids sorts names)
+    and each side's division is looked up once at build time. Records
+    are bincount reductions over a boolean mask of games.
+    """
+
+    def __init__(self, games, teams=None):
+        # games and teams can be anything with column access,
+        # like a DataFrame or a dict of lists
+        if teams is None:
+            teams = {"division": [], "nick_name": [], "season": []}
+        a_nick = plain_values(games["a_nick"], str)
+        h_nick = plain_values(games["h_nick"], str)
+        team_nick = plain_values(teams["nick_name"], str)
+        n_games = len(a_nick)
+
+        # intern nicknames
+        self.nicks, nick_ids = numpy.unique(
+            numpy.concatenate([a_nick, h_nick, team_nick]), return_inverse=True
         )
-        normalized_df["h_score_norm"] = normalized_df["h_score"] / (
-            normalized_df["week_e"] - normalized_df["week_s"] + 1
+        self.a_id = nick_ids[:n_games].astype(numpy.int16)
+        self.h_id = nick_ids[n_games : 2 * n_games].astype(numpy.int16)
+        team_ids = nick_ids[2 * n_games :]
+
+        # intern seasons and divisions
+        self.season = numpy.asarray(games["season"], dtype=numpy.int16)
+        self.playoff = numpy.asarray(games["playoff"], dtype=numpy.int8)
+        self.seasons, season_ids = numpy.unique(
+            numpy.concatenate(
+                [self.season, numpy.asarray(teams["season"], dtype=numpy.int16)]
+            ),
+            return_inverse=True,
         )
-        # margin = home - away
-        normalized_df["h_margin"] = (
-            normalized_df["h_score_norm"] - normalized_df["a_score_norm"]
+        self.divisions, division_ids = numpy.unique(
+            plain_values(teams["division"], str), return_inverse=True
         )
 
-        return normalized_df
-
-    def calc_records(self, teams_df, divisions=True):
+        # division lookup by [season, nick]. -1 means the nick has no
+        # team record that season.
+        self.team_division = numpy.full(
+            (len(self.seasons), len(self.nicks)), -1, dtype=numpy.int16
+        )
+        self.team_division[season_ids[n_games:], team_ids] = division_ids
+        self.a_division = self.team_division[season_ids[:n_games], self.a_id]
+        self.h_division = self.team_division[season_ids[:n_games], self.h_id]
+
+        # which team won? ties count for both sides
+        self.week_s = numpy.asarray(games["week_s"], dtype=numpy.int16)
+        self.week_e = numpy.asarray(games["week_e"], dtype=numpy.int16)
+        self.a_score = numpy.asarray(games["a_score"], dtype=numpy.float64)
+        self.h_score = numpy.asarray(games["h_score"], dtype=numpy.float64)
+        self.a_win = self.a_score > self.h_score
+        self.h_win = self.a_score < self.h_score
+        self.tie = self.a_score == self.h_score
+        # normalized score columns for two-week playoff games
+        weeks = self.week_e - self.week_s + 1
+        self.a_score_norm = self.a_score / weeks
+        self.h_score_norm = self.h_score / weeks
+
+    def __len__(self):
+        return len(self.a_id)
+
+    def mask(self, season=None, playoff=None):
+        mask = numpy.ones(len(self), dtype=bool)
+        if season is not None:
+            mask &= self.season == season
+        if playoff is not None:
+            mask &= self.playoff == playoff
+        return mask
+
+    def calc_records(self, mask=None, divisions=True):
+        """Same output as MLTable.calc_records, for the masked games."""
+        if mask is None:
+            mask = self.mask()
+        n_nicks = len(self.nicks)
         if divisions:
-            a_index = ["a_division", "a_nick"]
-            h_index = ["h_division", "h_nick"]
-            a_rename = {"a_nick": "nick_name", "a_division": "division"}
-            h_rename = {"h_nick": "nick_name", "h_division": "division"}
+            # records are keyed by (division, nick). games against a team
+            # with no record that season fall out, the same way
+            # pivot_table drops a missing division.
+            n_keys = len(self.divisions) * n_nicks
+            a_mask = mask & (self.a_division >= 0)
+            h_mask = mask & (self.h_division >= 0)
+            a_key = self.a_division[a_mask].astype(numpy.intp) * n_nicks
+            h_key = self.h_division[h_mask].astype(numpy.intp) * n_nicks
+            a_key += self.a_id[a_mask]
+            h_key += self.h_id[h_mask]
         else:
-            a_index = ["a_nick"]
-            h_index = ["h_nick"]
-            a_rename = {"a_nick": "nick_name"}
-            h_rename = {"h_nick": "nick_name"}
-        normalized_df = self.normalize_games()
-        normalized_df = normalized_df.merge_with_teams(teams_df)
-        # season wins/losses/ties/PF/PA for away teams, home teams
-        away_df = pandas.pivot_table(
-            normalized_df.convert_dtypes(),
-            values=["a_win", "h_win", "a_tie", "a_score_norm", "h_score_norm"],
-            index=a_index,
-            aggfunc="sum",
-            fill_value=0,
+            n_keys = n_nicks
+            a_mask, h_mask = mask, mask
+            a_key, h_key = self.a_id[mask], self.h_id[mask]
+
+        def side_totals(key, side_mask, win, loss, score_for, score_against):
+            totals = [
+                numpy.bincount(key, weights=column[side_mask], minlength=n_keys)
+                for column in [win, loss, self.tie, score_for, score_against]
+            ]
+            return totals + [numpy.bincount(key, minlength=n_keys)]
+
+        home = side_totals(
+            h_key, h_mask, self.h_win, self.a_win, self.h_score_norm, self.a_score_norm
         )
-        home_df = pandas.pivot_table(
-            normalized_df.convert_dtypes(),
-            values=["h_win", "a_win", "h_tie", "h_score_norm", "a_score_norm"],
-            index=h_index,
-            aggfunc="sum",
-            fill_value=0,
+        away = side_totals(
+            a_key, a_mask, self.a_win, self.h_win, self.a_score_norm, self.h_score_norm
         )
+        # some teams will have only played away or home,
+        # keep any key that showed up on either side
+        keys = numpy.flatnonzero(home[5] + away[5])
+        if not divisions:
+            # the pandas version's outer join puts away-only nicks last
+            # when there's no division level. keep that row order so ties
+            # on win_pct come out of the sort the same way.
+            at_home = home[5][keys] > 0
+            keys = numpy.concatenate([keys[at_home], keys[~at_home]])
+        win_total, loss_total, tie_total, points_for, points_against = [
+            (home_total + away_total)[keys]
+            for home_total, away_total in zip(home[:5], away[:5])
+        ]
+        games_played = win_total + loss_total + tie_total
 
-        # rename index and against columns
-        away_df = away_df.rename(
-            columns={"h_win": "a_loss", "h_score_norm": "a_score_norm_against"},
-        ).rename_axis(index=a_rename)
-        home_df = home_df.rename(
-            columns={"a_win": "h_loss", "a_score_norm": "h_score_norm_against"},
-        ).rename_axis(index=h_rename)
-        # merge to one table. some teams will have only played away or home, so
-        # fillna fills their other side with zeroes
-        record_df = home_df.join(
-            away_df,
-            how="outer",
-        ).fillna(0)
-        # win total, loss total, game total, points for, points against, win percentage
-        record_df["win_total"] = record_df["h_win"] + record_df["a_win"]
-        record_df["loss_total"] = record_df["h_loss"] + record_df["a_loss"]
-        record_df["tie_total"] = record_df["h_tie"] + record_df["a_tie"]
-        record_df["games_played"] = (
-            record_df["win_total"] + record_df["loss_total"] + record_df["tie_total"]
+        if divisions:
+            index = pandas.MultiIndex.from_arrays(
+                [self.divisions[keys // n_nicks], self.nicks[keys % n_nicks]],
+                names=["division", "nick_name"],
+            )
+        else:
+            index = pandas.Index(self.nicks[keys], name="nick_name")
+        record_df = pandas.DataFrame(
+            {
+                "win_total": win_total,
+                "loss_total": loss_total,
+                "tie_total": tie_total,
+                "games_played": games_played,
+                "win_pct": (win_total + tie_total * 0.5) / games_played,
+                "points_for": points_for,
+                "points_against": points_against,
+                "avg_margin": (points_for - points_against) / games_played,
+            },
+            index=index,
+            columns=RECORD_COLUMNS,
         )
-        record_df["win_pct"] = (
-            record_df["win_total"] + record_df["tie_total"] * 0.5
-        ) / record_df["games_played"]
-        record_df["points_for"] = record_df["h_score_norm"] + record_df["a_score_norm"]
-        record_df["points_against"] = (
-            record_df["h_score_norm_against"] + record_df["a_score_norm_against"]
+        # same nullable dtypes convert_dtypes gave the pandas version.
+        # points stay Int64 when every score was a whole number.
+        record_df = record_df.astype(
+            {
+                "win_total": "Int64",
+                "loss_total": "Int64",
+                "tie_total": "Int64",
+                "games_played": "Int64",
+                "win_pct": "Float64",
+                "avg_margin": "Float64",
+            }
         )
-        record_df["avg_margin"] = (
-            record_df["points_for"] - record_df["points_against"]
-        ) / record_df["games_played"]
+        record_df[["points_for", "points_against"]] = record_df[
+            ["points_for", "points_against"]
+        ].convert_dtypes()
         record_df.sort_values(by="win_pct", ascending=False, inplace=True)
-        record_df.drop(
-            columns=[
-                "h_win",
-                "a_win",
-                "h_loss",
-                "a_loss",
-                "h_tie",
-                "a_tie",
-                "h_score_norm",
-                "a_score_norm",
-                "h_score_norm_against",
-                "a_score_norm_against",
-            ],
-            inplace=True,
-        )
         return record_df
 
-    def calc_matchup_records(self, teams_df):
-        normalized_df = self.normalize_games()
-        normalized_df = normalized_df.merge_with_teams(teams_df)
-        # grouping for away and home matchup winners, ties, occurrences
-        away_df = pandas.pivot_table(
-            normalized_df,
-            values=["a_win", "a_tie", "season"],
-            index=["a_nick", "h_nick"],
-            aggfunc={
-                "a_win": "sum",
-                "a_tie": "sum",
-                "season": "count",
-            },
-            fill_value=0,
-        ).rename(columns={"season": "a_games"})
-        home_df = pandas.pivot_table(
-            normalized_df,
-            values=["h_win", "h_tie", "season"],
-            index=["h_nick", "a_nick"],
-            aggfunc={
-                "h_win": "sum",
-                "h_tie": "sum",
-                "season": "count",
+    def h2h(self, mask=None):
+        """Dense head to head matrices indexed by [winner, loser] nick id.
+        Ties count as half a win."""
+        if mask is None:
+            mask = self.mask()
+        n_nicks = len(self.nicks)
+        a_id = self.a_id[mask].astype(numpy.intp)
+        h_id = self.h_id[mask].astype(numpy.intp)
+        half_tie = self.tie[mask] * 0.5
+        wins = numpy.zeros((n_nicks, n_nicks))
+        games = numpy.zeros((n_nicks, n_nicks), dtype=numpy.int64)
+        numpy.add.at(wins, (a_id, h_id), self.a_win[mask] + half_tie)
+        numpy.add.at(wins, (h_id, a_id), self.h_win[mask] + half_tie)
+        numpy.add.at(games, (a_id, h_id), 1)
+        numpy.add.at(games, (h_id, a_id), 1)
+        return wins, games
+
+    def calc_matchup_records(self, mask=None):
+        """Same output as MLTable.calc_matchup_records, for the masked games."""
+        wins, games = self.h2h(mask)
+        winner, loser = numpy.nonzero(games)
+        matchup_df = pandas.DataFrame(
+            {
+                "win_total": wins[winner, loser],
+                "game_total": games[winner, loser],
             },
-            fill_value=0,
-        ).rename(columns={"season": "h_games"})
-        # rename indices
-        away_df.index.set_names(names=["nick_name", "loser"], inplace=True)
-        home_df.index.set_names(names=["nick_name", "loser"], inplace=True)
-        # join and sum to get total matchup wins
-        matchup_df = (
-            away_df.join(
-                home_df,
-                how="outer",
-            )
-            .fillna(0)
-            .convert_dtypes()
-        )
-        # ties count for 0.5
-        matchup_df["win_total"] = (
-            matchup_df["a_win"]
-            + matchup_df["h_win"]
-            + matchup_df["a_tie"] * 0.5
-            + matchup_df["h_tie"] * 0.5
-        )
-        matchup_df["game_total"] = matchup_df["a_games"] + matchup_df["h_games"]
-        # get rid of intermediate columns. just wins and games now
-        matchup_df = matchup_df.convert_dtypes().drop(
-            columns=[
-                "a_win",
-                "h_win",
-                "a_tie",
-                "h_tie",
-                "a_games",
-                "h_games",
-            ]
-        )
+            index=pandas.MultiIndex.from_arrays(
+                [self.nicks[winner], self.nicks[loser]], names=["nick_name", "loser"]
+            ),
+        ).astype({"win_total": "Float64", "game_total": "Int64"})
         # add win pct column and sort by
         matchup_df["win_pct"] = matchup_df["win_total"] / matchup_df["game_total"]
         matchup_df.sort_values(by=["win_pct"], ascending=False, inplace=True)
         return matchup_df
 
 
+class MLTable(pandas.DataFrame):
+    def copy(self):
+        copy_df = super().copy()
+        return MLTable(copy_df)
+
+    def merge_with_teams(self, teams_df):
+        teams_df = teams_df[["nick_name", "season", "division"]]
+        # merge on the away side, then the home side
+        merged_df = self.merge(
+            teams_df.rename(columns={"nick_name": "a_nick", "division": "a_division"}),
+            on=["a_nick", "season"],
+            how="left",
+        ).merge(
+            teams_df.rename(columns={"nick_name": "h_nick", "division": "h_division"}),
+            on=["h_nick", "season"],
+            how="left",
+        )
+        # reclass here since merge returns a vanilla DF
+        return MLTable(merged_df)
+
+    def normalize_games(self):
+        store = MLGameStore(self)
+        return self.assign(
+            a_win=store.a_win.astype(numpy.int64),
+            h_win=store.h_win.astype(numpy.int64),
+            a_tie=store.tie.astype(numpy.int64),
+            h_tie=store.tie.astype(numpy.int64),
+            a_score_norm=store.a_score_norm,
+            h_score_norm=store.h_score_norm,
+            # margin = home - away
+            h_margin=store.h_score_norm - store.a_score_norm,
+        )
+
+    def calc_records(self, teams_df, divisions=True):
+        return MLGameStore(self, teams_df).calc_records(divisions=divisions)
+
+    def calc_matchup_records(self, teams_df):
+        return MLGameStore(self, teams_df).calc_matchup_records()
+
+
 @ml_api.post("/team")
 async def add_teams(
     doc_list: List[MLTeam],
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     result = await engine.save_all(doc_list)
+    await bump_versions(client, [doc.season for doc in doc_list])
+    await commit_snapshot(client)
     # recalculate transforms
     transform_info = await transform_pipeline(client, run_all=True)
     return {
@@ -357,8 +917,8 @@ async def get_team(
     oid: ObjectId,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    team = await engine.find_one(MLTeam, MLTeam.id == oid)
+    snapshot = await get_snapshot(client)
+    team = snapshot.find_one(MLTeam, oid)
     if team:
         return team
     else:
@@ -372,15 +932,18 @@ async def edit_team(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     team = await engine.find_one(MLTeam, MLTeam.id == oid)
     if team is None:
         raise HTTPException(status_code=404, detail="No data found!")
+    old_season = team.season
 
     patch_dict = patch.dict(exclude_unset=True)
     for attr, value in patch_dict.items():
         setattr(team, attr, value)
     result = await engine.save(team)
+    await bump_versions(client, [old_season, team.season])
+    await commit_snapshot(client)
     # recalculate transforms
     transform_info = await transform_pipeline(client, run_all=True)
     return {
@@ -395,12 +958,14 @@ async def delete_team(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     team = await engine.find_one(MLTeam, MLTeam.id == oid)
     if team is None:
         raise HTTPException(status_code=404, detail="No data found!")
 
     await engine.delete(team)
+    await bump_versions(client, [team.season])
+    await commit_snapshot(client)
     # recalculate transforms
     transform_info = await transform_pipeline(client, run_all=True)
     return {
@@ -411,9 +976,9 @@ async def delete_team(
 
 @ml_api.get("/all/team/all", response_model=List[MLTeam])
 async def get_all_teams(client: AsyncIOMotorClient = Depends(get_odm)):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    snapshot = await get_snapshot(client)
     # return full history of mildredleague teams
-    data = [team async for team in engine.find(MLTeam, sort=MLTeam.id)]
+    data = snapshot.find_teams()
     if data:
         return data
     else:
@@ -424,11 +989,8 @@ async def get_all_teams(client: AsyncIOMotorClient = Depends(get_odm)):
 async def get_season_teams(
     season: MLSeason, client: AsyncIOMotorClient = Depends(get_odm)
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        team
-        async for team in engine.find(MLTeam, MLTeam.season == season, sort=MLTeam.id)
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_teams(season)
     if data:
         return data
     else:
@@ -441,10 +1003,20 @@ async def add_games(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    # any games being overwritten need to come back out of the H2H cells
+    replaced_list = [
+        game
+        async for game in engine.find(
+            MLGame, query.in_(MLGame.id, [doc.id for doc in doc_list])
+        )
+    ]
     result = await engine.save_all(doc_list)
+    await commit_snapshot(client)
     # recalculate transforms
-    transform_info = await transform_pipeline(client, doc_list=doc_list)
+    transform_info = await transform_pipeline(
+        client, doc_list=doc_list, removed_list=replaced_list
+    )
     return {
         "result": result,
         "transform_info": transform_info,
@@ -456,8 +1028,8 @@ async def get_game(
     oid: ObjectId,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    game = await engine.find_one(MLGame, MLGame.id == oid)
+    snapshot = await get_snapshot(client)
+    game = snapshot.find_one(MLGame, oid)
     if game:
         return game
     else:
@@ -471,17 +1043,23 @@ async def edit_game(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     game = await engine.find_one(MLGame, MLGame.id == oid)
     if game is None:
         raise HTTPException(status_code=404, detail="No data found!")
+    # keep the pre-patch version so the slices it used to belong to
+    # are refreshed too if the patch moves it to another season or playoff
+    old_game = game.copy()
 
     patch_dict = patch.dict(exclude_unset=True)
     for attr, value in patch_dict.items():
         setattr(game, attr, value)
     result = await engine.save(game)
+    await commit_snapshot(client)
     # recalculate transforms
-    transform_info = await transform_pipeline(client, doc_list=[game])
+    transform_info = await transform_pipeline(
+        client, doc_list=[game], removed_list=[old_game]
+    )
     return {
         "result": result,
         "transform_info": transform_info,
@@ -494,14 +1072,15 @@ async def delete_game(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     game = await engine.find_one(MLGame, MLGame.id == oid)
     if game is None:
         raise HTTPException(status_code=404, detail="No data found!")
 
     await engine.delete(game)
+    await commit_snapshot(client)
     # recalculate transforms
-    transform_info = await transform_pipeline(client, doc_list=[game])
+    transform_info = await transform_pipeline(client, removed_list=[game])
     return {
         "game": game,
         "transform_info": transform_info,
@@ -510,14 +1089,8 @@ async def delete_game(
 
 @ml_api.get("/all/game/all", response_model=List[MLGame])
 async def get_all_games(client: AsyncIOMotorClient = Depends(get_odm)):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        game
-        async for game in engine.find(
-            MLGame,
-            sort=MLGame.id,
-        )
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_games()
     if data:
         return data
     else:
@@ -528,15 +1101,8 @@ async def get_all_games(client: AsyncIOMotorClient = Depends(get_odm)):
 async def get_all_playoff_games(
     playoff: MLPlayoff, client: AsyncIOMotorClient = Depends(get_odm)
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        game
-        async for game in engine.find(
-            MLGame,
-            MLGame.playoff == playoff,
-            sort=MLGame.id,
-        )
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_games(playoff=playoff)
     if data:
         return data
     else:
@@ -548,15 +1114,8 @@ async def get_season_games(
     season: MLSeason,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        game
-        async for game in engine.find(
-            MLGame,
-            MLGame.season == season,
-            sort=MLGame.id,
-        )
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_games(season)
     if data:
         return data
     else:
@@ -569,15 +1128,8 @@ async def get_season_games_subset(
     playoff: MLPlayoff,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        game
-        async for game in engine.find(
-            MLGame,
-            (MLGame.season == season) & (MLGame.playoff == playoff),
-            sort=MLGame.id,
-        )
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_games(season, playoff)
     if data:
         return data
     else:
@@ -590,8 +1142,9 @@ async def add_notes(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     result = await engine.save_all(doc_list)
+    await commit_snapshot(client)
     return {
         "result": result,
     }
@@ -602,8 +1155,8 @@ async def get_note(
     oid: ObjectId,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    note = await engine.find_one(MLNote, MLNote.id == oid)
+    snapshot = await get_snapshot(client)
+    note = snapshot.find_one(MLNote, oid)
     if note:
         return note
     else:
@@ -617,7 +1170,7 @@ async def edit_note(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     note = await engine.find_one(MLNote, MLNote.id == oid)
     if note is None:
         raise HTTPException(status_code=404, detail="No data found!")
@@ -626,6 +1179,7 @@ async def edit_note(
     for attr, value in patch_dict.items():
         setattr(note, attr, value)
     result = await engine.save(note)
+    await commit_snapshot(client)
 
     return {
         "result": result,
@@ -638,12 +1192,13 @@ async def delete_note(
     client: AsyncIOMotorClient = Depends(get_odm),
     user: UserOut = Depends(oauth2_scheme),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
     note = await engine.find_one(MLNote, MLNote.id == oid)
     if note is None:
         raise HTTPException(status_code=404, detail="No data found!")
 
     await engine.delete(note)
+    await commit_snapshot(client)
 
     return {
         "note": note,
@@ -654,11 +1209,8 @@ async def delete_note(
 async def get_season_notes(
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        note
-        async for note in engine.find(MLNote, sort=MLNote.id)
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_notes()
     if data:
         return data
     else:
@@ -670,11 +1222,172 @@ async def get_season_notes(
     season: MLSeason,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    data = [
-        note
-        async for note in engine.find(MLNote, MLNote.season == season, sort=MLNote.id)
-    ]
+    snapshot = await get_snapshot(client)
+    data = snapshot.find_notes(season)
+    if data:
+        return data
+    else:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+
+def draft_pick_doc(row: Dict):
+    """One draftpicks document from a row of the draft history CSV."""
+    # "Adrian Peterson Min, RB" -> player, nfl team
+    player = row["player"].replace("\xa0", " ").rsplit(",", 1)[0].strip()
+    player, nfl_team = player.rsplit(" ", 1)
+    season = int(row["season"])
+    pick = int(row["pick"])
+    return {
+        "_id": season * 1000 + pick,
+        "season": season,
+        "round": int(row["round"]),
+        "pick": pick,
+        "team": row["team"],
+        "name": row["name"],
+        "nick": row["nick"],
+        "player": player,
+        "nfl_team": nfl_team,
+        "position": row["position"].strip(),
+    }
+
+
+# aggregations over draftpicks for each precomputed draft collection.
+# $out swaps in the whole collection, so nothing outdated is left behind.
+DRAFT_PIPELINES = {
+    # one board per season, in pick order
+    MLDraftBoardTransform.__collection__: [
+        {"$sort": {"season": 1, "pick": 1}},
+        {
+            "$group": {
+                "_id": "$season",
+                "data": {
+                    "$push": [
+                        "$round",
+                        "$pick",
+                        "$nick",
+                        "$player",
+                        "$nfl_team",
+                        "$position",
+                    ]
+                },
+            }
+        },
+        {
+            "$addFields": {
+                "columns": ["round", "pick", "nick", "player", "nfl_team", "position"],
+            }
+        },
+        {"$out": MLDraftBoardTransform.__collection__},
+    ],
+    # how often and how early each manager takes each position
+    MLDraftTendencyTransform.__collection__: [
+        {
+            "$group": {
+                "_id": {"nick": "$nick", "position": "$position"},
+                "picks": {"$sum": 1},
+                "avg_round": {"$avg": "$round"},
+                "first_round": {"$min": "$round"},
+            }
+        },
+        {"$sort": {"picks": -1, "avg_round": 1}},
+        {
+            "$group": {
+                "_id": "$_id.nick",
+                "total": {"$sum": "$picks"},
+                "positions": {
+                    "$push": {
+                        "position": "$_id.position",
+                        "picks": "$picks",
+                        "avg_round": "$avg_round",
+                        "first_round": "$first_round",
+                    }
+                },
+            }
+        },
+        {
+            "$addFields": {
+                "positions": {
+                    "$map": {
+                        "input": "$positions",
+                        "as": "p",
+                        "in": {
+                            "position": "$$p.position",
+                            "picks": "$$p.picks",
+                            "share": {"$divide": ["$$p.picks", "$total"]},
+                            "avg_round": "$$p.avg_round",
+                            "first_round": "$$p.first_round",
+                        },
+                    }
+                },
+            }
+        },
+        {"$out": MLDraftTendencyTransform.__collection__},
+    ],
+    # every time a player was drafted, oldest first
+    MLDraftPlayerTransform.__collection__: [
+        {"$sort": {"season": 1, "pick": 1}},
+        {
+            "$group": {
+                "_id": "$player",
+                "position": {"$last": "$position"},
+                "times_drafted": {"$sum": 1},
+                "picks": {
+                    "$push": {
+                        "season": "$season",
+                        "round": "$round",
+                        "pick": "$pick",
+                        "nick": "$nick",
+                        "nfl_team": "$nfl_team",
+                    }
+                },
+            }
+        },
+        {"$out": MLDraftPlayerTransform.__collection__},
+    ],
+}
+
+
+# draft pages are single reads of what restore/db.py precomputed at ingest
+@ml_api.get("/draft/{season}", response_model=MLDraftBoardTransform)
+async def get_draft_board(
+    season: MLSeason,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    data = await engine.find_one(
+        MLDraftBoardTransform, MLDraftBoardTransform.season == season
+    )
+    if data:
+        return data
+    else:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+
+@ml_api.get("/draft/manager/{nick}", response_model=MLDraftTendencyTransform)
+async def get_draft_tendencies(
+    nick: NickName,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    data = await engine.find_one(
+        MLDraftTendencyTransform, MLDraftTendencyTransform.nick == nick
+    )
+    if data:
+        return data
+    else:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+
+# player names can have a slash in them, like "Seahawks D/ST"
+@ml_api.get("/draft/player/{player:path}", response_model=MLDraftPlayerTransform)
+async def get_draft_player(
+    player: str,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    data = await engine.find_one(
+        MLDraftPlayerTransform, MLDraftPlayerTransform.player == player
+    )
     if data:
         return data
     else:
@@ -682,9 +1395,78 @@ async def get_season_notes(
 
 
 @ml_api.get("/all/figure/ranking")
-async def all_time_ranking_fig(teams_data: List[MLTeam] = Depends(get_all_teams)):
-    # convert to pandas dataframe
-    teams_df = pandas.DataFrame([team.doc() for team in teams_data])
+async def all_time_ranking_fig(
+    request: Request,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    return await figure_response(request, "ranking", client)
+
+
+@ml_api.get("/all/figure/wins/{playoff}")
+async def win_total_fig(
+    request: Request,
+    playoff: MLPlayoff,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    return await figure_response(request, f"wins{playoff.value}", client)
+
+
+@ml_api.get("/all/figure/heatmap")
+async def matchup_heatmap_fig(
+    request: Request,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    return await figure_response(request, "heatmap", client)
+
+
+@ml_api.get("/all/figure/ratings")
+async def rating_history_fig(
+    request: Request,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    return await figure_response(request, "ratings", client)
+
+
+async def figure_response(
+    request: Request,
+    figure_id: str,
+    client: AsyncIOMotorClient,
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    figure = await engine.find_one(
+        MLFigureTransform, MLFigureTransform.figure_id == figure_id
+    )
+    # if the figure hasn't been materialized yet, run the figure
+    # transforms once and query again
+    if figure is None:
+        await all_time_figure_transform(client, ALL_TIME_FIGURES)
+        figure = await engine.find_one(
+            MLFigureTransform, MLFigureTransform.figure_id == figure_id
+        )
+    if figure is None:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    return etag_response(request, figure.data, figure.etag)
+
+
+def etag_response(request: Request, content, etag: str):
+    # strong validator, quoted per RFC 7232
+    etag = f'"{etag}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse(content=content, headers={"ETag": etag})
+
+
+def figure_etag(data):
+    """Round trip figure data through orjson so it's plain BSON-safe
+    Python, and hash the sorted bytes into a stable ETag."""
+    payload = orjson.dumps(
+        data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS
+    )
+    return orjson.loads(payload), hashlib.md5(payload).hexdigest()
+
+
+def all_time_ranking_transform(teams_df):
     # pivot by year for all teams
     annual_ranking_df = pandas.pivot(
         teams_df, index="nick_name", columns="season", values="playoff_rank"
@@ -726,22 +1508,15 @@ async def all_time_ranking_fig(teams_data: List[MLTeam] = Depends(get_all_teams)
     }
 
 
-@ml_api.get("/all/figure/wins/{playoff}")
-async def win_total_fig(
-    playoff: MLPlayoff,
-    games_data: List[MLGame] = Depends(get_all_playoff_games),
-    teams_data: List[MLTeam] = Depends(get_all_teams),
-):
-    # convert to pandas DataFrame and normalize as record_df
-    games_df = MLTable([game.doc() for game in games_data])
-    teams_df = pandas.DataFrame([team.doc() for team in teams_data])
-    record_df = games_df.calc_records(teams_df, divisions=False)
-    # group by nick_name (don't need division info for this figure)
+async def win_total_transform(playoff: MLPlayoff, client: AsyncIOMotorClient):
+    # win totals come straight out of the standings aggregation
+    # (don't need division info for this figure)
+    record_df = await calc_records_aggregation(
+        client, {"playoff": int(playoff)}, divisions=False
+    )
     record_df = (
-        record_df.groupby(
-            level=["nick_name"],
-        )
-        .agg({"win_total": sum})
+        record_df[["win_total"]]
+        .sort_index()
         .sort_values("win_total", ascending=True)
     )
 
@@ -763,52 +1538,33 @@ async def win_total_fig(
     }
 
 
-@ml_api.get("/all/figure/heatmap")
-async def matchup_heatmap_fig(
-    games_data: List[MLGame] = Depends(get_all_games),
-    teams_data: List[MLTeam] = Depends(get_all_teams),
-):
-    # convert to pandas DataFrame
-    games_df = MLTable([game.doc() for game in games_data])
-    teams_df = pandas.DataFrame([team.doc() for team in teams_data])
-    # convert to record_df
-    matchup_df = games_df.calc_matchup_records(teams_df.copy()).reset_index()
-
-    # inner joins are just to keep active teams
-    active_matchup_df = (
-        matchup_df.merge(
-            teams_df.loc[teams_df.active, ["nick_name"]].drop_duplicates(),
-            on="nick_name",
-            how="inner",
-        )
-        .merge(
-            teams_df.loc[teams_df.active, ["nick_name"]].drop_duplicates(),
-            left_on="loser",
-            right_on="nick_name",
-            how="inner",
-        )
-        .drop(columns=["nick_name_y"])
-        .rename(columns={"nick_name_x": "nick_name"})
-        .set_index(keys=["nick_name", "loser"])
+def matchup_heatmap_transform(h2h_data: List[MLH2HTransform], teams_df):
+    # all-time matrices are just the sum of every season and playoff slice.
+    # ties count as half a win.
+    wins = sum(numpy.array(doc.wins) + numpy.array(doc.ties) * 0.5 for doc in h2h_data)
+    games = sum(numpy.array(doc.games) for doc in h2h_data)
+
+    # keep active teams with at least one game against another active team
+    active_nicks = sorted(set(teams_df.loc[teams_df["active"], "nick_name"]))
+    active_ids = numpy.array([NICK_INDEX[nick] for nick in active_nicks])
+    played = games[numpy.ix_(active_ids, active_ids)].sum(axis=1) > 0
+    nick_names = numpy.array(active_nicks)[played].tolist()
+    active_ids = numpy.ix_(active_ids[played], active_ids[played])
+    wins, games = wins[active_ids], games[active_ids]
+    # -1 marks pairs that never played
+    win_pct = numpy.divide(
+        wins, games, out=numpy.full(games.shape, -1.0), where=games > 0
     )
 
-    # game total custom data for the hover text
-    game_df = active_matchup_df[["game_total"]].unstack()
-    # win pct data is what drives the figure
-    matchup_df = active_matchup_df[["win_pct"]].unstack()
-
     # start creating the figure!
     # y axis labels
-    y_winners = matchup_df.index.to_list()
-    y_winners.reverse()
+    y_winners = nick_names[::-1]
     # x axis labels
-    x_opponents = matchup_df.columns.get_level_values(1).to_list()
-    # z axis data, replacing nan with 0s
-    z_matchup_data = matchup_df[["win_pct"]].fillna(-1).values.tolist()
-    z_matchup_data.reverse()
-    # custom hovertext data, replacing nan with 0s
-    hover_data = game_df[["game_total"]].fillna(0).values.tolist()
-    hover_data.reverse()
+    x_opponents = nick_names
+    # z axis data
+    z_matchup_data = win_pct[::-1].tolist()
+    # custom hovertext data
+    hover_data = games[::-1].tolist()
     # color data
     matchup_colors = [
         [i / (len(plotly.colors.diverging.Temps_r) - 1), color]
@@ -824,119 +1580,1066 @@ async def matchup_heatmap_fig(
     }
 
 
-@ml_api.get("/{season}/boxplot", response_model=MLBoxplotTransform)
-async def season_boxplot_fig(
+async def all_time_figure_transform(client: AsyncIOMotorClient, figure_ids):
+    # none of the all-time figures read the raw games anymore.
+    # teams are pulled once for all of them.
+    teams_df = await find_frame(
+        client, ML_DATABASE, MLTeam, sort=[("_id", ASCENDING)]
+    )
+    if teams_df.empty:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    message_array = []
+    for figure_id in figure_ids:
+        if figure_id == "ranking":
+            new_data = all_time_ranking_transform(teams_df)
+        elif figure_id == "heatmap":
+            new_data = matchup_heatmap_transform(await get_h2h_data(client), teams_df)
+        elif figure_id == "ratings":
+            new_data = rating_history_transform(await get_rating_data(client))
+        else:
+            playoff = MLPlayoff(int(figure_id[len("wins"):]))
+            new_data = await win_total_transform(playoff, client)
+        new_data, new_etag = figure_etag(new_data)
+
+        # the etag doubles as a cheap sync check, and since figure_id is
+        # the primary key, save() replaces the old document in place
+        old_figure = await engine.find_one(
+            MLFigureTransform, MLFigureTransform.figure_id == figure_id
+        )
+        if old_figure is not None and old_figure.etag == new_etag:
+            message = "Collection is already synced! Collection: " + figure_id
+        else:
+            await engine.save(
+                MLFigureTransform(figure_id=figure_id, etag=new_etag, data=new_data)
+            )
+            message = "Insert complete! Collection: " + figure_id
+        message_array.append(message)
+
+    return message_array
+
+
+@ml_api.get("/h2h/{nick_a}/{nick_b}")
+async def h2h_record(
+    nick_a: NickName,
+    nick_b: NickName,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    # make sure the slices exist before reading cells out of them
+    await get_h2h_data(client)
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(MLH2HTransform)
+    a, b = NICK_INDEX[nick_a], NICK_INDEX[nick_b]
+
+    def cell(matrix, row, column):
+        return {"$arrayElemAt": [{"$arrayElemAt": ["$" + matrix, row]}, column]}
+
+    # only the four cells for this pair leave the database
+    seasons = await collection.aggregate(
+        [
+            {
+                "$project": {
+                    "_id": 0,
+                    "season": 1,
+                    "playoff": 1,
+                    "win_total": cell("wins", a, b),
+                    "loss_total": cell("wins", b, a),
+                    "tie_total": cell("ties", a, b),
+                    "game_total": cell("games", a, b),
+                }
+            },
+            {"$match": {"game_total": {"$gt": 0}}},
+            {"$sort": {"season": 1, "playoff": 1}},
+        ]
+    ).to_list(length=None)
+    if not seasons:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    totals = {
+        column: sum(season[column] for season in seasons)
+        for column in ["win_total", "loss_total", "tie_total", "game_total"]
+    }
+    return {
+        "nick_a": nick_a,
+        "nick_b": nick_b,
+        **totals,
+        "win_pct": (totals["win_total"] + totals["tie_total"] * 0.5)
+        / totals["game_total"],
+        "seasons": seasons,
+    }
+
+
+def h2h_id(season: MLSeason, playoff: MLPlayoff):
+    return str(int(season)) + str(int(playoff))
+
+
+def h2h_matrices(games_df):
+    """Dense wins, ties and games matrices in NICK_NAMES order.
+    wins[i][j] is the number of games nick i won against nick j."""
+    n_nicks = len(NICK_NAMES)
+    wins = numpy.zeros((n_nicks, n_nicks), dtype=numpy.int64)
+    ties = numpy.zeros((n_nicks, n_nicks), dtype=numpy.int64)
+    games = numpy.zeros((n_nicks, n_nicks), dtype=numpy.int64)
+    if len(games_df):
+        a_id = numpy.array([NICK_INDEX[nick] for nick in games_df["a_nick"]])
+        h_id = numpy.array([NICK_INDEX[nick] for nick in games_df["h_nick"]])
+        a_score = numpy.asarray(games_df["a_score"], dtype=numpy.float64)
+        h_score = numpy.asarray(games_df["h_score"], dtype=numpy.float64)
+        numpy.add.at(wins, (a_id, h_id), a_score > h_score)
+        numpy.add.at(wins, (h_id, a_id), a_score < h_score)
+        numpy.add.at(ties, (a_id, h_id), a_score == h_score)
+        numpy.add.at(ties, (h_id, a_id), a_score == h_score)
+        numpy.add.at(games, (a_id, h_id), 1)
+        numpy.add.at(games, (h_id, a_id), 1)
+    return wins, ties, games
+
+
+def h2h_inc(game: MLGame, sign: int):
+    """$inc paths for adding (sign=1) or removing (sign=-1) one game."""
+    a, h = NICK_INDEX[game.a_nick], NICK_INDEX[game.h_nick]
+    inc = {f"games.{a}.{h}": sign, f"games.{h}.{a}": sign}
+    if game.a_score > game.h_score:
+        inc[f"wins.{a}.{h}"] = sign
+    elif game.a_score < game.h_score:
+        inc[f"wins.{h}.{a}"] = sign
+    else:
+        inc[f"ties.{a}.{h}"] = sign
+        inc[f"ties.{h}.{a}"] = sign
+    return inc
+
+
+async def get_h2h_data(client: AsyncIOMotorClient, *queries):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    h2h_data = [doc async for doc in engine.find(MLH2HTransform, *queries)]
+    # rebuild if the slices are missing or NickName has grown since
+    if not h2h_data or any(doc.nick_names != NICK_NAMES for doc in h2h_data):
+        all_seasons = [member for name, member in MLSeason.__members__.items()]
+        all_playoffs = [member for name, member in MLPlayoff.__members__.items()]
+        await h2h_transform(client, list(product(all_seasons, all_playoffs)))
+        h2h_data = [doc async for doc in engine.find(MLH2HTransform, *queries)]
+    return h2h_data
+
+
+async def h2h_update(client: AsyncIOMotorClient, doc_list=None, removed_list=None):
+    # add the games in doc_list and take away the ones in removed_list.
+    # each game only touches a few cells of its own slice.
+    slice_incs = {}
+    slice_combos = {}
+    for sign, games in [(1, doc_list or []), (-1, removed_list or [])]:
+        for game in games:
+            slice_id = h2h_id(game.season, game.playoff)
+            slice_combos[slice_id] = (game.season, game.playoff)
+            inc = slice_incs.setdefault(slice_id, {})
+            for path, value in h2h_inc(game, sign).items():
+                inc[path] = inc.get(path, 0) + value
+
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(MLH2HTransform)
+    message_array = []
+    for slice_id, inc in slice_incs.items():
+        inc = {path: value for path, value in inc.items() if value}
+        if not inc:
+            message = "Collection is already synced! Collection: " + slice_id
+            message_array.append(message)
+            continue
+        result = await collection.update_one(
+            {"_id": slice_id, "nick_names": NICK_NAMES}, {"$inc": inc}
+        )
+        if result.matched_count:
+            message_array.append("Increment complete! Collection: " + slice_id)
+        else:
+            # missing or stale slice, build it from scratch
+            message_array += await h2h_transform(client, [slice_combos[slice_id]])
+
+    return message_array
+
+
+async def h2h_transform(client: AsyncIOMotorClient, season_playoff_combos):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    message_array = []
+    for season, playoff in season_playoff_combos:
+        wins, ties, games = h2h_matrices(
+            await find_frame(
+                client,
+                ML_DATABASE,
+                MLGame,
+                {"season": int(season), "playoff": int(playoff)},
+                ["a_nick", "a_score", "h_nick", "h_score"],
+            )
+        )
+        new_h2h_data = MLH2HTransform(
+            h2h_id=h2h_id(season, playoff),
+            season=season,
+            playoff=playoff,
+            nick_names=NICK_NAMES,
+            wins=wins.tolist(),
+            ties=ties.tolist(),
+            games=games.tolist(),
+        )
+        old_h2h_data = await engine.find_one(
+            MLH2HTransform, MLH2HTransform.h2h_id == new_h2h_data.h2h_id
+        )
+        if old_h2h_data == new_h2h_data:
+            message = "Collection is already synced! Collection: " + new_h2h_data.h2h_id
+        else:
+            # h2h_id is the primary key, so save() replaces the old slice
+            await engine.save(new_h2h_data)
+            message = "Insert complete! Collection: " + new_h2h_data.h2h_id
+        message_array.append(message)
+
+    return message_array
+
+
+@ml_api.get("/{season}/scores")
+async def season_score_summary(
+    season: MLSeason,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    """Five-number summaries of every team's weekly scores, for and against,
+    in playoff rank order. The size doesn't grow with the number of games."""
+    score_data = await get_score_data(client, MLScoreTransform.season == season)
+    teams_data = await find_covered(client, MLTeam, {"season": int(season)})
+    if not score_data or not teams_data:
+        raise HTTPException(status_code=404, detail="No data found!")
+    score_data = score_data[0]
+
+    nick_names = [
+        team.nick_name.value
+        for team in sorted(teams_data, key=lambda team: team.playoff_rank)
+    ]
+    nick_ids = [NICK_INDEX[nick] for nick in nick_names]
+    content = {"season": season}
+    for side in Against:
+        bins = numpy.array(getattr(score_data, f"{side.value}_bins"))[nick_ids]
+        content[f"{side.value}_data"] = {
+            "x_data": nick_names,
+            "games": bins.sum(axis=1).tolist(),
+            "q_data": bin_quantiles(bins, SCORE_QUANTILES).round(2).tolist(),
+            "color_data": px.colors.qualitative.Light24,
+        }
+    return content
+
+
+@ml_api.get("/all/scores/percentile")
+async def score_percentile(
+    score: float,
+    nick: Optional[NickName] = None,
+    side: Against = Against.FOR,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    """Where a weekly score ranks all-time, league-wide or against one
+    team's history."""
+    bins = await all_time_bins(client, side)
+    if nick is not None:
+        bins = bins[NICK_INDEX[nick.value]]
+    else:
+        bins = bins.sum(axis=0)
+    if not bins.sum():
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    return {
+        "score": score,
+        "nick_name": nick,
+        "side": side,
+        "percentile": bin_percentile(bins, score),
+    }
+
+
+@ml_api.get("/all/scores/leaderboard")
+async def score_leaderboard(
+    side: Against = Against.FOR,
+    stat: ScoreStat = ScoreStat.MEDIAN,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    """All-time five-number summaries for every team, best stat first."""
+    bins = await all_time_bins(client, side)
+    nick_ids = numpy.flatnonzero(bins.sum(axis=1))
+    if not len(nick_ids):
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    quantiles = bin_quantiles(bins[nick_ids], SCORE_QUANTILES).round(2)
+    columns = [member.value for name, member in ScoreStat.__members__.items()]
+    leaderboard = pandas.DataFrame(quantiles, columns=columns)
+    leaderboard.insert(0, "nick_name", [NICK_NAMES[i] for i in nick_ids])
+    leaderboard.insert(1, "games", bins[nick_ids].sum(axis=1))
+    # points against is better when it's low
+    leaderboard = leaderboard.sort_values(
+        by=stat.value, ascending=side == Against.AGAINST, kind="stable"
+    )
+    return {
+        "side": side,
+        "stat": stat,
+        "columns": leaderboard.columns.tolist(),
+        "data": leaderboard.values.tolist(),
+    }
+
+
+async def all_time_bins(client: AsyncIOMotorClient, side: Against):
+    # every season's histograms summed, nicks x bins
+    score_data = await get_score_data(client)
+    bins = numpy.zeros((len(NICK_NAMES), SCORE_BINS), dtype=numpy.int64)
+    for doc in score_data:
+        bins += numpy.array(getattr(doc, f"{side.value}_bins"))
+    return bins
+
+
+def score_bin(scores):
+    """Histogram bin of each score. Scores off either end land in the
+    first or last bin."""
+    bins = numpy.floor(
+        (numpy.asarray(scores, dtype=float) - SCORE_BIN_MIN) / SCORE_BIN_WIDTH
+    )
+    return numpy.clip(bins, 0, SCORE_BINS - 1).astype(numpy.int64)
+
+
+def score_games(games_df):
+    # scheduled 0-0 games haven't been played yet
+    return games_df.loc[(games_df["a_score"] != 0) | (games_df["h_score"] != 0)]
+
+
+def score_histograms(games_df):
+    """Dense score histograms in NICK_NAMES order, one row per nick.
+    for_bins counts a team's normalized weekly scores, against_bins its
+    opponents'. Byes don't get a row of their own, but the team that
+    played one still does."""
+    n_nicks = len(NICK_NAMES)
+    for_bins = numpy.zeros((n_nicks, SCORE_BINS), dtype=numpy.int64)
+    against_bins = numpy.zeros((n_nicks, SCORE_BINS), dtype=numpy.int64)
+    games_df = score_games(games_df)
+    if len(games_df):
+        weeks = games_df["week_e"] - games_df["week_s"] + 1
+        a_bin = score_bin(games_df["a_score"] / weeks)
+        h_bin = score_bin(games_df["h_score"] / weeks)
+        for nicks, own_bin, other_bin in [
+            (games_df["a_nick"], a_bin, h_bin),
+            (games_df["h_nick"], h_bin, a_bin),
+        ]:
+            played = (nicks != NickName.BYE).to_numpy()
+            nick_ids = numpy.array([NICK_INDEX[nick] for nick in nicks[played]])
+            numpy.add.at(for_bins, (nick_ids, own_bin[played]), 1)
+            numpy.add.at(against_bins, (nick_ids, other_bin[played]), 1)
+    return for_bins, against_bins
+
+
+def score_inc(game: MLGame, sign: int):
+    """$inc paths for adding (sign=1) or removing (sign=-1) one game."""
+    inc = {}
+    if game.a_score == 0 and game.h_score == 0:
+        return inc
+    weeks = game.week_e - game.week_s + 1
+    a_bin, h_bin = score_bin([game.a_score / weeks, game.h_score / weeks]).tolist()
+    for nick, own_bin, other_bin in [
+        (game.a_nick, a_bin, h_bin),
+        (game.h_nick, h_bin, a_bin),
+    ]:
+        if nick == NickName.BYE:
+            continue
+        i = NICK_INDEX[nick]
+        for path in [f"for_bins.{i}.{own_bin}", f"against_bins.{i}.{other_bin}"]:
+            inc[path] = inc.get(path, 0) + sign
+    return inc
+
+
+def bin_quantiles(bins, quantiles):
+    """Quantiles of each row of a histogram, treating the scores in a bin
+    as spread evenly across it. Rows with no scores come back as nan."""
+    bins = numpy.atleast_2d(bins)
+    cum_bins = bins.cumsum(axis=1)
+    result = numpy.full((len(bins), len(quantiles)), numpy.nan)
+    for row, (counts, cum_counts) in enumerate(zip(bins, cum_bins)):
+        if not cum_counts[-1]:
+            continue
+        # the tiny floor makes the 0th quantile the first nonempty bin
+        targets = numpy.maximum(numpy.asarray(quantiles) * cum_counts[-1], 1e-9)
+        ids = numpy.searchsorted(cum_counts, targets)
+        below = cum_counts[ids] - counts[ids]
+        result[row] = SCORE_BIN_MIN + SCORE_BIN_WIDTH * (
+            ids + (targets - below) / counts[ids]
+        )
+    return result
+
+
+def bin_percentile(bins, score: float):
+    """Share of the scores in a histogram row that are below score."""
+    cum_counts = numpy.concatenate([[0], numpy.cumsum(bins)])
+    bin_id = score_bin([score])[0]
+    within = (score - SCORE_BIN_MIN) / SCORE_BIN_WIDTH - bin_id
+    below = cum_counts[bin_id] + bins[bin_id] * min(max(within, 0), 1)
+    return float(below / cum_counts[-1])
+
+
+async def get_score_data(client: AsyncIOMotorClient, *queries):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    score_data = [doc async for doc in engine.find(MLScoreTransform, *queries)]
+    # rebuild if the histograms are missing, or NickName or the bins changed
+    if not score_data or any(
+        doc.nick_names != NICK_NAMES or doc.score_bins != SCORE_BIN_SPEC
+        for doc in score_data
+    ):
+        await score_transform(
+            client, [member for name, member in MLSeason.__members__.items()]
+        )
+        score_data = [doc async for doc in engine.find(MLScoreTransform, *queries)]
+    return score_data
+
+
+async def score_update(client: AsyncIOMotorClient, doc_list=None, removed_list=None):
+    # add the games in doc_list and take away the ones in removed_list.
+    # each game only touches a few bins of its own season.
+    season_incs = {}
+    for sign, games in [(1, doc_list or []), (-1, removed_list or [])]:
+        for game in games:
+            inc = season_incs.setdefault(game.season, {})
+            for path, value in score_inc(game, sign).items():
+                inc[path] = inc.get(path, 0) + value
+
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(MLScoreTransform)
+    message_array = []
+    for season, inc in season_incs.items():
+        inc = {path: value for path, value in inc.items() if value}
+        if not inc:
+            message = "Collection is already synced! Collection: " + str(season)
+            message_array.append(message)
+            continue
+        result = await collection.update_one(
+            {
+                "_id": int(season),
+                "nick_names": NICK_NAMES,
+                "score_bins": SCORE_BIN_SPEC,
+            },
+            {"$inc": inc},
+        )
+        if result.matched_count:
+            message_array.append("Increment complete! Collection: " + str(season))
+        else:
+            # missing or stale season, build it from scratch
+            message_array += await score_transform(client, [season])
+
+    return message_array
+
+
+async def score_transform(client: AsyncIOMotorClient, seasons):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    message_array = []
+    for season in seasons:
+        for_bins, against_bins = score_histograms(
+            await find_frame(
+                client,
+                ML_DATABASE,
+                MLGame,
+                {"season": int(season)},
+                ["a_nick", "a_score", "h_nick", "h_score", "week_s", "week_e"],
+            )
+        )
+        new_score_data = MLScoreTransform(
+            season=season,
+            nick_names=NICK_NAMES,
+            score_bins=SCORE_BIN_SPEC,
+            for_bins=for_bins.tolist(),
+            against_bins=against_bins.tolist(),
+        )
+        old_score_data = await engine.find_one(
+            MLScoreTransform, MLScoreTransform.season == season
+        )
+        if old_score_data == new_score_data:
+            message = "Collection is already synced! Collection: " + str(season)
+        else:
+            # season is the primary key, so save() replaces the old histograms
+            await engine.save(new_score_data)
+            message = "Insert complete! Collection: " + str(season)
+        message_array.append(message)
+
+    return message_array
+
+
+@ml_api.get("/ratings/{season}")
+async def season_ratings(
     season: MLSeason,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    chart_data = [
-        chart
-        async for chart in engine.find(
-            MLBoxplotTransform,
-            MLBoxplotTransform.season == season,
+    rating_data = await get_rating_data(client, MLRatingTransform.season == season)
+    if not rating_data:
+        raise HTTPException(status_code=404, detail="No data found!")
+    rating_data = rating_data[0]
+
+    # only the teams that played this season, one series per team
+    games_played = numpy.array(rating_data.games_played)
+    nick_ids = numpy.flatnonzero(games_played[-1] > 0)
+    return {
+        "season": season,
+        "weeks": rating_data.weeks,
+        "nick_names": [rating_data.nick_names[i] for i in nick_ids],
+        "elo_data": numpy.array(rating_data.elo)[:, nick_ids].T.tolist(),
+        "mov_elo_data": numpy.array(rating_data.mov_elo)[:, nick_ids].T.tolist(),
+    }
+
+
+def rating_history_transform(rating_data: List[MLRatingTransform]):
+    # x axis is every week of every season, in order
+    x_weeks = [
+        f"{doc.season.value} wk {week}" for doc in rating_data for week in doc.weeks
+    ]
+    elo = numpy.concatenate([numpy.array(doc.elo) for doc in rating_data])
+    mov_elo = numpy.concatenate([numpy.array(doc.mov_elo) for doc in rating_data])
+    # blank out the seasons a team sat out, so their lines have gaps
+    sat_out = numpy.concatenate(
+        [
+            numpy.tile(numpy.array(doc.games_played)[-1] == 0, (len(doc.weeks), 1))
+            for doc in rating_data
+        ]
+    )
+    # only teams that have played a game
+    nick_ids = numpy.flatnonzero(~sat_out.all(axis=0))
+    elo = numpy.where(sat_out, None, elo.round(1))[:, nick_ids].T
+    mov_elo = numpy.where(sat_out, None, mov_elo.round(1))[:, nick_ids].T
+
+    return {
+        "x_weeks": x_weeks,
+        "nick_names": [NICK_NAMES[i] for i in nick_ids],
+        "elo_data": elo.tolist(),
+        "mov_elo_data": mov_elo.tolist(),
+    }
+
+
+def rating_rows(games_df, season=None, elo=None, mov_elo=None, games_played=None):
+    """Fold games into Elo and margin-adjusted Elo ratings.
+
+    games_df needs season, week_s, week_e, a_nick, a_score, h_nick and
+    h_score. Ratings start from the state after the last week before
+    games_df (season, elo, mov_elo and games_played over NICK_NAMES),
+    or from scratch. Returns (starts, rows): the regressed ratings at
+    the start of each new season, and one row of ratings per
+    (season, week_s) after that week's games.
+    """
+    n_nicks = len(NICK_NAMES)
+    if elo is None:
+        elo = numpy.full(n_nicks, float(ELO_START))
+        mov_elo = numpy.full(n_nicks, float(ELO_START))
+        games_played = numpy.zeros(n_nicks, dtype=numpy.int64)
+    elo = numpy.array(elo, dtype=float)
+    mov_elo = numpy.array(mov_elo, dtype=float)
+    games_played = numpy.array(games_played, dtype=numpy.int64)
+
+    # byes and scheduled 0-0 games don't move anyone
+    games_df = games_df.loc[
+        (games_df["a_nick"] != NickName.BYE)
+        & (games_df["h_nick"] != NickName.BYE)
+        & ((games_df["a_score"] != 0) | (games_df["h_score"] != 0))
+    ]
+
+    starts = {}
+    rows = []
+    for (game_season, week), week_df in games_df.groupby(["season", "week_s"]):
+        if game_season != season:
+            # new season, pull everyone back towards the middle
+            season = game_season
+            elo += (ELO_START - elo) * ELO_REGRESS
+            mov_elo += (ELO_START - mov_elo) * ELO_REGRESS
+            games_played[:] = 0
+            starts[season] = (elo.tolist(), mov_elo.tolist())
+
+        a_id = numpy.array([NICK_INDEX[nick] for nick in week_df["a_nick"]])
+        h_id = numpy.array([NICK_INDEX[nick] for nick in week_df["h_nick"]])
+        # margins of two-week playoff games are normalized
+        margin = (week_df["a_score"].to_numpy() - week_df["h_score"].to_numpy()) / (
+            week_df["week_e"].to_numpy() - week_df["week_s"].to_numpy() + 1
+        )
+        result = (margin > 0) + (margin == 0) * 0.5
+
+        # everyone plays once a week, so the whole week can be
+        # scored off of the ratings going into it
+        elo_diff = elo[a_id] - elo[h_id]
+        elo_delta = ELO_K * (result - 1 / (1 + 10 ** (-elo_diff / 400)))
+        # the margin multiplier shrinks for favorites running up the score
+        mov_diff = mov_elo[a_id] - mov_elo[h_id]
+        winner_diff = numpy.where(margin < 0, -mov_diff, mov_diff)
+        mov_delta = (
+            ELO_K
+            * numpy.log(numpy.abs(margin) + 1)
+            * 2.2
+            / (winner_diff * 0.001 + 2.2)
+            * (result - 1 / (1 + 10 ** (-mov_diff / 400)))
+        )
+        numpy.add.at(elo, a_id, elo_delta)
+        numpy.add.at(elo, h_id, -elo_delta)
+        numpy.add.at(mov_elo, a_id, mov_delta)
+        numpy.add.at(mov_elo, h_id, -mov_delta)
+        numpy.add.at(games_played, a_id, 1)
+        numpy.add.at(games_played, h_id, 1)
+        rows.append(
+            (season, week, elo.tolist(), mov_elo.tolist(), games_played.tolist())
+        )
+
+    return starts, rows
+
+
+async def get_rating_data(client: AsyncIOMotorClient, *queries):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    rating_data = [
+        doc
+        async for doc in engine.find(
+            MLRatingTransform, *queries, sort=MLRatingTransform.season
         )
     ]
-    # if no chart data is found, rerun pipeline for all cached charts,
-    # then query again
-    if not chart_data:
-        await transform_pipeline(client, run_all=True)
-        chart_data = [
-            chart
-            async for chart in engine.find(
-                MLBoxplotTransform,
-                MLBoxplotTransform.season == season,
+    # replay everything if the series is missing or NickName has grown since
+    if not rating_data or any(doc.nick_names != NICK_NAMES for doc in rating_data):
+        await rating_transform(client)
+        rating_data = [
+            doc
+            async for doc in engine.find(
+                MLRatingTransform, *queries, sort=MLRatingTransform.season
             )
         ]
-    return chart_data[0]
+    return rating_data
 
 
-@ml_api.get("/{season}/table/{playoff}", response_model=MLTableTransform)
+async def rating_transform(client: AsyncIOMotorClient, season=None, week=None):
+    # replay the ratings from the first game on or after (season, week).
+    # everything before that is read back from the stored series.
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    old_rating_data = {
+        doc.season: doc
+        async for doc in engine.find(MLRatingTransform, sort=MLRatingTransform.season)
+    }
+    if any(doc.nick_names != NICK_NAMES for doc in old_rating_data.values()):
+        season = None
+
+    state = {}
+    kept = {}
+    if season is not None:
+        season_data = old_rating_data.get(season)
+        earlier_data = [doc for doc in old_rating_data.values() if doc.season < season]
+        if season_data is not None:
+            # keep the weeks before the replay and pick up where they leave off
+            n_kept = sum(1 for kept_week in season_data.weeks if kept_week < week)
+            kept = {
+                "weeks": season_data.weeks[:n_kept],
+                "start_elo": season_data.start_elo,
+                "start_mov_elo": season_data.start_mov_elo,
+                "elo": season_data.elo[:n_kept],
+                "mov_elo": season_data.mov_elo[:n_kept],
+                "games_played": season_data.games_played[:n_kept],
+            }
+            if n_kept:
+                state = {
+                    "elo": season_data.elo[n_kept - 1],
+                    "mov_elo": season_data.mov_elo[n_kept - 1],
+                    "games_played": season_data.games_played[n_kept - 1],
+                }
+            else:
+                state = {
+                    "elo": season_data.start_elo,
+                    "mov_elo": season_data.start_mov_elo,
+                    "games_played": [0] * len(NICK_NAMES),
+                }
+            state["season"] = season
+        elif earlier_data:
+            # first games of a new season, start from the last one's final week
+            state = {
+                "season": earlier_data[-1].season,
+                "elo": earlier_data[-1].elo[-1],
+                "mov_elo": earlier_data[-1].mov_elo[-1],
+                "games_played": earlier_data[-1].games_played[-1],
+            }
+            week = 0
+        else:
+            season = None
+
+    if season is None:
+        games_match = {}
+    else:
+        games_match = {
+            "$or": [
+                {"season": {"$gt": int(season)}},
+                {"season": int(season), "week_s": {"$gte": week}},
+            ]
+        }
+    games_df = await find_frame(
+        client,
+        ML_DATABASE,
+        MLGame,
+        games_match,
+        ["season", "week_s", "week_e", "a_nick", "a_score", "h_nick", "h_score"],
+    )
+    starts, rows = rating_rows(games_df, **state)
+
+    # stitch the replayed rows onto whatever was kept
+    new_rating_data = {}
+    if kept:
+        new_rating_data[season] = kept
+    for start_season, (start_elo, start_mov_elo) in starts.items():
+        new_rating_data[start_season] = {
+            "weeks": [],
+            "start_elo": start_elo,
+            "start_mov_elo": start_mov_elo,
+            "elo": [],
+            "mov_elo": [],
+            "games_played": [],
+        }
+    for row_season, row_week, row_elo, row_mov_elo, row_games_played in rows:
+        season_rows = new_rating_data[row_season]
+        season_rows["weeks"] = season_rows["weeks"] + [row_week]
+        season_rows["elo"] = season_rows["elo"] + [row_elo]
+        season_rows["mov_elo"] = season_rows["mov_elo"] + [row_mov_elo]
+        season_rows["games_played"] = season_rows["games_played"] + [row_games_played]
+
+    # seasons after the replay point that no longer have any games
+    new_rating_data = {
+        new_season: season_rows
+        for new_season, season_rows in new_rating_data.items()
+        if season_rows["weeks"]
+    }
+    message_array = []
+    for old_season, doc in old_rating_data.items():
+        replayed = season is None or old_season >= season
+        if replayed and old_season not in new_rating_data:
+            await engine.delete(doc)
+            message_array.append("Delete complete! Collection: " + str(old_season))
+    for new_season, season_rows in new_rating_data.items():
+        # season is the primary key, so save() replaces the old series
+        await engine.save(
+            MLRatingTransform(
+                season=new_season, nick_names=NICK_NAMES, **season_rows
+            )
+        )
+        message_array.append("Insert complete! Collection: " + str(new_season))
+
+    return message_array
+
+
+@ml_api.get("/{season}/boxplot")
+async def season_boxplot_fig(
+    season: MLSeason,
+    request: Request,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    match = {"season": int(season)}
+    chart_data = await find_payload(client, MLBoxplotTransform, match)
+    # if the chart is missing or older than the season's games and teams,
+    # rebuild just this season, then query again
+    if built_version(chart_data) != (await get_versions(client, [season]))[season]:
+        await season_transforms(client, [(season, MLPlayoff.REGULAR)])
+        chart_data = await find_payload(client, MLBoxplotTransform, match)
+    if chart_data is None:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    return payload_response(request, chart_data, season)
+
+
+@ml_api.get("/{season}/table/{playoff}")
 async def season_table(
     season: MLSeason,
     playoff: MLPlayoff,
+    request: Request,
     client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    table_data = [
-        table
-        async for table in engine.find(
-            MLTableTransform,
-            MLTableTransform.season == season,
-            MLTableTransform.playoff == playoff,
-        )
+    match = {"season": int(season), "playoff": int(playoff)}
+    table_data = await find_payload(client, MLTableTransform, match)
+    if built_version(table_data) != (await get_versions(client, [season]))[season]:
+        await season_transforms(client, [(season, playoff)])
+        table_data = await find_payload(client, MLTableTransform, match)
+    if table_data is None:
+        raise HTTPException(status_code=404, detail="No data found!")
+
+    return payload_response(request, table_data, season, playoff)
+
+
+async def find_payload(client: AsyncIOMotorClient, model, match: Dict):
+    # raw read, the payload is never decoded on the way out
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    return await engine.get_collection(model).find_one(
+        dict(match, payload={"$exists": True}), {"version": 1, "payload": 1}
+    )
+
+
+def payload_response(request: Request, doc: Dict, *keys):
+    """Send a stored payload with its slice and version as the ETag,
+    or a 304 if the client already has that version."""
+    etag = f'"{version_etag(built_version(doc), *keys)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONBytesResponse(content=doc["payload"], headers={"ETag": etag})
+
+
+@ml_api.get("/batch")
+async def batch_transforms(
+    seasons: str,
+    playoff: str = "0,1,2",
+    boxplot: bool = True,
+    client: AsyncIOMotorClient = Depends(get_odm),
+):
+    """Season tables (and boxplots) for several slices at once.
+
+    seasons and playoff are comma separated. Every requested table comes
+    back from one $in query, keyed by season then playoff, and the whole
+    response is serialized once. Slices with no games are empty tables.
+    """
+    seasons = batch_values(seasons, MLSeason)
+    playoffs = batch_values(playoff, MLPlayoff)
+    versions = await get_versions(client, seasons)
+    tables, boxplots = await batch_find(client, seasons, playoffs, boxplot)
+    # same fallback as the single slice endpoints: rebuild anything
+    # missing or stale, then query again
+    stale_combos = [
+        (season, playoff)
+        for season, playoff in product(seasons, playoffs)
+        if built_version(tables.get(str(season), {}).get(str(playoff)))
+        != versions[season]
+        or (boxplot and built_version(boxplots.get(str(season))) != versions[season])
     ]
-    if not table_data:
-        await transform_pipeline(client, run_all=True)
-        table_data = [
-            table
-            async for table in engine.find(
-                MLTableTransform,
-                MLTableTransform.season == season,
-                MLTableTransform.playoff == playoff,
-            )
-        ]
-    return table_data[0]
+    if stale_combos:
+        await season_transforms(client, stale_combos)
+        tables, boxplots = await batch_find(client, seasons, playoffs, boxplot)
+    if not tables:
+        raise HTTPException(status_code=404, detail="No data found!")
 
+    # splice the stored payloads together, none of them are decoded
+    content = {
+        "tables": {
+            season: {playoff: doc["payload"] for playoff, doc in playoffs.items()}
+            for season, playoffs in tables.items()
+        }
+    }
+    if boxplot:
+        content["boxplots"] = {
+            season: doc["payload"] for season, doc in boxplots.items()
+        }
+    return JSONBytesResponse(content=json_object(content))
+
+
+def batch_values(values: str, enum):
+    """Comma separated query parameter to a sorted list of unique enum
+    values. Anything that isn't a member is a 404 like the path params."""
+    try:
+        members = {enum(int(value)) for value in values.split(",")}
+    except ValueError:
+        raise HTTPException(status_code=404, detail="No data found!")
+    return sorted(member.value for member in members)
 
-async def transform_pipeline(client: AsyncIOMotorClient, doc_list=None, run_all=False):
-    # set up data arrays
-    season_games_data_array = []
-    season_teams_data_array = []
-    season_games_subset_data_array = []
-    boxplot_message_array = []
-    ranking_message_array = []
 
-    if doc_list:
+def built_version(doc: Optional[Dict]):
+    # None if the slice is missing, or from before stored payloads.
+    # slices with no games are stored with an empty payload, so they
+    # get a version like the rest and aren't rebuilt on every read.
+    if doc is None or "payload" not in doc:
+        return None
+    return doc.get("version", 0)
+
+
+async def batch_find(
+    client: AsyncIOMotorClient, seasons: List[int], playoffs: List[int], boxplot=True
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    tables = {}
+    cursor = engine.get_collection(MLTableTransform).find(
+        {
+            "season": {"$in": seasons},
+            "playoff": {"$in": playoffs},
+            "payload": {"$exists": True},
+        },
+        {"_id": 0},
+    )
+    async for doc in cursor:
+        tables.setdefault(str(doc["season"]), {})[str(doc["playoff"])] = doc
+    boxplots = {}
+    if boxplot:
+        cursor = engine.get_collection(MLBoxplotTransform).find(
+            {"season": {"$in": seasons}, "payload": {"$exists": True}}, {"_id": 0}
+        )
+        async for doc in cursor:
+            boxplots[str(doc["season"])] = doc
+    return tables, boxplots
+
+
+async def transform_pipeline(
+    client: AsyncIOMotorClient, doc_list=None, run_all=False, removed_list=None
+):
+    if doc_list or removed_list:
+        # doc_list games were written, removed_list games are gone
+        # (deleted, or the old version of an edit)
+        changed_list = (doc_list or []) + (removed_list or [])
+        await bump_versions(client, [doc.season for doc in changed_list])
         season_playoff_combos = list(
-            set([(doc.dict()["season"], doc.dict()["playoff"]) for doc in doc_list])
+            set([(doc.dict()["season"], doc.dict()["playoff"]) for doc in changed_list])
         )
+        # game writes only touch the heatmap and the win totals for
+        # their own playoff types. the ranking figure only reads teams.
+        figure_ids = ["heatmap"] + sorted(
+            set([f"wins{int(doc.dict()['playoff'])}" for doc in changed_list])
+        )
+        # H2H cells are bumped in place, before the tables read them
+        h2h_message_array = await h2h_update(client, doc_list, removed_list)
+        score_message_array = await score_update(client, doc_list, removed_list)
+        # ratings only need replaying from the earliest week that changed
+        first_game = min(changed_list, key=lambda doc: (doc.season, doc.week_s))
+        rating_message_array = await rating_transform(
+            client, first_game.season, first_game.week_s
+        )
+        figure_ids.append("ratings")
     elif run_all:
         all_seasons = [member for name, member in MLSeason.__members__.items()]
         all_playoffs = [member for name, member in MLPlayoff.__members__.items()]
         season_playoff_combos = list(product(all_seasons, all_playoffs))
+        figure_ids = ALL_TIME_FIGURES
+        h2h_message_array = await h2h_transform(client, season_playoff_combos)
+        score_message_array = await score_transform(client, all_seasons)
+        rating_message_array = await rating_transform(client)
     else:
         raise Exception("Something weird happened with the pipeline...")
 
-    for combo in season_playoff_combos:
-        season_games_data_array.append(await get_season_games(combo[0], client))
-        season_teams_data_array.append(await get_season_teams(combo[0], client))
-        season_games_subset_data_array.append(
-            await get_season_games_subset(combo[0], combo[1], client)
+    boxplot_message_array, ranking_message_array = await season_transforms(
+        client, season_playoff_combos
+    )
+
+    figure_message_array = await all_time_figure_transform(client, figure_ids)
+    # playoff odds are rerun on the next request
+    sim_message_array = await season_sim_reset(
+        client, sorted(set([combo[0] for combo in season_playoff_combos]))
+    )
+
+    return {
+        "boxplot_message": boxplot_message_array,
+        "ranking_message": ranking_message_array,
+        "figure_message": figure_message_array,
+        "sim_message": sim_message_array,
+        "h2h_message": h2h_message_array,
+        "score_message": score_message_array,
+        "rating_message": rating_message_array,
+    }
+
+
+async def season_transforms(client: AsyncIOMotorClient, season_playoff_combos):
+    """Rebuild the boxplots and tables of season_playoff_combos that were
+    built from an older version of their season. Fresh slices are skipped
+    before any games are read."""
+    seasons = sorted(set([int(season) for season, playoff in season_playoff_combos]))
+    versions = await get_versions(client, seasons)
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    # slices from before stored payloads don't count
+    built = {"season": {"$in": seasons}, "payload": {"$exists": True}}
+    boxplot_versions = {
+        doc["season"]: doc.get("version", 0)
+        async for doc in engine.get_collection(MLBoxplotTransform).find(
+            built, {"season": 1, "version": 1}
+        )
+    }
+    table_versions = {
+        (doc["season"], doc["playoff"]): doc.get("version", 0)
+        async for doc in engine.get_collection(MLTableTransform).find(
+            built, {"season": 1, "playoff": 1, "version": 1}
         )
+    }
 
-    for i, dataset in enumerate(season_teams_data_array):
-        boxplot_message = await season_boxplot_transform(
-            season_playoff_combos[i][0],
-            season_games_data_array[i],
-            season_teams_data_array[i],
+    boxplot_message_array = []
+    ranking_message_array = []
+    for season in seasons:
+        version = versions[season]
+        playoffs = sorted(
+            set(
+                [
+                    int(playoff)
+                    for combo_season, playoff in season_playoff_combos
+                    if combo_season == season
+                ]
+            )
+        )
+        stale_playoffs = [
+            playoff
+            for playoff in playoffs
+            if table_versions.get((season, playoff)) != version
+        ]
+        fresh_message = (
+            "Collection is up to date! Version: " + str(version) + " Collection: "
+        )
+        ranking_message_array += [
+            fresh_message + str(season) + str(playoff)
+            for playoff in playoffs
+            if playoff not in stale_playoffs
+        ]
+        boxplot_stale = boxplot_versions.get(season) != version
+        if not boxplot_stale:
+            boxplot_message_array.append(fresh_message + str(season))
+        if not boxplot_stale and not stale_playoffs:
+            continue
+
+        # raw frames, sorted like the season endpoints
+        teams_df = await find_frame(
             client,
+            ML_DATABASE,
+            MLTeam,
+            {"season": season},
+            sort=[("_id", ASCENDING)],
         )
-        boxplot_message_array.append(boxplot_message)
-
-        ranking_message = await season_table_transform(
-            season_playoff_combos[i][0],
-            season_playoff_combos[i][1],
-            season_games_subset_data_array[i],
-            season_teams_data_array[i],
+        games_df = await find_frame(
             client,
+            ML_DATABASE,
+            MLGame,
+            {"season": season},
+            sort=[("_id", ASCENDING)],
         )
-        ranking_message_array.append(ranking_message)
+        # a season with no games or teams yet, or a playoff type with no
+        # games, still gets an empty slice stored at the current version.
+        # games can't be placed without their teams, so those count as none.
+        if teams_df.empty:
+            games_df = games_df.iloc[:0]
+        if boxplot_stale:
+            boxplot_message = await season_boxplot_transform(
+                MLSeason(season), games_df, teams_df, version, client
+            )
+            boxplot_message_array.append(boxplot_message)
+        for playoff in stale_playoffs:
+            games_subset_df = games_df.loc[games_df["playoff"] == playoff]
+            ranking_message = await season_table_transform(
+                MLSeason(season),
+                MLPlayoff(playoff),
+                games_subset_df.reset_index(drop=True),
+                teams_df,
+                version,
+                client,
+            )
+            ranking_message_array.append(ranking_message)
+
+    return boxplot_message_array, ranking_message_array
+
+
+async def bump_versions(client: AsyncIOMotorClient, seasons):
+    """Bump the source-data version of each season. Every game or team
+    write goes through here, so a slice stamped with an older version is
+    stale."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(MLSeasonVersion)
+    for season in sorted(set([int(season) for season in seasons])):
+        await collection.update_one(
+            {"_id": season}, {"$inc": {"version": 1}}, upsert=True
+        )
+
+
+async def get_versions(client: AsyncIOMotorClient, seasons) -> Dict[int, int]:
+    """Current source-data version of each season. Seasons that have never
+    been written since versioning started are at 0."""
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    versions = {int(season): 0 for season in seasons}
+    async for doc in engine.get_collection(MLSeasonVersion).find(
+        {"_id": {"$in": list(versions)}}
+    ):
+        versions[doc["_id"]] = doc["version"]
+    return versions
 
-    return {
-        "boxplot_message": boxplot_message_array,
-        "ranking_message": ranking_message_array,
-    }
+
+def version_etag(version: int, *slice_keys):
+    return "-".join([str(int(key)) for key in slice_keys] + [f"v{version}"])
 
 
 async def season_boxplot_transform(
     season: MLSeason,
-    season_games_data: List[MLGame],
-    season_teams_data: List[MLTeam],
+    season_df: pandas.DataFrame,
+    teams_df: pandas.DataFrame,
+    version: int,
     client: AsyncIOMotorClient,
 ):
-    # convert to DataFrame
-    season_df = pandas.DataFrame([game.doc() for game in season_games_data])
+    season_df = season_df.copy()
     # normalized score columns for two-week playoff games
     season_df["a_score_norm"] = season_df["a_score"] / (
         season_df["week_e"] - season_df["week_s"] + 1
@@ -976,7 +2679,7 @@ async def season_boxplot_transform(
     score_df = pandas.concat([score_df_for, score_df_against])
     # let's sort by playoff rank instead
     # read season file, but we only need nick_name, season, and playoff_rank
-    ranking_df = pandas.DataFrame([team.doc() for team in season_teams_data])[["nick_name", "playoff_rank"]]
+    ranking_df = teams_df[["nick_name", "playoff_rank"]]
     # merge this (filtered by season) into score_df so we can sort values
     score_df = score_df.merge(
         ranking_df,
@@ -1012,57 +2715,109 @@ async def season_boxplot_transform(
     # list of hex color codes
     color_data = px.colors.qualitative.Light24
 
-    # convert to json for writing to Mongo
+    # encode the response body once, it's stored and sent as is
     new_chart_data = MLBoxplotTransform(
         season=season,
-        for_data={
-            "x_data": x_data_for,
-            "y_data": y_data_for,
-            "color_data": color_data,
-        },
-        against_data={
-            "x_data": x_data_against,
-            "y_data": y_data_against,
-            "color_data": color_data,
-        },
+        version=version,
+        payload=orjson.dumps(
+            {
+                "season": int(season),
+                "version": version,
+                "for_data": {
+                    "x_data": x_data_for,
+                    "y_data": y_data_for,
+                    "color_data": color_data,
+                },
+                "against_data": {
+                    "x_data": x_data_against,
+                    "y_data": y_data_against,
+                    "color_data": color_data,
+                },
+            }
+        ),
     )
 
     # write data to MongoDB
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    old_chart_data = [
-        chart
-        async for chart in engine.find(
-            MLBoxplotTransform,
-            MLBoxplotTransform.season == season,
-        )
-    ]
-    if old_chart_data == [new_chart_data]:
-        message = (
-            "Collection is already synced! Collection: " + str(new_chart_data.season)
-        )
+    return await save_payload(
+        client, new_chart_data, {"season": int(season)}, str(season)
+    )
+
+
+async def save_payload(client: AsyncIOMotorClient, new_data, match: Dict, name: str):
+    # raw reads and deletes, so slices from before stored payloads
+    # don't have to parse as the current model
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    collection = engine.get_collection(type(new_data))
+    old_data = await collection.find_one(match, {"payload": 1})
+    if old_data is not None and old_data.get("payload") == new_data.payload:
+        message = "Collection is already synced! Collection: " + name
     else:
-        # if boxplots need to be recalculated, just wipe the collection and reinsert
-        for chart in old_chart_data:
-            await engine.delete(chart)
-        await engine.save(new_chart_data)
-        message = (
-            "Bulk delete and insert complete! Collection: " + str(new_chart_data.season)
-        )
+        # if the slice needs to be recalculated, just wipe it and reinsert
+        await collection.delete_many(match)
+        await engine.save(new_data)
+        message = "Bulk delete and insert complete! Collection: " + name
 
     return message
 
 
+def seeded_table(games_df, teams_df, h2h_data: MLH2HTransform = None):
+    """Regular season records with division ranks and playoff seeds.
+    The H2H matrices come from the season's materialized slice if there
+    is one, otherwise they're built from the games."""
+    # to resolve tiebreakers, need records for the season
+    # and the H2H matrices between every team
+    store = MLGameStore(games_df, teams_df)
+    season_records_df = store.calc_records()
+    nick_names = season_records_df.index.get_level_values("nick_name")
+    # line the matrices up with the rows of the records table
+    if h2h_data is None:
+        h2h_wins, h2h_games = store.h2h()
+        team_ids = numpy.searchsorted(store.nicks, nick_names)
+    else:
+        h2h_wins = numpy.array(h2h_data.wins) + numpy.array(h2h_data.ties) * 0.5
+        h2h_games = numpy.array(h2h_data.games)
+        team_ids = [NICK_INDEX[nick] for nick in nick_names]
+    division_ids = numpy.searchsorted(
+        store.divisions, season_records_df.index.get_level_values("division")
+    )
+    # seed_teams works on a batch of seasons, this is a batch of one
+    division_rank, playoff_seed = seed_teams(
+        division_ids,
+        season_records_df["win_pct"].to_numpy(dtype=float)[None],
+        season_records_df["points_for"].to_numpy(dtype=float)[None],
+        season_records_df["points_against"].to_numpy(dtype=float)[None],
+        h2h_wins[numpy.ix_(team_ids, team_ids)][None],
+        h2h_games[numpy.ix_(team_ids, team_ids)][None],
+    )
+    division_rank, playoff_seed = division_rank[0], playoff_seed[0]
+    season_records_df["division_rank"] = division_rank
+    season_records_df["playoff_seed"] = playoff_seed
+
+    # division winners first, then everyone else, ordered by seed
+    return pandas.concat(
+        [
+            season_records_df.loc[division_rank == 1],
+            season_records_df.loc[division_rank > 1],
+        ]
+    ).sort_values(by="playoff_seed")
+
+
 async def season_table_transform(
     season: MLSeason,
     playoff: MLPlayoff,
-    season_games_subset_data: List[MLGame],
-    season_teams_data: List[MLTeam],
+    games_df: pandas.DataFrame,
+    teams_df: pandas.DataFrame,
+    version: int,
     client: AsyncIOMotorClient,
 ):
-    # convert to pandas DataFrame and normalize
-    games_df = MLTable([game.doc() for game in season_games_subset_data])
-    teams_df = pandas.DataFrame([team.doc() for team in season_teams_data]).set_index("_id")
-    if playoff > 0:
+    # normalize
+    games_df = MLTable(games_df)
+    teams_df = teams_df.set_index("_id")
+    if games_df.empty or teams_df.empty:
+        # nothing played in this slice (yet). the empty table is still
+        # stored at the current version, so it isn't rebuilt on every read.
+        table_json = orjson.dumps({"columns": [], "data": []})
+    elif playoff > 0:
         if playoff == 2:
             # for loser's bracket, sort by games played ascending first,
             # so teams from winner's bracket end up at the top. then sort by
@@ -1076,7 +2831,7 @@ async def season_table_transform(
             by_list = ["playoff_rank", "games_played", "win_pct"]
             ascend_list = [True, False, False]
         # run calc records for the playoff season
-        season_table = games_df.calc_records(teams_df.copy())
+        season_table = games_df.calc_records(teams_df)
         # merge playoff ranking
         season_table = (
             season_table.merge(
@@ -1092,538 +2847,382 @@ async def season_table_transform(
             .set_index(["division", "nick_name"])
             .reset_index()
         )
-        new_table_data = json.loads(season_table.to_json(orient="split", index=False))
+        table_json = season_table.to_json(orient="split", index=False)
     else:
-        # to resolve tiebreakers, need records for the season
-        season_records_df = games_df.calc_records(teams_df.copy())
-        # also bring in H2H matchup records
-        matchup_df = games_df.calc_matchup_records(teams_df.copy())
-
-        # initial division ranking before tiebreakers.
-        season_records_df["division_rank"] = season_records_df.groupby(
-            level=["division"],
-        )["win_pct"].rank(
-            method="min",
-            ascending=False,
-        )
-
-        # begin loop to resolve division ties.
-        for div in season_records_df.index.unique(level="division"):
-            # filter down to the division of interest.
-            div_df = season_records_df.loc[[div]]
-            # let's calculate division record here
-            div_matchups = list(
-                permutations(div_df.index.get_level_values("nick_name"), 2)
-            )
-            # group by winner to determine H2H among the group
-            div_matchup_df = (
-                matchup_df.loc[div_matchups]
-                .groupby(level="nick_name")
-                .agg({"win_total": sum, "game_total": sum})
-            )
-            # win_pct in the divisional grouping, then join back to div_df
-            div_matchup_df["win_pct_div"] = (
-                div_matchup_df["win_total"] / div_matchup_df["game_total"]
-            )
-            div_df = div_df.join(div_matchup_df[["win_pct_div"]])
-            # loop over division_rank to determine where ties need to be broken.
-            for rank in div_df.division_rank.unique():
-                # if the length of the df is longer than 1 for any rank, there's a tie...
-                tied_df = div_df.loc[div_df.division_rank == rank]
-                if len(tied_df) > 1:
-                    untied_df = division_tiebreaker_one(tied_df, matchup_df)
-                    div_df.update(untied_df)
-            season_records_df.update(div_df)
-
-        # begin to determine playoff seed. first, separate the three division winners.
-        div_winners_df = season_records_df.loc[season_records_df.division_rank == 1]
-        div_losers_df = season_records_df.loc[season_records_df.division_rank > 1]
-        # calculate initial seeding based on pure win_pct.
-        div_winners_df["playoff_seed"] = div_winners_df.win_pct.rank(
-            method="min",
-            ascending=False,
-        )
-        div_losers_df["playoff_seed"] = (
-            div_losers_df.win_pct.rank(
-                method="min",
-                ascending=False,
-            )
-            + len(div_winners_df)
-        )
-
-        # now, tiebreakers...winners first
-        for seed in range(1, len(div_winners_df)):
-            # if the length of the df is longer than 1 for any rank, there's a tie...
-            tied_df = div_winners_df.loc[div_winners_df.playoff_seed == seed]
-            if len(tied_df) > 1:
-                untied_df = wild_card_tiebreaker_one(tied_df, games_df, matchup_df)
-                div_winners_df.update(untied_df)
-
-        # break the rest of the ties for division losers.
-        for seed in range(len(div_winners_df) + 1, len(season_records_df)):
-            # if the length of the df is longer than 1 for any rank, there's a tie...
-            tied_df = div_losers_df.loc[div_losers_df.playoff_seed == seed]
-            if len(tied_df) > 1:
-                untied_df = wild_card_tiebreaker_one(tied_df, games_df, matchup_df)
-                div_losers_df.update(untied_df)
-
-        season_table = pandas.concat([div_winners_df, div_losers_df]).sort_values(
-            by="playoff_seed"
-        )
-
-        new_table_data = json.loads(
-            season_table.reset_index().to_json(orient="split", index=False)
+        h2h_data = await get_h2h_data(
+            client, MLH2HTransform.h2h_id == h2h_id(season, playoff)
         )
+        season_table = seeded_table(games_df, teams_df, h2h_data[0])
+        table_json = season_table.reset_index().to_json(orient="split", index=False)
 
-    # set missing elements in table data for mongo
+    # pandas already wrote the JSON. the slice fields go on the front of it
+    # and the whole thing is stored as the response body.
     new_table_data = MLTableTransform(
         season=season,
         playoff=playoff,
-        columns=new_table_data['columns'],
-        data=new_table_data['data'],
+        version=version,
+        payload=extend_json_object(
+            {"season": int(season), "playoff": int(playoff), "version": version},
+            table_json,
+        ),
     )
 
     # write data to MongoDB
-    engine = AIOEngine(motor_client=client, database="mildredleague")
-    old_table_data = [
-        table
-        async for table in engine.find(
-            MLTableTransform,
-            MLTableTransform.season == season,
-            MLTableTransform.playoff == playoff,
-        )
-    ]
-    if old_table_data == [new_table_data]:
-        message = (
-            "Collection is already synced! Collection: " + str(new_table_data.season) + str(new_table_data.playoff)
-        )
-    else:
-        # if tables need to be recalculated, just wipe the collection and reinsert
-        for table in old_table_data:
-            await engine.delete(table)
-        await engine.save(new_table_data)
-        message = (
-            "Bulk delete and insert complete! Collection: " + str(new_table_data.season) + str(new_table_data.playoff)
-        )
-
-    return message
+    return await save_payload(
+        client,
+        new_table_data,
+        {"season": int(season), "playoff": int(playoff)},
+        str(season) + str(playoff),
+    )
 
 
-@ml_api.get("/{season}/sim")
+@ml_api.get("/{season}/sim", response_model=MLSimTransform)
 async def seed_sim(
     season: MLSeason,
-    games_data: List[MLGame] = Depends(get_season_games),
-    winners_array=["t1", "t2", "t3", "t4", "t5", "t6", "t7"],
+    client: AsyncIOMotorClient = Depends(get_odm),
 ):
-    # this function will need to be reimplemented next year!
-    # return garbage for now.
-    return winners_array
-    # convert to dataframe
-    games_df = pandas.DataFrame(games_data).set_index("_id")
-
-    # we're going to concatenate the API data with simulated data
-    # that the user has chosen, so we can rerun tiebreakers
-    sim_df = pandas.DataFrame(
-        data=[
-            [
-                "Division 6",
-                "Referees",
-                "AFC East",
-                "Division 6",
-                "Referees",
-                "AFC East",
-                "Referees",
-            ],
-            ["sim" for i in range(0, 7)],
-            [
-                "Tarpey",
-                "Charles",
-                "Conti",
-                "Frank",
-                "mballen",
-                "Jake",
-                "Brad",
-            ],
-            [
-                winners_array.count("Tarpey") * 20 + 80,
-                winners_array.count("Charles") * 20 + 80,
-                winners_array.count("Conti") * 20 + 80,
-                winners_array.count("Frank") * 20 + 80,
-                winners_array.count("mballen") * 20 + 80,
-                winners_array.count("Jake") * 20 + 80,
-                winners_array.count("Brad") * 20 + 80,
-            ],
-            ["sim" for i in range(0, 7)],
-            [
-                "Division 6",
-                "Referees",
-                "AFC East",
-                "Division 6",
-                "AFC East",
-                "AFC East",
-                "Referees",
-            ],
-            ["sim" for i in range(0, 7)],
-            [
-                "Brando",
-                "Mildred",
-                "Samik",
-                "Fonti",
-                "Sendzik",
-                "Kindy",
-                "Tommy",
-            ],
-            [
-                winners_array.count("Brando") * 20 + 80,
-                winners_array.count("Mildred") * 20 + 80,
-                winners_array.count("Samik") * 20 + 80,
-                winners_array.count("Fonti") * 20 + 80,
-                winners_array.count("Sendzik") * 20 + 80,
-                winners_array.count("Kindy") * 20 + 80,
-                winners_array.count("Tommy") * 20 + 80,
-            ],
-            ["sim" for i in range(0, 7)],
-            [0 for i in range(0, 7)],
-            [2020 for i in range(0, 7)],
-            [14 for i in range(0, 7)],
-            [14 for i in range(0, 7)],
-        ]
-    ).transpose()
-    sim_df.columns = games_df.columns.tolist()
-    sim_df = pandas.concat([games_df, sim_df], ignore_index=True)
-
-    # table = season_table_active(season, sim_df)[[
-    #     'division',
-    #     'nick_name',
-    #     'win_total',
-    #     'loss_total',
-    #     'tie_total',
-    #     'division_rank',
-    #     'playoff_seed',
-    # ]]
-
-    return None
-
-
-def division_tiebreaker_one(tied_df, matchup_df):
-    # figure out who's got H2H among the 2+ teams by generating all possible matchups
-    matchups = list(permutations(tied_df.index.get_level_values("nick_name"), 2))
-    # group by winner to determine H2H among the group
-    matchup_df = (
-        matchup_df.loc[matchups]
-        .groupby(level="nick_name")
-        .agg({"win_total": sum, "game_total": sum})
-    )
-    # win_pct in this H2H grouping
-    matchup_df["win_pct_h2h"] = matchup_df["win_total"] / matchup_df["game_total"]
-    matchup_df["tiebreaker_rank"] = (
-        matchup_df.win_pct_h2h.rank(
-            method="min",
-            ascending=False,
-        )
-        - 1
-    )
-
-    # recalculate div rank now
-    tied_df = tied_df.join(matchup_df[["tiebreaker_rank"]])
-    tied_df["division_rank"] = tied_df["division_rank"] + tied_df["tiebreaker_rank"]
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    sim_data = await engine.find_one(MLSimTransform, MLSimTransform.season == season)
+    # odds are cached until the next game write wipes them
+    if sim_data is None or sim_data.n_sims != SIM_COUNT:
+        sim_data = await season_sim_transform(season, SIM_COUNT, client)
+    return sim_data
 
-    # check time! are we still tied or is it broken?
-    for rank in tied_df.division_rank.unique():
-        # if the length of the df is longer than 1 for any rank, there's a tie...
-        # proceed to tiebreaker #2, which is division record.
-        still_tied_df = tied_df.loc[tied_df.division_rank == rank]
-        if len(still_tied_df) > 1:
-            untied_df = division_tiebreaker_two(still_tied_df)
-            tied_df.update(untied_df)
 
-    return tied_df
+@ml_api.post("/{season}/sim", response_model=MLSimTransform)
+async def custom_seed_sim(
+    season: MLSeason,
+    n_sims: int = Query(SIM_COUNT, ge=1, le=100000),
+    client: AsyncIOMotorClient = Depends(get_odm),
+    user: UserOut = Depends(oauth2_scheme),
+):
+    # a fresh run with any sim count. only a SIM_COUNT run is cached
+    return await season_sim_transform(season, n_sims, client)
 
 
-def division_tiebreaker_two(tied_df):
-    # rank based on win_pct_div
-    tied_df["tiebreaker_two_rank"] = (
-        tied_df.win_pct_div.rank(
-            method="min",
-            ascending=False,
-        )
-        - 1
+async def season_sim_transform(
+    season: MLSeason,
+    n_sims: int,
+    client: AsyncIOMotorClient,
+):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    # every game is needed for each team's score history
+    games_df = await find_frame(client, ML_DATABASE, MLGame)
+    teams_df = await find_frame(
+        client, ML_DATABASE, MLTeam, {"season": int(season)}
     )
-
-    # recalculate div rank now
-    tied_df["division_rank"] = tied_df["division_rank"] + tied_df["tiebreaker_two_rank"]
-
-    # check time! are we still tied or is it broken?
-    for rank in tied_df.division_rank.unique():
-        # if the length of the df is longer than 1 for any rank, there's a tie...
-        # proceed to tiebreaker #3, which is points for.
-        still_tied_df = tied_df.loc[tied_df.division_rank == rank]
-        if len(still_tied_df) > 1:
-            untied_df = division_tiebreaker_three(still_tied_df)
-            tied_df.update(untied_df)
-
-    return tied_df
-
-
-def division_tiebreaker_three(tied_df):
-    # rank based on points for
-    tied_df["tiebreaker_three_rank"] = (
-        tied_df.points_for.rank(
-            method="min",
-            ascending=False,
-        )
-        - 1
+    if teams_df.empty:
+        raise HTTPException(status_code=404, detail="No data found!")
+    # thousands of tiebreakers take a second or two, keep them off the event loop
+    odds_df = await run_in_threadpool(
+        simulate_season, MLGameStore(games_df, teams_df), season, n_sims
     )
-
-    # recalculate div rank now
-    tied_df["division_rank"] = (
-        tied_df["division_rank"] + tied_df["tiebreaker_three_rank"]
+    sim_data = MLSimTransform(
+        season=season,
+        n_sims=n_sims,
+        **json.loads(odds_df.reset_index().to_json(orient="split", index=False)),
     )
-
-    # check time! are we still tied or is it broken?
-    for rank in tied_df.division_rank.unique():
-        # if the length of the df is longer than 1 for any rank, there's a tie...
-        # proceed to tiebreaker #4, which is points against
-        still_tied_df = tied_df.loc[tied_df.division_rank == rank]
-        if len(still_tied_df) > 1:
-            untied_df = division_tiebreaker_four(still_tied_df)
-            tied_df.update(untied_df)
-
-    return tied_df
-
-
-def division_tiebreaker_four(tied_df):
-    # rank based on points against
-    tied_df["tiebreaker_four_rank"] = (
-        tied_df.points_against.rank(
-            method="min",
-            ascending=False,
+    # the GET only serves SIM_COUNT odds, so other counts don't replace them
+    if n_sims == SIM_COUNT:
+        await engine.save(sim_data)
+    return sim_data
+
+
+async def season_sim_reset(client: AsyncIOMotorClient, seasons):
+    engine = AIOEngine(motor_client=client, database=ML_DATABASE)
+    message_array = []
+    for season in seasons:
+        sim_data = await engine.find_one(
+            MLSimTransform, MLSimTransform.season == season
         )
-        - 1
+        if sim_data is None:
+            message = "Collection is already synced! Collection: " + str(season)
+        else:
+            await engine.delete(sim_data)
+            message = "Delete complete! Collection: " + str(season)
+        message_array.append(message)
+
+    return message_array
+
+
+def simulate_season(store: MLGameStore, season: MLSeason, n_sims: int, rng=None):
+    """Playoff odds for a regular season by Monte Carlo.
+
+    Scheduled games are entered with a 0-0 score. Each sim draws both
+    sides' scores from the team's history of normalized weekly scores,
+    then seeds the season with the usual tiebreakers. Returns each
+    team's chance of winning its division and of every playoff seed.
+    """
+    if rng is None:
+        rng = numpy.random.default_rng()
+    season_idx = numpy.searchsorted(store.seasons, season)
+    season_mask = store.mask(season, 0)
+    # a game against a team with no record that season doesn't count
+    season_mask &= (store.a_division >= 0) & (store.h_division >= 0)
+    unplayed = (store.a_score == 0) & (store.h_score == 0)
+    played = season_mask & ~unplayed
+    scheduled = season_mask & unplayed
+
+    # the season's teams, in nick id order
+    team_ids = numpy.flatnonzero(store.team_division[season_idx] >= 0)
+    division = store.team_division[season_idx, team_ids]
+    n_teams = len(team_ids)
+    # map nick ids to positions in team_ids
+    position = numpy.full(len(store.nicks), -1)
+    position[team_ids] = numpy.arange(n_teams)
+
+    # everything from games already played is the same in every sim
+    records = store.calc_records(played)
+    records = records.reset_index().set_index("nick_name").reindex(
+        store.nicks[team_ids], fill_value=0
     )
-
-    # recalculate div rank now
-    tied_df["division_rank"] = (
-        tied_df["division_rank"] + tied_df["tiebreaker_four_rank"]
+    h2h_wins, h2h_games = store.h2h(played)
+    h2h_wins = h2h_wins[numpy.ix_(team_ids, team_ids)]
+    h2h_games = h2h_games[numpy.ix_(team_ids, team_ids)]
+
+    # score history for every nick, grouped by nick id so each team's
+    # scores are one slice of a flat array
+    history = ~unplayed
+    history_nick = numpy.concatenate([store.a_id[history], store.h_id[history]])
+    history_score = numpy.concatenate(
+        [store.a_score_norm[history], store.h_score_norm[history]]
     )
-
-    # check time! are we still tied or is it broken?
-    for rank in tied_df.division_rank.unique():
-        # if the length of the df is longer than 1 for any rank, there's a tie...
-        # proceed to tiebreaker #5, which is a real life coin flip.
-        still_tied_df = tied_df.loc[tied_df.division_rank == rank]
-        if len(still_tied_df) > 1:
-            print(still_tied_df)
-            print("You're gonna need a coin for this one.")
-
-    return tied_df
-
-
-def wild_card_tiebreaker_one(tied_df, games_df, matchup_df):
-    # need to filter out any teams at this stage that aren't the highest-ranked
-    # team in their division in the tiebreaker.
-    seed_to_break = tied_df.playoff_seed.min()
-    # if this tiebreaker only involves one division, just use division ranking
-    if len(tied_df.index.unique(level="division")) == 1:
-        tied_df["playoff_seed"] = (
-            tied_df.division_rank.rank(
-                method="min",
-                ascending=True,
-            )
-            + seed_to_break
-            - 1
+    order = numpy.argsort(history_nick, kind="stable")
+    history_score = history_score[order]
+    history_count = numpy.bincount(history_nick, minlength=len(store.nicks))
+    history_start = numpy.cumsum(history_count) - history_count
+    # a team with no history yet draws from the whole league
+    no_history = history_count == 0
+    history_start[no_history] = 0
+    history_count[no_history] = len(history_score)
+
+    # one-hot matrices turn per-game results into per-team totals
+    # for a whole batch of sims with one matrix product each
+    a_id = store.a_id[scheduled]
+    h_id = store.h_id[scheduled]
+    weeks = (store.week_e - store.week_s + 1)[scheduled]
+    away = numpy.zeros((len(a_id), n_teams))
+    home = numpy.zeros((len(a_id), n_teams))
+    away[numpy.arange(len(a_id)), position[a_id]] = 1
+    home[numpy.arange(len(a_id)), position[h_id]] = 1
+    games_played = records["games_played"].to_numpy(dtype=float) + (away + home).sum(
+        axis=0
+    )
+    win_total = (
+        records["win_total"].to_numpy(dtype=float)
+        + records["tie_total"].to_numpy(dtype=float) * 0.5
+    )
+    h2h_games = h2h_games + away.T @ home + home.T @ away
+
+    def draw(nick_id, shape):
+        pick = (rng.random(shape) * history_count[nick_id]).astype(numpy.intp)
+        return history_score[history_start[nick_id] + pick] * weeks
+
+    # seed_counts[team, seed - 1] is the number of sims with that seed
+    seed_counts = numpy.zeros(n_teams * n_teams)
+    division_titles = numpy.zeros(n_teams)
+    # batches of SIM_COUNT keep the (sims, teams, teams) arrays a sane size
+    for batch_start in range(0, n_sims, SIM_COUNT):
+        shape = (min(SIM_COUNT, n_sims - batch_start), len(a_id))
+        a_score = draw(a_id, shape)
+        h_score = draw(h_id, shape)
+        a_win = (a_score > h_score) + (a_score == h_score) * 0.5
+        h_win = 1.0 - a_win
+
+        sim_h2h_wins = (
+            h2h_wins
+            + numpy.einsum("sg,ga,gh->sah", a_win, away, home)
+            + numpy.einsum("sg,gh,ga->sha", h_win, home, away)
         )
-    else:
-        # with two or more divisions involved, it's on to H2H record.
-        # but we can only compare the top remaining team in each division.
-        # here we need to filter any team that doesn't meet that criteria
-        # and add one to their playoff seed, so they'll be included
-        # in the next tiebreaker sequence.
-        # let's do a groupby object to get the min division rank in each
-        # division.
-        filter_df = (
-            tied_df.groupby("division")
-            .agg({"division_rank": min})
-            .rename(columns={"division_rank": "qualifying_rank"})
+        division_rank, playoff_seed = seed_teams(
+            division,
+            (win_total + a_win @ away + h_win @ home) / numpy.maximum(games_played, 1),
+            records["points_for"].to_numpy(dtype=float)
+            + a_score @ away
+            + h_score @ home,
+            records["points_against"].to_numpy(dtype=float)
+            + h_score @ away
+            + a_score @ home,
+            sim_h2h_wins,
+            numpy.broadcast_to(h2h_games, sim_h2h_wins.shape),
         )
-        # if we're looping back through here after a qualifying rank was
-        # determined in an earlier tiebreak for the same seed, this join will blow up
-        # (we don't need to recalculate the qualifying rank until looking
-        # at the next seed). so check for qualifying rank here before joining
-        if "qualifying_rank" not in tied_df.columns:
-            tied_df = tied_df.join(filter_df)
-        # split the tied_df here between teams that qualify to continue
-        # the tiebreaker and teams that have to wait for the next seed
-        qualified_tied_df = tied_df.loc[
-            tied_df.division_rank == tied_df.qualifying_rank
-        ]
-        disqualified_tied_df = tied_df.loc[
-            tied_df.division_rank != tied_df.qualifying_rank
-        ]
-
-        # send qualified teams to the next tiebreaker. when they return, concat
-        # with the disqualified teams
-        untied_df = wild_card_tiebreaker_two(
-            qualified_tied_df, games_df, matchup_df, seed_to_break
+        team_seed = numpy.arange(n_teams) * n_teams + playoff_seed - 1
+        seed_counts += numpy.bincount(
+            team_seed.astype(numpy.intp).ravel(), minlength=n_teams * n_teams
         )
-
-        # for wild card seeds, only one team can advance at a time.
-        # the rest of the remaining teams have to be reconsidered in the next
-        # seed's tiebreaker, so we reset seeds that weren't really tiebroken here.
-        disqualified_tied_df["playoff_seed"] = seed_to_break + 1
-
-        # concat happens here inside the update
-        tied_df.update(pandas.concat([untied_df, disqualified_tied_df]))
-
-    return tied_df
-
-
-def wild_card_tiebreaker_two(tied_df, games_df, matchup_df, seed_to_break):
-    # figure out who's got H2H among the 2-3 teams by generating all possible matchups
-    matchups = list(permutations(tied_df.index.get_level_values("nick_name"), 2))
-    # group by winner to determine H2H among the group
-    wc_matchup_df = (
-        matchup_df.loc[matchup_df.index.intersection(matchups)]
-        .groupby(level="nick_name")
-        .agg({"win_total": sum, "game_total": sum})
+        division_titles += (division_rank == 1).sum(axis=0)
+    seed_counts = seed_counts.reshape(n_teams, n_teams)
+
+    odds_df = pandas.DataFrame(
+        seed_counts / n_sims,
+        index=pandas.MultiIndex.from_arrays(
+            [store.divisions[division], store.nicks[team_ids]],
+            names=["division", "nick_name"],
+        ),
+        columns=[f"seed_{seed}" for seed in range(1, n_teams + 1)],
     )
-    # win_pct in this H2H grouping
-    wc_matchup_df["win_pct_h2h"] = (
-        wc_matchup_df["win_total"] / wc_matchup_df["game_total"]
+    odds_df.insert(0, "division_title", division_titles / n_sims)
+    # best average seed first
+    odds_df["avg_seed"] = seed_counts @ numpy.arange(1, n_teams + 1) / n_sims
+    return odds_df.sort_values(by="avg_seed")
+
+
+def group_pct(h2h_wins, h2h_games, group):
+    # win pct against the teams in each row of the group mask.
+    # .500 for a team with no games against its group.
+    games = (h2h_games * group).sum(axis=-1)
+    return numpy.divide(
+        (h2h_wins * group).sum(axis=-1),
+        games,
+        out=numpy.full(games.shape, 0.5),
+        where=games > 0,
     )
 
-    # our sweep check will just be whether or not game_total in a row is
-    # 1 (in case of a 2-way tie) or 2 (in case of a 3-way tie). If it's not,
-    # H2H will be skipped for that team (set win_pct_h2h to .500)
-    wc_matchup_df.loc[
-        wc_matchup_df.game_total < len(wc_matchup_df) - 1, "win_pct_h2h"
-    ] = 0.5
-
-    # now determine H2H rank in the group
-    wc_matchup_df["wc_tiebreaker_two_rank"] = (
-        wc_matchup_df.win_pct_h2h.rank(
-            method="min",
-            ascending=False,
-        )
-        - 1
-    )
-
-    # if we're looping back through here after a tiebreaker rank was
-    # determined in an earlier tiebreak for the same seed, this join will blow up
-    # so check for tiebreaker rank here before joining. if the column
-    # is already there, just update it.
-    if "wc_tiebreaker_two_rank" not in tied_df.columns:
-        tied_df = tied_df.join(wc_matchup_df[["wc_tiebreaker_two_rank"]])
-    else:
-        tied_df.update(wc_matchup_df[["wc_tiebreaker_two_rank"]])
-
-    # if this is a two way tiebreaker where there was no H2H,
-    # we'll have to fill in tiebreaker_two with zeroes
-    # before we modify the playoff seed
-    tied_df["wc_tiebreaker_two_rank"] = tied_df["wc_tiebreaker_two_rank"].fillna(0)
 
-    # now modify playoff seed
-    tied_df["playoff_seed"] = (
-        tied_df["playoff_seed"] + tied_df["wc_tiebreaker_two_rank"]
-    )
-
-    # for wild card seeds, only one team can advance at a time.
-    # the rest of the remaining teams have to be reconsidered in the next
-    # seed's tiebreaker, so we reset seeds that weren't really tiebroken here.
-    tied_df.loc[tied_df.playoff_seed != seed_to_break, "playoff_seed"] = (
-        seed_to_break + 1
+def seed_teams(division, win_pct, points_for, points_against, h2h_wins, h2h_games):
+    """Division ranks and playoff seeds for a batch of regular seasons.
+
+    division holds the division id of each team. The rest are arrays
+    over (seasons, teams) in the same team order: win_pct, points for
+    and against, and the dense head to head wins (ties as half) and
+    games matrices, which have a second teams axis.
+    Returns (division_rank, playoff_seed) as float arrays.
+    """
+    n_teams = len(division)
+    same_division = division[:, None] == division[None, :]
+    division_mates = same_division & ~numpy.eye(n_teams, dtype=bool)
+    tied_mates = division_mates & (win_pct[:, :, None] == win_pct[:, None, :])
+
+    # division tiebreakers, in order: H2H among the tied teams, division
+    # record, points for, points against. ranking on all of them at once
+    # is the same as breaking the ties one step at a time.
+    keys = [
+        win_pct,
+        group_pct(h2h_wins, h2h_games, tied_mates),
+        group_pct(h2h_wins, h2h_games, division_mates),
+        points_for,
+        points_against,
+    ]
+    # ahead[s, i, j] is True when team j beats team i on the keys
+    ahead = numpy.zeros(tied_mates.shape, dtype=bool)
+    for key in reversed(keys):
+        ahead = (key[:, None, :] > key[:, :, None]) | (
+            (key[:, None, :] == key[:, :, None]) & ahead
+        )
+    division_rank = 1.0 + (same_division & ahead).sum(axis=-1)
+
+    # initial seeding based on pure win_pct, division winners first
+    winners = division_rank == 1
+    same_group = winners[:, :, None] == winners[:, None, :]
+    playoff_seed = (
+        1.0
+        + (same_group & (win_pct[:, None, :] > win_pct[:, :, None])).sum(axis=-1)
+        + numpy.where(winners, 0, winners.sum(axis=-1, keepdims=True))
     )
 
-    # check time! are we still tied or is it broken?
-    # if the count of teams at the seed_to_break is the same as before,
-    # proceed to tiebreaker #3, which is points for.
-    still_tied_df = tied_df.loc[tied_df.playoff_seed == seed_to_break]
-    disqualified_tied_df = tied_df.loc[tied_df.playoff_seed > seed_to_break]
-    if len(still_tied_df) == len(tied_df):
-        untied_df = wild_card_tiebreaker_three(still_tied_df, seed_to_break)
-        tied_df.update(untied_df)
-    # there's also the case where someone has dropped out of the tiebreaker;
-    # here we need to restart from step one with just the remaining teams.
-    elif len(still_tied_df) > 1:
-        untied_df = wild_card_tiebreaker_one(still_tied_df, games_df, matchup_df)
-        tied_df.update(pandas.concat([untied_df, disqualified_tied_df]))
-
-    return tied_df
-
-
-def wild_card_tiebreaker_three(tied_df, seed_to_break):
-    # rank based on points for
-    tied_df["wc_tiebreaker_three_rank"] = (
-        tied_df.points_for.rank(
-            method="min",
-            ascending=False,
+    # wild card tiebreakers only let one team advance at a time, so
+    # walk the tied seeds in order. anyone left behind moves down to the
+    # next seed and gets looked at again there.
+    last_seed = numpy.zeros(len(playoff_seed))
+    # seasons drop out once they have no ties left past last_seed
+    sims = numpy.arange(len(playoff_seed))
+    while len(sims):
+        sim_seed = playoff_seed[sims]
+        tied = (sim_seed[:, :, None] == sim_seed[:, None, :]).sum(axis=-1) > 1
+        next_seed = numpy.where(
+            tied & (sim_seed > last_seed[sims, None]), sim_seed, numpy.inf
+        ).min(axis=-1)
+        sims = sims[next_seed < numpy.inf]
+        seed = next_seed[next_seed < numpy.inf]
+        playoff_seed[sims] = wild_card_tiebreaker(
+            playoff_seed[sims] == seed[:, None],
+            seed,
+            playoff_seed[sims],
+            division,
+            division_rank[sims],
+            points_for[sims],
+            points_against[sims],
+            h2h_wins[sims],
+            h2h_games[sims],
         )
-        - 1
-    )
+        last_seed[sims] = seed
 
-    # recalculate playoff seed now
-    tied_df["playoff_seed"] = (
-        tied_df["playoff_seed"] + tied_df["wc_tiebreaker_three_rank"]
-    )
+    return division_rank, playoff_seed
 
-    # for wild card seeds, only one team can advance at a time.
-    # the rest of the remaining teams have to be reconsidered in the next
-    # seed's tiebreaker, so we reset seeds that weren't really tiebroken here.
-    tied_df.loc[tied_df.playoff_seed != seed_to_break, "playoff_seed"] = (
-        seed_to_break + 1
-    )
 
-    # check time! are we still tied or is it broken?
-    # if the count of teams at the seed_to_break is the same as before,
-    # proceed to tiebreaker #4, which is points against.
-    still_tied_df = tied_df.loc[tied_df.playoff_seed == seed_to_break]
-    disqualified_tied_df = tied_df.loc[tied_df.playoff_seed > seed_to_break]
-    if len(still_tied_df) == len(tied_df):
-        untied_df = wild_card_tiebreaker_four(still_tied_df, seed_to_break)
-        tied_df.update(untied_df)
-    # there's also the case where someone has dropped out of the tiebreaker;
-    # here we need to restart from step one with just the remaining teams.
-    elif len(still_tied_df) > 1:
-        untied_df = wild_card_tiebreaker_one(still_tied_df)
-        tied_df.update(pandas.concat([untied_df, disqualified_tied_df]))
-
-    return tied_df
-
-
-def wild_card_tiebreaker_four(tied_df, seed_to_break):
-    # rank based on points against
-    tied_df["wc_tiebreaker_four_rank"] = (
-        tied_df.points_against.rank(
-            method="min",
-            ascending=False,
-        )
-        - 1
+def wild_card_tiebreaker(
+    tied,
+    seed,
+    playoff_seed,
+    division,
+    division_rank,
+    points_for,
+    points_against,
+    h2h_wins,
+    h2h_games,
+):
+    """Break the tie at seed between the teams in each row of the tied
+    mask. Returns the new playoff seeds: one team (or the teams still
+    tied at the end) keep seed, the rest move down one."""
+    seed = seed[:, None]
+    same_division = division[:, None] == division[None, :]
+
+    def in_one_division(group):
+        pairs = group[:, :, None] & group[:, None, :]
+        return (~pairs | same_division).all(axis=(1, 2))
+
+    # division_ahead[s, i, j] is True when team j is ahead of team i
+    # in their division
+    division_ahead = same_division & (
+        division_rank[:, None, :] < division_rank[:, :, None]
     )
 
-    # recalculate playoff seed now
-    tied_df["playoff_seed"] = (
-        tied_df["playoff_seed"] + tied_df["wc_tiebreaker_four_rank"]
-    )
+    def ahead_in_division(group):
+        return (division_ahead & group[:, None, :]).sum(axis=-1)
 
-    # for wild card seeds, only one team can advance at a time.
-    # the rest of the remaining teams have to be reconsidered in the next
-    # seed's tiebreaker, so we reset seeds that weren't really tiebroken here.
-    tied_df.loc[tied_df.playoff_seed != seed_to_break, "playoff_seed"] = (
-        seed_to_break + 1
+    # if this tiebreaker only involves one division, just use division ranking
+    one_division = in_one_division(tied)
+    # with two or more divisions involved, only the top remaining team
+    # in each division can be compared. the rest wait for the next seed.
+    alive = tied & (one_division[:, None] | (ahead_in_division(tied) == 0))
+    done = one_division | (alive.sum(axis=-1) == 1)
+    step = numpy.zeros(len(tied), dtype=numpy.intp)
+    # only the tiebreakers that are still going get looked at
+    sims = numpy.flatnonzero(~done)
+    while len(sims):
+        sim_alive = alive[sims]
+        # sweep check: a team that hasn't played every other tied team
+        # gets .500. teams with no games at all can't lose on H2H.
+        wins = (h2h_wins[sims] @ sim_alive[:, :, None])[:, :, 0]
+        games = (h2h_games[sims] @ sim_alive[:, :, None])[:, :, 0]
+        played = sim_alive & (games > 0)
+        n_played = played.sum(axis=-1, keepdims=True)
+        h2h = numpy.where(games < n_played - 1, 0.5, wins / numpy.maximum(games, 1))
+        best_h2h = numpy.where(played, h2h, -numpy.inf).max(axis=-1, keepdims=True)
+        h2h = numpy.where(played, h2h, best_h2h)
+
+        key = numpy.choose(
+            step[sims, None], [h2h, points_for[sims], points_against[sims]]
+        )
+        key = numpy.where(sim_alive, key, -numpy.inf)
+        best = sim_alive & (key == key.max(axis=-1, keepdims=True))
+        alive[sims] = best
+        n_best = best.sum(axis=-1)
+        # nobody dropped out, so try the next step
+        same = n_best == sim_alive.sum(axis=-1)
+        step[sims[same]] += 1
+        # if someone did, restart from step one with the rest
+        restart = ~same & (n_best > 1)
+        step[sims[restart]] = 0
+        restart_one_division = numpy.zeros(len(sims), dtype=bool)
+        restart_one_division[restart] = in_one_division(best[restart])
+        one_division[sims] |= restart_one_division
+        # still tied after points against. you're gonna need a coin for this one.
+        finished = restart_one_division | (n_best == 1) | (step[sims] == 3)
+        sims = sims[~finished]
+
+    # whoever is left keeps the seed, everyone else moves down one
+    alive_seed = numpy.where(
+        one_division[:, None], seed + ahead_in_division(alive), seed
     )
-
-    # check time! are we still tied or is it broken?
-    # if the count of teams at the seed_to_break is the same as before,
-    # proceed to tiebreaker #5, which is an irl coin flip.
-    still_tied_df = tied_df.loc[tied_df.playoff_seed == seed_to_break]
-    disqualified_tied_df = tied_df.loc[tied_df.playoff_seed > seed_to_break]
-    if len(still_tied_df) == len(tied_df):
-        print(still_tied_df)
-        print("You're gonna need a coin for this one. Or maybe a six-sided die.")
-    # there's also the case where someone has dropped out of the tiebreaker;
-    # here we need to restart from step one with just the remaining teams.
-    elif len(still_tied_df) > 1:
-        untied_df = wild_card_tiebreaker_one(still_tied_df)
-        tied_df.update(pandas.concat([untied_df, disqualified_tied_df]))
-
-    return tied_df
+    return numpy.where(alive, alive_seed, numpy.where(tied, seed + 1, playoff_seed))
@@ -0,0 +1,65 @@
+# import native Python packages
+import base64
+import binascii
+from typing import Dict, Tuple, Union
+
+# import third party packages
+from bson import json_util
+from fastapi import HTTPException, Response
+import orjson
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that's already encoded JSON, like a payload
+    stored by a transform. The bytes go out as they are."""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def json_object(items: Dict[str, Union[bytes, Dict]]) -> bytes:
+    """Encode a JSON object whose values are already encoded JSON.
+    Nested dicts are spliced together the same way."""
+    return (
+        b"{"
+        + b",".join(
+            orjson.dumps(str(key))
+            + b":"
+            + (json_object(value) if isinstance(value, dict) else value)
+            for key, value in items.items()
+        )
+        + b"}"
+    )
+
+
+def extend_json_object(fields: Dict, encoded: Union[bytes, str]) -> bytes:
+    """Prepend fields to an already encoded JSON object, like the output
+    of DataFrame.to_json(orient="split"), without decoding it."""
+    if isinstance(encoded, str):
+        encoded = encoded.encode()
+    head = orjson.dumps(fields)
+    if head == b"{}":
+        return encoded
+    if encoded.strip() == b"{}":
+        return head
+    return head[:-1] + b"," + encoded.lstrip()[1:]
+
+
+def encode_cursor(keys: Tuple) -> str:
+    """Opaque keyset pagination cursor holding the sort keys of the last
+    item on a page. ObjectIds survive the round trip."""
+    return base64.urlsafe_b64encode(json_util.dumps(list(keys)).encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int) -> Tuple:
+    """Sort keys out of an encode_cursor cursor, checked against the
+    number of keys the page is sorted on."""
+    try:
+        keys = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        keys = None
+    if not isinstance(keys, list) or len(keys) != length:
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    return tuple(keys)
@@ -0,0 +1,190 @@
+# import native Python packages
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+import heapq
+import math
+import re
+from typing import Dict, Hashable, List, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# how much a prefix or a fuzzy match counts compared to the exact term.
+# fuzzy matches lose another factor for every edit
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+# short prefixes match lots of terms, only keep the most common ones
+PREFIX_LIMIT = 50
+
+
+def tokenize(text) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def trigrams(term: str):
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edits (insert, delete, substitute or swap two neighbours) between
+    two terms. Anything over the limit comes back as limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous, current = None, None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        previous, current = current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if (
+                i > 1 and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before = previous
+    return min(current[-1], limit + 1)
+
+
+class SearchIndex:
+    """In-memory inverted index over the text fields of a set of documents.
+
+    Terms have postings of field weighted term frequencies for BM25
+    ranking. The vocabulary is kept sorted for prefix matching, with
+    trigram postings for fuzzy matching. Documents are added and removed
+    one at a time, so the index can follow writes instead of being
+    rebuilt.
+    """
+
+    def __init__(self, fields: Dict[str, float], k1=1.2, b=0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.docs = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.postings = {}
+        self.vocabulary = []
+        self.gram_terms = defaultdict(set)
+
+    def add(self, doc_id: Hashable, doc):
+        """Index a document, replacing it if it's already there."""
+        self.remove(doc_id)
+        terms = Counter()
+        for field, weight in self.fields.items():
+            for term in tokenize(getattr(doc, field, None)):
+                terms[term] += weight
+        self.docs[doc_id] = doc
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+        for term, frequency in terms.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                insort(self.vocabulary, term)
+                for gram in trigrams(term):
+                    self.gram_terms[gram].add(term)
+            self.postings[term][doc_id] = frequency
+
+    def remove(self, doc_id: Hashable):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        del self.docs[doc_id]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+                for gram in trigrams(term):
+                    self.gram_terms[gram].discard(term)
+
+    def prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + "\uffff", start)
+        terms = self.vocabulary[start:end]
+        if len(terms) > PREFIX_LIMIT:
+            terms = heapq.nlargest(
+                PREFIX_LIMIT, terms, key=lambda term: len(self.postings[term])
+            )
+        return terms
+
+    def fuzzy_terms(self, token: str) -> Dict[str, float]:
+        """Vocabulary terms within one edit of the token, two for tokens
+        longer than five characters. Candidates have to share enough
+        trigrams with the token to be worth checking."""
+        if len(token) < 3:
+            return {}
+        limit = 1 if len(token) <= 5 else 2
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.gram_terms.get(gram, ()))
+        # one edit breaks at most four trigrams
+        least_shared = max(1, len(grams) - 4 * limit)
+        terms = {}
+        for term, count in shared.items():
+            if count < least_shared:
+                continue
+            distance = edit_distance(token, term, limit)
+            if distance <= limit:
+                terms[term] = FUZZY_WEIGHT ** distance
+        return terms
+
+    def expand(self, token: str, prefix=False) -> Dict[str, float]:
+        """Terms a query token matches, with how much each one counts.
+        Fuzzy matches are only tried when nothing matches as typed."""
+        terms = {token: 1.0} if token in self.postings else {}
+        if prefix:
+            for term in self.prefix_terms(token):
+                terms.setdefault(term, PREFIX_WEIGHT)
+        return terms or self.fuzzy_terms(token)
+
+    def search(self, text: str, prefix=True) -> List[Tuple[Hashable, float]]:
+        """Ids and BM25 scores of the documents matching every token of
+        the text, best first. With prefix on, the last token is treated
+        as unfinished, for typeahead."""
+        tokens = tokenize(text)
+        if not tokens or not self.docs:
+            return []
+        average_length = self.total_length / len(self.docs) or 1
+        scores = None
+        for i, token in enumerate(tokens):
+            token_scores = {}
+            expanded = self.expand(token, prefix and i == len(tokens) - 1)
+            for term, weight in expanded.items():
+                postings = self.postings[term]
+                idf = math.log(
+                    1 + (len(self.docs) - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc_id, frequency in postings.items():
+                    length = self.doc_lengths[doc_id]
+                    score = weight * idf * frequency * (self.k1 + 1) / (
+                        frequency
+                        + self.k1 * (1 - self.b + self.b * length / average_length)
+                    )
+                    if score > token_scores.get(doc_id, 0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: scores[doc_id] + score
+                    for doc_id, score in token_scores.items()
+                    if doc_id in scores
+                }
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
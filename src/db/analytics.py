@@ -0,0 +1,75 @@
+# import native Python packages
+from typing import Dict, List
+
+# import third party packages
+from motor.motor_asyncio import AsyncIOMotorClient
+import pandas
+
+
+# analytics reads pull whole collections, so skip motor's
+# 101 document first batch and go straight to big ones
+ANALYTICS_BATCH_SIZE = 5000
+
+
+def model_columns(model) -> List[str]:
+    """Stored field names of an ODMantic model, _id included."""
+    return [field.key_name for field in model.__odm_fields__.values()]
+
+
+def column_projection(model, columns: List[str] = None) -> Dict[str, int]:
+    """The projection find_columns reads the columns with. _id is left
+    out unless it's one of them."""
+    projection = {column: 1 for column in columns or model_columns(model)}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
+
+
+async def find_columns(
+    client: AsyncIOMotorClient,
+    database: str,
+    model,
+    match: Dict = None,
+    columns: List[str] = None,
+    sort=None,
+    batch_size: int = ANALYTICS_BATCH_SIZE,
+) -> Dict[str, list]:
+    """Read columns of a model's collection straight off a motor cursor.
+
+    Documents are projected down to the columns and appended column by
+    column, with no ODMantic model or pydantic validation in between.
+    Only use it on data the app wrote itself. Enum fields come back as
+    their raw values, and missing fields as None.
+    """
+    columns = columns or model_columns(model)
+    collection = client[database][model.__collection__]
+    cursor = collection.find(
+        match or {}, column_projection(model, columns), batch_size=batch_size
+    )
+    if sort is not None:
+        cursor = cursor.sort(sort)
+
+    data = {column: [] for column in columns}
+    appends = [(column, data[column].append) for column in columns]
+    async for doc in cursor:
+        for column, append in appends:
+            append(doc.get(column))
+    return data
+
+
+async def find_frame(
+    client: AsyncIOMotorClient,
+    database: str,
+    model,
+    match: Dict = None,
+    columns: List[str] = None,
+    sort=None,
+    batch_size: int = ANALYTICS_BATCH_SIZE,
+) -> pandas.DataFrame:
+    """find_columns as a DataFrame. Columns are there even if no
+    documents match."""
+    columns = columns or model_columns(model)
+    data = await find_columns(
+        client, database, model, match, columns, sort, batch_size
+    )
+    return pandas.DataFrame(data, columns=columns)
@@ -3,6 +3,12 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 # import custom local stuff
 from instance.config import MONGO_CONNECT
+from src.api.haveyouseenx import hysx_startup
+from src.api.mildredleague import (
+    ml_create_indexes,
+    ml_snapshot_shutdown,
+    ml_snapshot_startup,
+)
 from src.db.atlas import atlas_object
 
 
@@ -13,8 +19,12 @@ async def motor_startup():
     blob/master/app/db/mongodb_utils.py#L10
     """
     atlas_object.client = AsyncIOMotorClient(MONGO_CONNECT)
+    await ml_create_indexes(atlas_object.client)
+    await ml_snapshot_startup(atlas_object.client)
+    await hysx_startup(atlas_object.client)
 
 
 async def motor_shutdown():
     """Shutdown the motor client at app shutdown."""
+    await ml_snapshot_shutdown()
     atlas_object.client.close()
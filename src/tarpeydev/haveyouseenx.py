@@ -4,11 +4,13 @@
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from motor.motor_asyncio import AsyncIOMotorClient
 
 # import local stuff
 from src.api.haveyouseenx import (
-    count_by_status, playtime, search, system_treemap
+    DEFAULT_OWNER, dashboard, search, system_treemap
 )
+from src.db.atlas import get_odm
 from src.api.users import (
     UserOut,
     oauth2_scheme,
@@ -23,15 +25,16 @@ templates = Jinja2Templates(directory='templates')
 @hysx_views.get("/", response_class=HTMLResponse, name="haveyouseenx", tags=["simple_view"])
 async def home(
     request: Request,
-    stats=Depends(count_by_status),
-    hours=Depends(playtime),
+    client: AsyncIOMotorClient = Depends(get_odm),
 ):
+    data = await dashboard(DEFAULT_OWNER, client)
     return templates.TemplateResponse(
         'haveyouseenx/home.html',
         context={
             'request': request,
-            'stats': stats,
-            'playtime': hours,
+            'stats': data['stats'],
+            'playtime': data['playtime'],
+            'now_playing': data['now_playing'],
         }
     )
 
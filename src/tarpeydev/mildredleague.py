@@ -2,14 +2,13 @@
 
 # import third party packages
 from fastapi import APIRouter, Request, Depends, Path
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
 
 # import custom local stuff
 from src.api.mildredleague import (
     get_season_notes,
-    seed_sim,
     MLSeason,
 )
 from src.api.users import (
@@ -108,18 +107,11 @@ def season_page(
 def simulation(
     request: Request,
     season: MLSeason,
-    playoff_table=Depends(seed_sim),
 ):
-    if True:
-        return RedirectResponse(request.url_for('mildredleague.season_page', season=season))
-    elif season != 2020:
-        return "You can't simulate this season.", 404
-    else:
-        return templates.TemplateResponse(
-            'mildredleague/sim.html',
-            context={
-                'request': request,
-                'season': season,
-                'playoff_table': playoff_table,
-            }
-        )
+    return templates.TemplateResponse(
+        'mildredleague/sim.html',
+        context={
+            'request': request,
+            'season': season,
+        }
+    )
@@ -0,0 +1,787 @@
+# import native Python packages
+import asyncio
+from collections import Counter
+import csv
+import datetime
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+# import third party packages
+from fastapi import HTTPException, UploadFile
+from motor.motor_asyncio import AsyncIOMotorClient
+import numpy
+from odmantic import ObjectId
+import orjson
+import pandas
+import pymongo
+import pytest
+
+# import custom local stuff
+from src.api import haveyouseenx
+from src.api.haveyouseenx import (
+    BACKLOG_CSV_FIELDS,
+    BACKLOG_INDEXES,
+    PAGE_LIMIT,
+    SEARCH_FIELDS,
+    BacklogCounters,
+    BacklogGame,
+    BacklogGamePatch,
+    BacklogSeq,
+    backlog_owner,
+    changes_page,
+    counter_key,
+    counters_inc,
+    csv_games,
+    keyset_page,
+    last_event,
+    sorted_counts,
+    timeline_counts,
+    timeline_doc,
+    timeline_from_doc,
+    timeline_inc,
+)
+from src.api.responses import encode_cursor
+from src.api.search import SearchIndex, edit_distance
+from src.api.users import UserOut
+
+
+BACKUP_CSV = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "backup",
+    "haveyouseenx",
+    "haveyouseenx_annuitydew.csv",
+)
+# tests against the API's database reads need a local mongod.
+# they're skipped if there isn't one.
+TEST_MONGO = os.environ.get("TEST_MONGO", "mongodb://localhost:27017")
+
+
+def small_backlog():
+    return pandas.DataFrame({
+        '_id': ['A', 'B'],
+        'add_date': [datetime.datetime(2015, 1, 1, 16), None],
+        'start_date': [
+            datetime.datetime(2015, 1, 2, 16),
+            datetime.datetime(2015, 1, 1, 10),
+        ],
+        'beat_date': [None, datetime.datetime(2015, 1, 3, 16)],
+        'complete_date': [None, None],
+        'game_status': ['Started', 'Beaten'],
+    })
+
+
+def test_timeline_counts():
+    '''Each day's counts are today's counts with every later event undone.'''
+    backlog = small_backlog()
+    stats = {'Started': 1, 'Beaten': 1}
+
+    days, counts = timeline_counts(backlog, stats)
+    assert days.tolist() == [1420070400000, 1420156800000, 1420243200000]
+    # not started, started, beaten, completed at each midnight
+    numpy.testing.assert_array_equal(
+        counts, [[1, 0, 0, 0], [1, 1, 0, 0], [0, 2, 0, 0]]
+    )
+
+
+def test_stored_timeline():
+    '''The stored timeline matches a full rebuild, before and after a write.'''
+    backlog = small_backlog()
+    games = list(backlog.itertuples())
+    inc = Counter()
+    for game in games:
+        inc.update(timeline_inc(game, 1))
+    doc = timeline_doc('annuitydew', inc, last_event(games))
+
+    days, counts = timeline_from_doc(doc)
+    expected_days, expected_counts = timeline_counts(
+        backlog, backlog.game_status.value_counts().to_dict()
+    )
+    numpy.testing.assert_array_equal(days, expected_days)
+    numpy.testing.assert_array_equal(counts, expected_counts)
+
+    # beat A, the same $inc paths the edit endpoint sends
+    edited = backlog.copy()
+    edited.loc[0, 'beat_date'] = datetime.datetime(2015, 1, 5, 16)
+    edited.loc[0, 'game_status'] = 'Beaten'
+    inc.update(timeline_inc(games[0], -1))
+    inc.update(timeline_inc(next(edited.loc[[0]].itertuples()), 1))
+    doc = timeline_doc('annuitydew', inc, last_event(edited.itertuples()))
+
+    days, counts = timeline_from_doc(doc)
+    expected_days, expected_counts = timeline_counts(
+        edited, edited.game_status.value_counts().to_dict()
+    )
+    numpy.testing.assert_array_equal(days, expected_days)
+    numpy.testing.assert_array_equal(counts, expected_counts)
+
+
+def test_search_index():
+    '''Search ranks, completes prefixes, forgives typos and follows writes.'''
+    backlog = pandas.read_csv(BACKUP_CSV, encoding='latin1')
+    backlog = backlog.drop_duplicates('game_id', keep='last').set_index('game_id')
+    backlog = backlog.astype(object).where(backlog.notnull(), None)
+    index = SearchIndex(SEARCH_FIELDS)
+    for game in backlog.itertuples():
+        index.add(game.Index, game)
+
+    zelda = set(backlog.index[backlog.game_title.str.contains('Zelda')])
+    assert {game_id for game_id, score in index.search('zelda')} == zelda
+    assert {game_id for game_id, score in index.search('zel')} >= zelda
+    assert {game_id for game_id, score in index.search('zleda')} == zelda
+    assert edit_distance('zleda', 'zelda', 1) == 1
+    assert edit_distance('zelda', 'mario', 1) == 2
+
+    # every token has to match
+    mario_kart = index.search('mario kart')
+    assert mario_kart
+    assert all('Kart' in index.docs[game_id].game_title for game_id, _ in mario_kart)
+
+    game_id = next(iter(zelda))
+    index.remove(game_id)
+    assert {game_id for game_id, score in index.search('zelda')} == zelda - {game_id}
+    index.add(game_id, backlog.loc[game_id])
+    assert {game_id for game_id, score in index.search('zelda')} == zelda
+
+    # typeahead, one query per keystroke
+    start = time.perf_counter()
+    keystrokes = ['s', 'su', 'sup', 'supe', 'super', 'super m', 'super ma']
+    for _ in range(20):
+        for keystroke in keystrokes:
+            index.search(keystroke)
+    per_query = (time.perf_counter() - start) / (20 * len(keystrokes))
+    print(f"\ntypeahead query: {per_query * 1000:.3f}ms")
+    assert per_query < 0.001
+
+
+def test_keyset_pages():
+    '''Following next_cursor walks every game once, in order.'''
+    backlog = pandas.read_csv(BACKUP_CSV, encoding='latin1')
+    games = [
+        ((dlc, game_id), game_id)
+        for dlc, game_id in zip(['N', 'Y'] * len(backlog), backlog.game_id)
+    ]
+    games.sort()
+
+    walked, after, pages = [], None, 0
+    while True:
+        page = keyset_page(games, 100, after)
+        assert page['total'] == len(games)
+        walked += page['results']
+        pages += 1
+        after = page['next_cursor']
+        if after is None:
+            break
+    assert walked == [game for keys, game in games]
+    assert pages == -(-len(games) // 100)
+
+    for bad_cursor in ['nope', encode_cursor(['N']), encode_cursor([1, 2])]:
+        with pytest.raises(HTTPException):
+            keyset_page(games, 100, bad_cursor)
+
+
+def test_ranked_pages(monkeypatch):
+    '''Ranked search pages by position in the ranking as it is when each
+    page is read.'''
+    backlog = pandas.read_csv(BACKUP_CSV, encoding='latin1')
+    backlog = backlog.drop_duplicates('game_id', keep='last')
+    backlog = backlog.astype(object).where(backlog.notnull(), None)
+    index = SearchIndex(SEARCH_FIELDS)
+    for game in backlog.itertuples():
+        index.add(game.game_id, SimpleNamespace(id=game.game_id, dlc='N', **{
+            field: getattr(game, field) for field in SEARCH_FIELDS
+        }))
+
+    async def search_index(client, owner):
+        return index
+
+    monkeypatch.setattr(haveyouseenx, 'get_search_index', search_index)
+
+    def page(after):
+        return asyncio.run(haveyouseenx.search(
+            'annuitydew', None, None, None, None, 'super', 5, after
+        ))
+
+    def walk():
+        walked, after = [], None
+        while True:
+            results = page(after)
+            walked += [game.id for game in results['results']]
+            after = results['next_cursor']
+            if after is None:
+                return walked
+
+    walked = walk()
+    assert sorted(walked) == sorted(game_id for game_id, score in index.search('super'))
+    assert len(walked) == len(set(walked))
+
+    # a write moves every score. the next page picks up where the first
+    # one left off in the ranking as it is now
+    first = page(None)
+    assert [game.id for game in first['results']] == walked[:5]
+    index.add('X0001', SimpleNamespace(
+        id='X0001', dlc='N', game_title='Super Game', sub_title=None,
+        game_system='PC', genre='RPG', game_notes='a very long note ' * 50,
+    ))
+    second = page(first['next_cursor'])
+    assert [game.id for game in second['results']] == walk()[5:10]
+
+
+def test_counters_replay():
+    '''$inc updates, one game at a time, add up to the full counts.'''
+    backlog = pandas.read_csv(BACKUP_CSV, encoding='latin1')
+    backlog = backlog.astype(object).where(backlog.notnull(), None)
+    inc = Counter()
+    for game in backlog.itertuples():
+        inc.update(counters_inc(game, 1))
+    # edit the first game onto another system, then delete the last one
+    games = list(backlog.itertuples())
+    inc.update(counters_inc(games[0], -1))
+    inc.update(counters_inc(games[0]._replace(game_system='Some.System'), 1))
+    inc.update(counters_inc(games[-1], -1))
+
+    expected = backlog.iloc[:-1].copy()
+    expected.loc[0, 'game_system'] = 'Some.System'
+    status = {
+        path.split('.', 1)[1]: count
+        for path, count in inc.items()
+        if path.startswith('status.')
+    }
+    systems = {
+        path.split('.', 1)[1]: count
+        for path, count in inc.items()
+        if path.startswith('systems.')
+    }
+    assert sorted_counts(status) == expected.game_status.value_counts().to_dict()
+    assert sorted_counts(systems) == expected.game_system.value_counts().to_dict()
+    assert counter_key('Some.System') in systems
+    assert inc['game_hours'] == expected.game_hours.fillna(0).sum()
+    assert inc['game_minutes'] == expected.game_minutes.fillna(0).sum()
+
+
+def test_figure_cache(monkeypatch):
+    '''Figures are built once per owner and backlog version.'''
+    builds = []
+
+    async def backlog_frame(owner, client):
+        return pandas.DataFrame({'game_system': ['PC']})
+
+    def payload(backlog):
+        builds.append(len(builds))
+        return orjson.dumps({'build': len(builds)})
+
+    monkeypatch.setattr(haveyouseenx, 'get_backlog_frame', backlog_frame)
+    monkeypatch.setitem(haveyouseenx.FIGURE_PAYLOADS, 'test', payload)
+    monkeypatch.setattr(haveyouseenx, 'figure_cache', haveyouseenx.FigureCache())
+    monkeypatch.setattr(haveyouseenx, 'FIGURE_CACHE_LIMIT', 2)
+
+    async def requests(owner_versions):
+        return [
+            await haveyouseenx.cached_figure(None, owner, 'test', version)
+            for owner, version in owner_versions
+        ]
+
+    payloads = asyncio.run(requests([('a', 1), ('a', 1), ('a', 1), ('a', 2), ('a', 2)]))
+    assert builds == [0, 1]
+    assert [orjson.loads(payload)['build'] for payload in payloads] == [1, 1, 1, 2, 2]
+
+    # owners don't share figures, and the least recently used one is dropped
+    payloads = asyncio.run(requests([('b', 2), ('a', 2), ('c', 2), ('a', 2), ('b', 2)]))
+    assert [orjson.loads(payload)['build'] for payload in payloads] == [3, 2, 4, 2, 5]
+    assert list(haveyouseenx.figure_cache.figures) == [('a', 'test'), ('b', 'test')]
+
+
+def test_delta_sync():
+    '''A client following changes ends up with the backlog, downloading
+    only what changed.'''
+    games, tombstones, seq = {}, {}, 0
+
+    def write(game_id):
+        nonlocal seq
+        seq += 1
+        games[game_id] = SimpleNamespace(id=game_id, updated_seq=seq)
+        tombstones.pop(game_id, None)
+
+    def delete(game_id):
+        nonlocal seq
+        seq += 1
+        del games[game_id]
+        tombstones[game_id] = {'game_id': game_id, 'updated_seq': seq}
+
+    def changes(since, limit):
+        # what the two updated_seq index scans return
+        updated = sorted(
+            (game for game in games.values() if game.updated_seq > since),
+            key=lambda game: game.updated_seq,
+        )
+        deleted = sorted(
+            (tombstone for tombstone in tombstones.values()
+             if tombstone['updated_seq'] > since),
+            key=lambda tombstone: tombstone['updated_seq'],
+        )
+        return changes_page(updated[:limit + 1], deleted[:limit + 1], since, limit)
+
+    def sync(client, since, limit=7):
+        downloaded = 0
+        while True:
+            page = changes(since, limit)
+            for game in page['updated']:
+                client[game.id] = game.updated_seq
+            for game_id in page['deleted']:
+                client.pop(game_id, None)
+            downloaded += len(page['updated']) + len(page['deleted'])
+            since = page['seq']
+            if not page['more']:
+                return since, downloaded
+
+    for i in range(100):
+        write(f'G{i:03d}')
+    client = {}
+    since, downloaded = sync(client, 0)
+    assert client == {game_id: game.updated_seq for game_id, game in games.items()}
+    assert downloaded == 100
+
+    random.seed(50)
+    for _ in range(5):
+        for game_id in random.sample(sorted(games), 10):
+            delete(game_id)
+        for game_id in random.sample(sorted(games), 5):
+            write(game_id)
+        # one deleted and written again, one brand new
+        write(next(reversed(tombstones)))
+        write(f'N{seq}')
+        since, downloaded = sync(client, since)
+        assert client == {game_id: game.updated_seq for game_id, game in games.items()}
+        assert downloaded == 16
+
+    # nothing new, nothing to download
+    assert sync(client, since) == (since, 0)
+
+
+def test_csv_import_chunks():
+    '''CSV imports convert like Backlog.from_csv, in bounded chunks.'''
+    with open(BACKUP_CSV, encoding='latin1', newline='') as backlog_csv:
+        rows = csv.reader(backlog_csv)
+        header = next(rows)
+        doc_list = csv_games(rows, BACKLOG_CSV_FIELDS, size=10000)
+    assert len(doc_list) == 749
+    assert doc_list[0]['csv_id'] == 'D0001'
+    assert doc_list[0]['sub_title'] == 'Corkscrew Follies'
+    assert doc_list[0]['game_hours'] is None
+    assert doc_list[0]['dlc'] == 'N'
+    dated = next(doc for doc in doc_list if doc['add_date'] is not None)
+    assert dated['add_date'].hour == 16
+    assert len(header) == len(BACKLOG_CSV_FIELDS)
+
+    # a 100k row upload is spooled to disk and read a chunk at a time
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as upload:
+        text = io.TextIOWrapper(upload, encoding='latin1', newline='')
+        writer = csv.writer(text)
+        writer.writerow(header)
+        row = [
+            '', 'Game', '', 'PC', 'RPG', 'N', 'Beaten',
+            '10', '30', 'Actual', '1/2/20', '1/3/20', '1/4/20', '', '',
+        ]
+        for i in range(100000):
+            writer.writerow([f'X{i:06d}'] + row[1:])
+        text.flush()
+        text.seek(0)
+
+        rows = csv.reader(text)
+        next(rows)
+        tracemalloc.start()
+        total, chunks = 0, 0
+        while True:
+            chunk = csv_games(rows, BACKLOG_CSV_FIELDS)
+            if not chunk:
+                break
+            assert len(chunk) <= 1000
+            total += len(chunk)
+            chunks += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        text.detach()
+    assert total == 100000
+    assert chunks == 100
+    assert peak < 10 * 1024 * 1024
+
+    with pytest.raises(HTTPException):
+        csv_games(csv.reader(io.StringIO(',Game\n')), BACKLOG_CSV_FIELDS)
+
+
+def test_csv_import_checks():
+    '''Imported rows are checked against BacklogGame, and columns that
+    aren't game fields are dropped.'''
+    header = BACKLOG_CSV_FIELDS + ['dlc', 'extra', 'owner.name']
+    row = [
+        'G1', 'Game', '', 'PC', 'RPG', 'N', 'Beaten',
+        '10', '', '', '', '', '', '', '', 'Y', 'x', 'y',
+    ]
+
+    def games(*rows):
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        text.seek(0)
+        return csv_games(csv.reader(text), header)
+
+    (doc,) = games(row)
+    assert set(doc) == set(BACKLOG_CSV_FIELDS) | {'dlc'}
+    assert doc['dlc'] == 'Y'
+
+    bad_rows = [
+        {5: 'maybe'},
+        {6: 'Beatn'},
+        {1: ''},
+        {15: ''} | {index: '' for index in range(3, 15)},
+    ]
+    for changes in bad_rows:
+        bad = [changes.get(index, item) for index, item in enumerate(row)]
+        with pytest.raises(HTTPException) as error:
+            games(row, bad)
+        assert error.value.status_code == 400
+        assert error.value.detail == "Bad row! Line: 2"
+
+
+@pytest.fixture
+def backlog_db(monkeypatch):
+    # the API's own reads and writes, pointed at a scratch database
+    client = pymongo.MongoClient(TEST_MONGO, serverSelectionTimeoutMS=2000)
+    try:
+        client.server_info()
+    except pymongo.errors.ServerSelectionTimeoutError:
+        pytest.skip("No local mongod for backlog API tests.")
+    monkeypatch.setattr(haveyouseenx, 'BACKLOG_DATABASE', 'backlogs_api_test')
+    monkeypatch.setattr(haveyouseenx, 'backlog_search', haveyouseenx.BacklogSearch())
+    monkeypatch.setattr(haveyouseenx, 'figure_cache', haveyouseenx.FigureCache())
+    client.drop_database('backlogs_api_test')
+    yield client.backlogs_api_test
+    client.drop_database('backlogs_api_test')
+    client.close()
+
+
+def test_import_then_list(backlog_db):
+    '''Imported games get ObjectIds and read back through the API.'''
+    with open(BACKUP_CSV, 'rb') as backup_csv:
+        content = backup_csv.read()
+    with open(BACKUP_CSV, encoding='latin1', newline='') as backup_csv:
+        rows = csv.reader(backup_csv)
+        next(rows)
+        csv_ids = {row[0] for row in rows}
+
+    async def import_and_list():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        counts = [
+            await haveyouseenx.import_games(
+                'annuitydew',
+                UploadFile(filename='backlog.csv', file=io.BytesIO(content)),
+                client,
+                None,
+            )
+            for _ in range(2)
+        ]
+        page = await haveyouseenx.get_all_games('annuitydew', client, 1000, None)
+        game = await haveyouseenx.get_game(
+            'annuitydew', page['results'][0].id, client, None
+        )
+        results = await haveyouseenx.search(
+            'annuitydew', client, None, None, None, 'zelda', 1000, None
+        )
+        changes = await haveyouseenx.get_changes('annuitydew', client, 0, 1000)
+        client.close()
+        return counts, page, game, results, changes
+
+    counts, page, game, results, changes = asyncio.run(import_and_list())
+    assert counts[0] == {'inserted': len(csv_ids), 'updated': 0, 'unchanged': 0}
+    # importing the same file again changes nothing
+    assert counts[1] == {'inserted': 0, 'updated': 0, 'unchanged': len(csv_ids)}
+    assert page['total'] == len(csv_ids)
+    assert {game.csv_id for game in page['results']} == csv_ids
+    assert game == page['results'][0]
+    assert results['results']
+    assert len(changes['updated']) == len(csv_ids)
+
+
+def test_owner_checks():
+    '''Every write route checks the caller owns the backlog.'''
+    annuitydew = UserOut(username='annuitydew')
+    assert asyncio.run(backlog_owner('annuitydew', annuitydew)) is annuitydew
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(backlog_owner('matt', annuitydew))
+    assert error.value.status_code == 403
+
+    for route in haveyouseenx.hysx_api.routes:
+        if route.methods & {'POST', 'PATCH', 'PUT', 'DELETE'}:
+            calls = [dependency.call for dependency in route.dependant.dependencies]
+            assert backlog_owner in calls, route.path
+
+
+def test_other_owners_games(backlog_db):
+    '''Another owner's game ids are a 404 on every single game route,
+    while the owner's own edit goes through.'''
+    async def cross_owner():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        game = BacklogGame(
+            game_title='Game', game_system='PC', genre='RPG', dlc='N',
+            now_playing='N', game_status='Started',
+        )
+        await haveyouseenx.add_games('matt', [game], client, None)
+        calls = [
+            haveyouseenx.get_game('annuitydew', game.id, client, None),
+            haveyouseenx.edit_game(
+                'annuitydew', game.id, BacklogGamePatch(genre='FPS'), client, None
+            ),
+            haveyouseenx.delete_game('annuitydew', game.id, client, None),
+            # and it can't be overwritten through another backlog either
+            haveyouseenx.add_games('annuitydew', [game], client, None),
+        ]
+        errors = []
+        for call in calls:
+            with pytest.raises(HTTPException) as error:
+                await call
+            errors.append(error.value.status_code)
+        stored = await haveyouseenx.get_game('matt', game.id, client, None)
+        await haveyouseenx.edit_game(
+            'matt', game.id, BacklogGamePatch(genre='FPS'), client, None
+        )
+        edited = await haveyouseenx.get_game('matt', game.id, client, None)
+        client.close()
+        return errors, stored, edited
+
+    errors, stored, edited = asyncio.run(cross_owner())
+    assert errors == [404, 404, 404, 400]
+    assert stored.owner == 'matt'
+    assert stored.genre == 'RPG'
+    assert edited.owner == 'matt'
+    assert edited.genre == 'FPS'
+
+
+def test_edit_game(backlog_db):
+    '''An edit lands on the owner's game and moves its timeline, counters
+    and changes along with it.'''
+    async def edit():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        game = BacklogGame(
+            game_title='Game', game_system='PC', genre='RPG', dlc='N',
+            now_playing='Y', game_status='Started',
+            add_date=datetime.datetime(2020, 1, 1),
+            start_date=datetime.datetime(2020, 2, 1),
+        )
+        other = BacklogGame(
+            game_title='Other', game_system='PS4', genre='RPG', dlc='N',
+            now_playing='N', game_status='Not Started',
+            add_date=datetime.datetime(2020, 1, 1),
+        )
+        await haveyouseenx.add_games('annuitydew', [game, other], client, None)
+        # stored counters and timeline, so the edit has to update them in place
+        await haveyouseenx.get_counters('annuitydew', client)
+        await haveyouseenx.timeline('annuitydew', client)
+        before = await haveyouseenx.get_changes('annuitydew', client, 0, PAGE_LIMIT)
+
+        patch = BacklogGamePatch(
+            game_status='Beaten', beat_date=datetime.datetime(2020, 3, 1), game_hours=12
+        )
+        await haveyouseenx.edit_game('annuitydew', game.id, patch, client, None)
+        edited = await haveyouseenx.get_game('annuitydew', game.id, client, None)
+        counters = await haveyouseenx.get_counters('annuitydew', client)
+        timeline = await haveyouseenx.timeline('annuitydew', client)
+        changes = await haveyouseenx.get_changes(
+            'annuitydew', client, before['seq'], PAGE_LIMIT
+        )
+        # the same reads, counted from scratch
+        recount = await haveyouseenx.counters_repair(client, 'annuitydew')
+        await haveyouseenx.timeline_transform(client, 'annuitydew')
+        rebuilt = await haveyouseenx.timeline('annuitydew', client)
+        client.close()
+        return edited, counters, recount, timeline, rebuilt, changes
+
+    edited, counters, recount, timeline, rebuilt, changes = asyncio.run(edit())
+    assert edited.game_status == 'Beaten'
+    assert edited.game_hours == 12
+    assert (edited.owner, edited.genre) == ('annuitydew', 'RPG')
+
+    assert sorted_counts(counters['status']) == {'Beaten': 1, 'Not Started': 1}
+    assert sorted_counts(counters['status']) == sorted_counts(recount['status'])
+    assert counters['game_hours'] == recount['game_hours'] == 12
+    assert timeline == rebuilt
+    assert (timeline['y_data_s'][-1], timeline['y_data_b'][-1]) == (0, 1)
+
+    assert changes['updated'] == [edited]
+    assert changes['deleted'] == []
+    assert changes['seq'] == edited.updated_seq
+
+
+def test_changes_watermark(backlog_db):
+    '''Changes stop short of a write that's still landing, even once a
+    later one has landed, and skip a write that died.'''
+    collection = backlog_db[BacklogGame.__collection__]
+
+    def game(title, updated_seq):
+        return {
+            **BacklogGame(
+                owner='annuitydew', game_title=title, game_system='PC',
+                genre='RPG', dlc='N', now_playing='N', game_status='Started',
+            ).doc(),
+            'updated_seq': updated_seq,
+        }
+
+    async def changes(client):
+        page = await haveyouseenx.get_changes('annuitydew', client, 0, PAGE_LIMIT)
+        return [game.game_title for game in page['updated']], page['seq']
+
+    async def writes():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        seen = []
+        async with haveyouseenx.writing_seqs(client, 'annuitydew') as first:
+            async with haveyouseenx.writing_seqs(client, 'annuitydew') as second:
+                collection.insert_one(game('Second', second))
+            # the second write landed first
+            seen.append(await changes(client))
+            collection.insert_one(game('First', first))
+        seen.append(await changes(client))
+
+        # a write that never lands holds changes back until it times out
+        dead = await haveyouseenx.next_seq(client, 'annuitydew')
+        async with haveyouseenx.writing_seqs(client, 'annuitydew') as third:
+            collection.insert_one(game('Third', third))
+        seen.append(await changes(client))
+        backlog_db[BacklogSeq.__collection__].update_one(
+            {'_id': 'annuitydew', 'writing.first': dead},
+            {'$set': {'writing.$.at': datetime.datetime(2020, 1, 1)}},
+        )
+        seen.append(await changes(client))
+        client.close()
+        return seen
+
+    assert asyncio.run(writes()) == [
+        ([], 0),
+        (['First', 'Second'], 2),
+        (['First', 'Second'], 2),
+        (['First', 'Second', 'Third'], 4),
+    ]
+
+
+def test_search_index_version(backlog_db):
+    '''A search index follows writes made here, and is rebuilt after
+    ones it never saw, like a write through another instance.'''
+    async def searches():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        game = BacklogGame(
+            game_title='Zelda', game_system='Switch', genre='Adventure',
+            dlc='N', now_playing='N', game_status='Started',
+        )
+        await haveyouseenx.add_games('annuitydew', [game], client, None)
+
+        async def titles(q):
+            page = await haveyouseenx.search(
+                'annuitydew', client, None, None, None, q, PAGE_LIMIT, None
+            )
+            return [result.game_title for result in page['results']]
+
+        found = [await titles('zelda')]
+        built = haveyouseenx.backlog_search.indexes['annuitydew']
+        # a write through this instance is applied to the index in place
+        await haveyouseenx.edit_game(
+            'annuitydew', game.id, BacklogGamePatch(game_title='Metroid'), client, None
+        )
+        found.append(await titles('metroid'))
+        edited = haveyouseenx.backlog_search.indexes['annuitydew']
+        # and one straight to the database only moves the version on
+        other = BacklogGame(
+            owner='annuitydew', game_title='Zelda II', game_system='NES',
+            genre='Adventure', dlc='N', now_playing='N', game_status='Beaten',
+        )
+        backlog_db[BacklogGame.__collection__].insert_one(other.doc())
+        await haveyouseenx.counters_update(client, 'annuitydew', doc_list=[other])
+        found.append(await titles('zelda'))
+        client.close()
+        return found, built, edited
+
+    found, built, edited = asyncio.run(searches())
+    assert found == [['Zelda'], ['Metroid'], ['Zelda II']]
+    assert edited[1] is built[1]
+    assert edited[0] == built[0] + 1
+
+
+def test_no_games_no_counters(backlog_db):
+    '''Reading the stats of an owner without games is a 404, and doesn't
+    store counters for them.'''
+    async def reads():
+        client = AsyncIOMotorClient(TEST_MONGO)
+        errors = []
+        for read in [haveyouseenx.get_counters, haveyouseenx.dashboard]:
+            with pytest.raises(HTTPException) as error:
+                await read('nobody', client)
+            errors.append(error.value.status_code)
+        client.close()
+        return errors
+
+    assert asyncio.run(reads()) == [404, 404]
+    assert backlog_db[BacklogCounters.__collection__].count_documents({}) == 0
+
+
+def owner_games(owner, count=20):
+    return [
+        {
+            '_id': ObjectId(),
+            'owner': owner,
+            'game_title': f'Game {i}',
+            'game_system': 'PC',
+            'genre': 'RPG',
+            'dlc': 'N',
+            'now_playing': 'Y' if i % 10 == 0 else 'N',
+            'game_status': 'Started',
+            'add_date': datetime.datetime(2015, 1, 1 + i, 16),
+            'updated_seq': i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def test_owner_load(backlog_db):
+    '''The listing, dashboard, counters and timeline reads cost the same
+    with 1 owner or 10,000 sharing the collection.'''
+    collection = backlog_db[BacklogGame.__collection__]
+    collection.create_indexes(BACKLOG_INDEXES)
+
+    async def reads(client, owner):
+        await haveyouseenx.get_all_games(owner, client, PAGE_LIMIT, None)
+        await haveyouseenx.dashboard(owner, client)
+        await haveyouseenx.get_counters(owner, client)
+        await haveyouseenx.timeline(owner, client)
+
+    async def timed_reads(owners):
+        client = AsyncIOMotorClient(TEST_MONGO)
+        picks = [f'owner{random.randrange(owners)}' for _ in range(300)]
+        # the first read of an owner builds their counters and timeline
+        for owner in set(picks):
+            await reads(client, owner)
+        timings = []
+        for owner in picks:
+            start = time.perf_counter()
+            await reads(client, owner)
+            timings.append(time.perf_counter() - start)
+        client.close()
+        return numpy.percentile(timings, 99)
+
+    p99s, seeded = {}, 0
+    for owners in [1, 100, 10000]:
+        for start in range(seeded, owners, 1000):
+            collection.insert_many([
+                game
+                for owner in range(start, min(start + 1000, owners))
+                for game in owner_games(f'owner{owner}')
+            ])
+        seeded = owners
+        p99s[owners] = asyncio.run(timed_reads(owners))
+
+    # an owner's reads only look at their own games, whatever the timings say
+    plan = collection.find({'owner': 'owner1'}).sort('_id', 1).explain()
+    assert plan['executionStats']['totalDocsExamined'] == 20
+    # flat. the bound is loose, it's there to catch a scan of all 200,000
+    # games rather than noise on a shared machine
+    assert p99s[10000] < 10 * p99s[1] + 0.05